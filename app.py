@@ -1,19 +1,15 @@
 import streamlit as st
 import sqlite3
 from config import DB_PATH
-from modules import welcome, insertcsv, navigator, preview_audit, cleaner_query, analyst, reset, gendata, my_projects
+from utils import list_tables
+from modules import welcome, insertcsv, navigator, preview_audit, cleaner_query, sql_console, analyst, reset, gendata, my_projects
 
 # Connect to SQLite
 def get_connection():
     return sqlite3.connect(DB_PATH)
 
-conn = get_connection()
-
-# Page configuration
-st.set_page_config(page_title="EXES Base Intelligence", layout="wide")
-
-# Inject custom styles
-st.markdown("""
+# Custom styles, injected on every run
+STYLES = """
     <style>
         :root {
             --brand-green: #49A078; /* Primary green */
@@ -235,74 +231,87 @@ st.markdown("""
             }
         }
     </style>
-""", unsafe_allow_html=True)
-
-# Initialize navigation state
-if "page" not in st.session_state:
-    st.session_state["page"] = "Welcome"
+"""
 
 # Navigation function
 def navigate_to(target):
     st.session_state["page"] = target
 
-# Sidebar navigation
-st.sidebar.image("assets/logo.png", width=60)
-st.sidebar.markdown("### 🧠 EXES Base Intelligence")
-st.sidebar.markdown("_We analyze, you decide_", unsafe_allow_html=True)
-selected = st.sidebar.radio("📂 Modules", [
-    "Welcome", "Navigator", "Preview & Audit", "Cleaner & Query", "Analyst", 
-    "Reset", "Insert CSV", "Generate Data", "My Projects"
-], index=["Welcome", "Navigator", "Preview & Audit", "Cleaner & Query", "Analyst", 
-          "Reset", "Insert CSV", "Generate Data", "My Projects"].index(st.session_state["page"]))
-
-if selected != st.session_state["page"]:
-    st.session_state["page"] = selected
-
 def ensure_table_selected(conn):
-    cursor = conn.cursor()
-    cursor.execute("SELECT name FROM sqlite_master WHERE type='table' ORDER BY name")
-    tables = [row[0] for row in cursor.fetchall()]
+    tables = list_tables(conn)
     if tables and "selected_table" not in st.session_state:
         st.session_state["selected_table"] = tables[0]
 
-page = st.session_state["page"]
-if page in ["Preview & Audit", "Cleaner & Query", "Analyst"]:
-    ensure_table_selected(conn)
+def main():
+    conn = get_connection()
+
+    # Page configuration
+    st.set_page_config(page_title="EXES Base Intelligence", layout="wide")
+
+    # Inject custom styles
+    st.markdown(STYLES, unsafe_allow_html=True)
+
+    # Initialize navigation state
+    if "page" not in st.session_state:
+        st.session_state["page"] = "Welcome"
+
+    # Sidebar navigation
+    st.sidebar.image("assets/logo.png", width=60)
+    st.sidebar.markdown("### 🧠 EXES Base Intelligence")
+    st.sidebar.markdown("_We analyze, you decide_", unsafe_allow_html=True)
+    selected = st.sidebar.radio("📂 Modules", [
+        "Welcome", "Navigator", "Preview & Audit", "Cleaner & Query", "SQL Console", "Analyst", 
+        "Reset", "Insert CSV", "Generate Data", "My Projects"
+    ], index=["Welcome", "Navigator", "Preview & Audit", "Cleaner & Query", "SQL Console", "Analyst", 
+              "Reset", "Insert CSV", "Generate Data", "My Projects"].index(st.session_state["page"]))
+
+    if selected != st.session_state["page"]:
+        st.session_state["page"] = selected
+
+    page = st.session_state["page"]
+    if page in ["Preview & Audit", "Cleaner & Query", "Analyst"]:
+        ensure_table_selected(conn)
+
+    # Header
+    col1, col2 = st.columns([1, 5])
+    with col1:
+        st.image("assets/deric.png", width=60)
+    with col2:
+        st.markdown("""
+            <div class="header-title">
+                <a href="https://deric-exes-analytics.netlify.app" target="_blank" style="text-decoration:none; color:#111111;">
+                    EXES Base Intelligence
+                </a>
+            </div>
+            <div class="header-subtitle">Deric — CEO & Founder of EXES</div>
+        """, unsafe_allow_html=True)
 
-# Header
-col1, col2 = st.columns([1, 5])
-with col1:
-    st.image("assets/deric.png", width=60)
-with col2:
-    st.markdown("""
-        <div class="header-title">
-            <a href="https://deric-exes-analytics.netlify.app" target="_blank" style="text-decoration:none; color:#111111;">
-                EXES Base Intelligence
-            </a>
-        </div>
-        <div class="header-subtitle">Deric — CEO & Founder of EXES</div>
-    """, unsafe_allow_html=True)
+    # Route to selected module
+    page = st.session_state["page"]
+    if page == "Welcome":
+        welcome.show()
+    elif page == "Navigator":
+        navigator.show(conn)
+    elif page == "Preview & Audit":
+        preview_audit.show(conn)
+    elif page == "Cleaner & Query":
+        cleaner_query.show(conn)
+    elif page == "SQL Console":
+        sql_console.show(conn)
+    elif page == "Analyst":
+        analyst.show(conn)
+    elif page == "Reset":
+        reset.show()
+    elif page == "Insert CSV":
+        insertcsv.show(conn)
+    elif page == "Generate Data":
+        gendata.show(conn)
+    elif page == "My Projects":
+        my_projects.show()
 
-# Route to selected module
-page = st.session_state["page"]
-if page == "Welcome":
-    welcome.show()
-elif page == "Navigator":
-    navigator.show(conn)
-elif page == "Preview & Audit":
-    preview_audit.show(conn)
-elif page == "Cleaner & Query":
-    cleaner_query.show(conn)
-elif page == "Analyst":
-    analyst.show(conn)
-elif page == "Reset":
-    reset.show()
-elif page == "Insert CSV":
-    insertcsv.show(conn)
-elif page == "Generate Data":
-    gendata.show(conn)
-elif page == "My Projects":
-    my_projects.show()
+    # Footer
+    #st.markdown("<div class='footer-text'>© 2025 EXES Intelligence — We analyze, you decide</div>", unsafe_allow_html=True)
 
-# Footer
-#st.markdown("<div class='footer-text'>© 2025 EXES Intelligence — We analyze, you decide</div>", unsafe_allow_html=True)
\ No newline at end of file
+# Guarded so multiprocessing workers that re-import this script do not render the app
+if __name__ == "__main__":
+    main()
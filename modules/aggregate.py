@@ -0,0 +1,119 @@
+"""
+Chart Aggregation
+Pushes the visualizer's grouping down into SQLite so charts cover the whole table: one
+GROUP BY returns a count and a sum per group (or per numeric bin, with the same edges as
+the in-memory binning engine), and only those few rows come back to Python. Means are
+derived from sum and count, so the groups left over beyond the top ones can be folded into
+an exact "Other" row.
+"""
+__all__ = ["AGGREGATIONS", "group_totals", "bin_totals", "agg_values"]
+
+import numpy as np
+import pandas as pd
+
+from modules.binning import bin_edges
+from modules.ingest import quote_ident
+from modules.querycache import cached_query
+
+AGGREGATIONS = ("mean", "sum", "count")
+MAX_GROUPS = 10
+OTHER_LABEL = "Other"
+
+def _where(x, y, numeric_x, numeric_y):
+    """Rows the pandas path would keep after dropna (and, for numeric columns, numbers only)"""
+    conditions = [f"{x} IS NOT NULL", f"{y} IS NOT NULL"]
+    if numeric_x:
+        conditions.append(f"typeof({x}) IN ('integer', 'real')")
+    if numeric_y:
+        conditions.append(f"typeof({y}) IN ('integer', 'real')")
+    return " AND ".join(conditions)
+
+def _frame(conn, sql, params=()):
+    columns, rows = cached_query(conn, sql, params)
+    return pd.DataFrame(rows, columns=columns)
+
+def group_totals(conn, table, x_col, y_col, numeric_y, max_groups=MAX_GROUPS):
+    """
+    DataFrame of label, count, total per value of `x_col` (total is NULL unless `numeric_y`).
+    Beyond `max_groups` values, the most frequent ones are kept and the rest summed into "Other".
+    """
+    x, y = quote_ident(x_col), quote_ident(y_col)
+    total_sql = f"SUM({y})" if numeric_y else "NULL"
+    where = _where(x, y, False, numeric_y)
+    source = f"FROM {quote_ident(table)} WHERE {where}"
+    groups = _frame(conn, f"SELECT {x} AS label, COUNT({y}) AS count, {total_sql} AS total {source} "
+                          f"GROUP BY {x} ORDER BY count DESC, label LIMIT ?", (max_groups + 1,))
+    if len(groups) > max_groups:
+        overall = _frame(conn, f"SELECT COUNT({y}) AS count, {total_sql} AS total {source}").iloc[0]
+        groups = groups.iloc[:max_groups]
+        other = {"label": OTHER_LABEL, "count": overall["count"] - groups["count"].sum(),
+                 "total": overall["total"] - groups["total"].sum() if numeric_y else None}
+        try:
+            groups = groups.sort_values("label")
+        except TypeError:
+            pass  # mixed value types: keep frequency order
+        return pd.concat([groups, pd.DataFrame([other])], ignore_index=True)
+    try:
+        return groups.sort_values("label").reset_index(drop=True)
+    except TypeError:
+        return groups
+
+def _quantile_edges(conn, x, source, where, num_bins):
+    """np.quantile (linear) edges of `x` from the few order statistics they need, repeated edges dropped"""
+    n = _frame(conn, f"SELECT COUNT(*) AS n FROM {source} WHERE {where}").iloc[0]["n"]
+    if not n:
+        return np.array([])
+    positions = np.linspace(0, 1, num_bins + 1) * (n - 1)
+    ranks = sorted({int(r) for r in np.concatenate([np.floor(positions), np.ceil(positions)])})
+    stats = _frame(conn, f"""
+        SELECT pos, x FROM (SELECT ROW_NUMBER() OVER (ORDER BY {x}) - 1 AS pos, {x} AS x FROM {source} WHERE {where})
+        WHERE pos IN ({", ".join("?" * len(ranks))})
+    """, ranks)
+    values = dict(zip(stats["pos"].astype(int), stats["x"].astype(float)))
+    lower = np.array([values[int(r)] for r in np.floor(positions)])
+    upper = np.array([values[int(r)] for r in np.ceil(positions)])
+    return np.unique(lower + (upper - lower) * (positions - np.floor(positions)))
+
+def bin_totals(conn, table, x_col, y_col, numeric_y, method, num_bins, start=None, end=None):
+    """
+    DataFrame of bin, low, high, count, total per non-empty bin of numeric `x_col`, in bin order.
+    Edges and bins follow binning.bin_edges/bin_frame, so both engines chart the same bins:
+    "Equal width" spans the column's range, "Equal frequency" uses its quantiles and
+    "Custom range" spans `start` to `end`. Bins are right-closed, except that the first
+    includes its lower edge; values outside the edges are dropped.
+    """
+    x, y = quote_ident(x_col), quote_ident(y_col)
+    total_sql = f"SUM({y})" if numeric_y else "NULL"
+    where = _where(x, y, True, numeric_y)
+    source = quote_ident(table)
+    empty = pd.DataFrame(columns=["bin", "low", "high", "count", "total"])
+    if method == "Equal frequency":
+        edges = _quantile_edges(conn, x, source, where, int(num_bins))
+    elif method == "Custom range":
+        edges = bin_edges(None, method, num_bins, start, end)
+    else:
+        low, high = _frame(conn, f"SELECT MIN({x}), MAX({x}) FROM {source} WHERE {where}").iloc[0]
+        edges = np.array([]) if pd.isna(low) else bin_edges(pd.Series([low, high], dtype=float), method, num_bins)
+    if len(edges) < 2:
+        return empty
+
+    # Same assignment as np.digitize(x, edges[1:-1], right=True)
+    inner = [float(edge) for edge in edges[1:-1]]
+    case = ("CASE " + " ".join(f"WHEN {x} <= ? THEN {i}" for i in range(len(inner))) + f" ELSE {len(inner)} END"
+            if inner else "0")
+    frame = _frame(conn, f"""
+        SELECT {case} AS bin, COUNT({y}) AS count, {total_sql} AS total
+        FROM {source} WHERE {where} AND {x} BETWEEN ? AND ? GROUP BY bin ORDER BY bin
+    """, inner + [float(edges[0]), float(edges[-1])])
+    bins = frame["bin"].to_numpy(dtype=int)
+    frame.insert(1, "low", edges[:-1][bins])
+    frame.insert(2, "high", edges[1:][bins])
+    return frame
+
+def agg_values(frame, agg):
+    """The chart values of a group_totals/bin_totals frame for `agg` (mean, sum or count)"""
+    if agg == "count":
+        return frame["count"].astype(float)
+    if agg == "sum":
+        return frame["total"].astype(float)
+    return frame["total"].astype(float) / frame["count"].where(frame["count"] > 0)
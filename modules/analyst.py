@@ -1,7 +1,10 @@
 import streamlit as st
 import pandas as pd
-from utils import navigate_to
+from utils import navigate_to, list_tables
 from modules import visualizer
+from modules.ingest import quote_ident
+from modules.querycache import cached_frame
+from modules.datastore import get_frame
 
 def show(conn):
     # Make all Streamlit notifications bold green
@@ -19,9 +22,7 @@ def show(conn):
 
     st.subheader("🧠 Analyst Visualization")
 
-    cursor = conn.cursor()
-    cursor.execute("SELECT name FROM sqlite_master WHERE type='table' ORDER BY name")
-    tables = [t[0] for t in cursor.fetchall()]
+    tables = list_tables(conn)
     st.markdown("**Tables in database:**")
     st.write(tables)
 
@@ -29,16 +30,19 @@ def show(conn):
     table = current_table
 
     if table:
-        # Check if we have a cleaned DataFrame in session state
-        if "cleaned_df" in st.session_state:
+        # Check if we have a cleaned DataFrame from the Cleaner (memory-mapped from the dataset store)
+        df = None
+        using_cleaned = False
+        if "cleaned_handle" in st.session_state:
+            df = get_frame(st.session_state.cleaned_handle)
+        elif "cleaned_df" in st.session_state:
             df = st.session_state.cleaned_df
+        if df is not None:
+            using_cleaned = True
             st.success(f"Using cleaned dataset with {df.shape[1]} columns and {df.shape[0]} rows")
         else:
             # Fall back to loading from database if no cleaned DataFrame is available
-            cursor.execute(f"SELECT * FROM '{table}' LIMIT 1000")
-            rows = cursor.fetchall()
-            cols = [desc[0] for desc in cursor.description]
-            df = pd.DataFrame(rows, columns=cols)
+            df = cached_frame(conn, f"SELECT * FROM {quote_ident(table)} LIMIT 1000")
             st.info("Using original dataset (no cleaned version found)")
 
         st.markdown("### Select Columns to Visualize")
@@ -49,7 +53,8 @@ def show(conn):
 
         df_selected = df[selected_cols]
         st.markdown("### Visualization & Insights")
-        visualizer.show(df_selected, title="📊 Analyst Visualization", key="analyst")
+        visualizer.show(df_selected, title="📊 Analyst Visualization", key="analyst", conn=conn, table=table,
+                          pushdown=not using_cleaned)
         st.markdown("#### Insights")
         st.write(df_selected.describe(include="all"))
 
@@ -7,7 +7,56 @@ __all__ = ["show"]
 import streamlit as st
 import pandas as pd
 import numpy as np
-from utils import navigate_to
+from utils import navigate_to, list_tables
+from modules.snapshots import save_snapshot
+from modules.profiler import get_stats, stats_frame
+from modules.versions import bump_version, table_version
+from modules.sketches import get_sketches
+from modules.typeinfer import infer_table, cleaner_types, datetime_formats
+from modules.filters import OPERATORS, NO_VALUE_OPERATORS, filtered_query, explain_plan
+from modules.cleaning import DTYPE_MAP, ROW_STEPS, cast_column, apply_step, empty_columns, clean_table
+from modules.recipes import make_recipe, save_recipe, load_recipe, list_recipes, compile_recipe, run_recipe
+from modules.memo import run_step, cache_info
+from modules.loader import load_frame
+from modules.querycache import cached_query, cache_info as query_cache_info
+from modules.datastore import session_id, put_frame
+
+def _apply_casts(df, casts):
+    df = df.copy(deep=False)
+    for col, dtype_name in casts.items():
+        if col in df.columns:
+            df[col] = cast_column(df[col], dtype_name)
+    return df
+
+def _detect_types(types, sketches):
+    """Most likely type of each column: the sampled inference, overridden by full-table sketches when given"""
+    detected_types = cleaner_types(types)
+    for col in detected_types:
+        if not (sketches and col in sketches):
+            continue
+        numeric_percent = sketches[col].percent("numeric")
+        datetime_percent = sketches[col].percent("datetime")
+        bool_percent = sketches[col].percent("boolean")
+
+        # Determine most likely type
+        if numeric_percent > 80:
+            detected_types[col] = "Numeric"
+        elif datetime_percent > 80:
+            detected_types[col] = "Datetime"
+        elif bool_percent > 80:
+            detected_types[col] = "Boolean"
+        else:
+            detected_types[col] = "Text"
+    return detected_types
+
+def _drop_empty(df):
+    return df.drop(columns=empty_columns(df))
+
+def _edit_columns(df, drop_columns, renames):
+    return df.drop(columns=[c for c in drop_columns if c in df.columns]).rename(columns=renames)
+
+def _format_head(df, formatter):
+    return df.head().map(lambda x: formatter(x) if isinstance(x, (int, float)) else x)
 
 def show(conn):
     # Make all Streamlit notifications (info/success/warning/error) bold green without changing logic
@@ -25,8 +74,7 @@ def show(conn):
 
     #st.info("Cleaner & Query module activated. (Core system module)")
     cursor = conn.cursor()
-    cursor.execute("SELECT name FROM sqlite_master WHERE type='table' ORDER BY name")
-    tables = [row[0] for row in cursor.fetchall()]
+    tables = list_tables(conn)
     current_table = st.session_state.get("selected_table", tables[0] if tables else None)
     table = current_table
 
@@ -45,9 +93,9 @@ def show(conn):
             try:
                 cursor.execute(f"DROP TABLE IF EXISTS '{table}'")
                 conn.commit()
+                bump_version(conn, table)
                 st.success(f"Table '{table}' deleted.")
-                cursor.execute("SELECT name FROM sqlite_master WHERE type='table' ORDER BY name")
-                tables = [row[0] for row in cursor.fetchall()]
+                tables = list_tables(conn)
                 if tables:
                     st.session_state["selected_table"] = tables[0]
                 else:
@@ -61,20 +109,30 @@ def show(conn):
             try:
                 cursor.execute(f"ALTER TABLE '{table}' RENAME TO '{new_name}'")
                 conn.commit()
+                bump_version(conn, table)
+                bump_version(conn, new_name)
                 st.success(f"Table '{table}' renamed to '{new_name}'.")
                 st.session_state["selected_table"] = new_name
                 # Refresh table list after rename
-                cursor.execute("SELECT name FROM sqlite_master WHERE type='table' ORDER BY name")
-                tables = [row[0] for row in cursor.fetchall()]
+                tables = list_tables(conn)
             except Exception as e:
                 # Make inline rename error bold green to match notifications
                 st.markdown(f"<span style='color:#198754;font-weight:bold;'>Rename error: {e}</span>", unsafe_allow_html=True)
 
+    # Row filters are kept per table and pushed down into the query that loads the data
+    filters_key = f"cleaner_filters_{table}"
+    row_filters = st.session_state.setdefault(filters_key, [])
+    table_columns = [row[1] for row in cached_query(conn, f"PRAGMA table_info('{table}')")[1]]
+    row_filters[:] = [flt for flt in row_filters if flt["column"] in table_columns]
+    # Column edits (casts, drops, renames) persist across reruns too, so they can be saved as a recipe
+    column_edits = st.session_state.setdefault(f"cleaner_edits_{table}", {"casts": {}, "drop_columns": [], "renames": {}})
+
     try:
-        cursor.execute(f"SELECT * FROM '{table}' LIMIT 1000")
-        rows = cursor.fetchall()
-        cols = [desc[0] for desc in cursor.description]
-        df = pd.DataFrame(rows, columns=cols)
+        # Each step below is memoized on (data version, upstream step, parameters), so a widget
+        # change only recomputes the steps it affects. Step outputs are shared: never mutate them.
+        filter_sql, filter_params = filtered_query(table, row_filters, limit=1000)
+        fetch_key, df = run_step("fetch", [table, table_version(conn, table)], [filter_sql, filter_params],
+                                 load_frame, conn, filter_sql, filter_params)
 
         # Function to format large numbers with K/M notation
         def format_large_numbers(val):
@@ -89,42 +147,33 @@ def show(conn):
 
         # Display a formatted preview of data
         st.write("🔍 Raw Data Snapshot")
-        st.dataframe(df.head().applymap(lambda x: format_large_numbers(x) if isinstance(x, (int, float)) else x))
+        st.dataframe(run_step("format_head", fetch_key, {}, _format_head, df, format_large_numbers)[1])
 
-        nulls = df.isnull().sum()
-        blanks = (df == '').sum()
-        duplicates = df.duplicated().sum()
+        # Whole-table counts from the stats catalog; recomputed only when the table changes
+        stats = get_stats(conn, table)
+        col_stats = stats_frame(stats)
 
         with st.expander("🧼 Cleaning Summary"):
+            st.markdown(f"<span style='color:black'>Across all {stats['rows']:,} rows (computed {stats['computed_at']})</span>", unsafe_allow_html=True)
             st.markdown("<span style='color:black'>NULLs per column</span>", unsafe_allow_html=True)
-            st.write(nulls)
+            st.write(col_stats["nulls"])
             st.markdown("<span style='color:black'>Blank strings per column</span>", unsafe_allow_html=True)
-            st.markdown(f"<span style='color:black'>Duplicate rows: {duplicates}</span>", unsafe_allow_html=True)
+            st.write(col_stats["blanks"])
+            st.markdown(f"<span style='color:black'>Duplicate rows: {stats['duplicate_rows']}</span>", unsafe_allow_html=True)
 
         # --- Intelligent Data Type Detection ---
         st.markdown("#### Data Type Detection")
-        detected_types = {}
-        for col in df.columns:
-            # Check for numeric type
-            numeric_percent = pd.to_numeric(df[col], errors='coerce').notna().mean() * 100
-            
-            # Check for datetime type
-            datetime_percent = pd.to_datetime(df[col], errors='coerce').notna().mean() * 100
-            
-            # Check for boolean type
-            bool_values = {'true', 'false', 'yes', 'no', 't', 'f', 'y', 'n', '1', '0', 'True', 'False'}
-            bool_percent = df[col].astype(str).str.lower().isin(bool_values).mean() * 100
-            
-            # Determine most likely type
-            if numeric_percent > 80:
-                detected_types[col] = "Numeric"
-            elif datetime_percent > 80:
-                detected_types[col] = "Datetime" 
-            elif bool_percent > 80:
-                detected_types[col] = "Boolean"
-            else:
-                detected_types[col] = "Text"
-                
+        # Full-table estimates from stored sketches when available, otherwise a sample of the table
+        # (inferred once per data version)
+        inferred_types = infer_table(conn, table)
+        date_formats = datetime_formats(inferred_types)
+        sketches = get_sketches(conn, table, build=st.button("📐 Detect types on the full table", key="build_sketches"))
+        if sketches:
+            st.markdown(f"<span style='color:black'>Based on all {next(iter(sketches.values())).counts['rows']:,} rows (sketch estimates)</span>", unsafe_allow_html=True)
+        else:
+            st.markdown("<span style='color:black'>Based on a random sample of rows</span>", unsafe_allow_html=True)
+        _, detected_types = run_step("detect_types", fetch_key, {"sketched": bool(sketches)}, _detect_types, inferred_types, sketches)
+
         # Display detected types in a nice format
         st.markdown("<span style='color:black'>Detected column types:</span>", unsafe_allow_html=True)
         type_cols = st.columns(3)
@@ -136,7 +185,8 @@ def show(conn):
                     "Boolean": "✓✗",
                     "Text": "📝"
                 }.get(dtype, "📄")
-                st.markdown(f"<span style='color:black'>{icon} {col}: <b>{dtype}</b></span>", unsafe_allow_html=True)
+                fmt = f" <code>{date_formats[col]}</code>" if dtype == "Datetime" and col in date_formats else ""
+                st.markdown(f"<span style='color:black'>{icon} {col}: <b>{dtype}</b>{fmt}</span>", unsafe_allow_html=True)
         
         # --- Cleaning Options ---
         st.markdown("#### Clean Your Data")
@@ -173,15 +223,10 @@ def show(conn):
             st.markdown("<span style='color:black'>Drop columns that are entirely NULL/blank</span>", unsafe_allow_html=True)
 
         # --- Change Column Datatypes ---
+        cast_key, df = run_step("casts", fetch_key, column_edits["casts"], _apply_casts, df, column_edits["casts"])
         with st.expander("🔧 Change Column Datatypes", expanded=False):
             st.markdown("<span style='color:black'>Change the datatype of columns if needed (e.g., to numeric, string, datetime)</span>", unsafe_allow_html=True)
-            dtype_map = {
-                "String": "object",
-                "Numeric": "float",
-                "Integer": "int",
-                "Datetime": "datetime64[ns]",
-                "Boolean": "bool"
-            }
+            dtype_map = DTYPE_MAP
             col1, col2 = st.columns([2, 2])
             with col1:
                 dtype_col = st.selectbox("Column", df.columns, key="dtype_col")
@@ -189,58 +234,39 @@ def show(conn):
                 dtype_type = st.selectbox("New datatype", list(dtype_map.keys()), key="dtype_type", 
                                         index=list(dtype_map.keys()).index("String" if detected_types.get(dtype_col, "Text") == "Text" else "Numeric"))
             if st.button("Apply Datatype Change", key="apply_dtype_change"):
-                try:
-                    if dtype_map[dtype_type] == "datetime64[ns]":
-                        df[dtype_col] = pd.to_datetime(df[dtype_col], errors="coerce")
-                    elif dtype_map[dtype_type] == "bool":
-                        df[dtype_col] = df[dtype_col].astype(str).str.lower().map({"true": True, "false": False, 
-                                                                                "yes": True, "no": False, 
-                                                                                "y": True, "n": False, 
-                                                                                "1": True, "0": False})
-                    else:
-                        df[dtype_col] = df[dtype_col].astype(dtype_map[dtype_type], errors="ignore")
-                    st.success(f"Changed `{dtype_col}` to {dtype_type}")
-                except Exception as e:
-                    st.error(f"Datatype change error: {e}")
-
-        cleaned_df = df.copy()
-        if drop_duplicates:
-            cleaned_df = cleaned_df.drop_duplicates()
-        if drop_blanks:
-            cleaned_df.replace('', np.nan, inplace=True)
-        if drop_nulls:
-            cleaned_df.dropna(inplace=True)
-        if normalize_case:
-            for col in cleaned_df.select_dtypes(include='object').columns:
-                cleaned_df[col] = cleaned_df[col].astype(str).str.title()
-        if auto_convert_types:
-            for col, dtype in detected_types.items():
-                try:
-                    if dtype == "Numeric":
-                        cleaned_df[col] = pd.to_numeric(cleaned_df[col], errors='coerce')
-                    elif dtype == "Datetime":
-                        cleaned_df[col] = pd.to_datetime(cleaned_df[col], errors='coerce')
-                    elif dtype == "Boolean":
-                        cleaned_df[col] = cleaned_df[col].astype(str).str.lower().map({"true": True, "false": False, 
-                                                                                     "yes": True, "no": False, 
-                                                                                     "y": True, "n": False, 
-                                                                                     "1": True, "0": False})
-                except:
-                    # If conversion fails, keep as is
-                    pass
+                column_edits["casts"][dtype_col] = dtype_type
+                st.rerun()
+            if column_edits["casts"]:
+                st.markdown("<span style='color:black'>Applied: " + ", ".join(f"`{col}` → {name}" for col, name in column_edits["casts"].items()) + "</span>", unsafe_allow_html=True)
+
+        cleaning_steps = {
+            "drop_duplicates": drop_duplicates,
+            "drop_blanks": drop_blanks,
+            "drop_nulls": drop_nulls,
+            "normalize_case": normalize_case,
+            "auto_convert_types": auto_convert_types,
+            "drop_empty_columns": drop_empty_columns,
+        }
+        # Disabled steps pass their upstream key through, so toggling one step keeps the others cached
+        step_key, cleaned_df = cast_key, df
+        for step_name, _ in ROW_STEPS:
+            if cleaning_steps[step_name]:
+                params = [detected_types, date_formats] if step_name == "auto_convert_types" else {}
+                step_key, cleaned_df = run_step(step_name, step_key, params, apply_step, step_name, cleaned_df, detected_types, date_formats)
         # Robustly drop empty columns (all NULL or blank/whitespace) if selected
-        if 'drop_empty_columns' in locals() and drop_empty_columns:
-            tmp = cleaned_df.copy()
-            obj_cols = tmp.select_dtypes(include='object').columns
-            if len(obj_cols) > 0:
-                # Treat pure whitespace as empty
-                tmp[obj_cols] = tmp[obj_cols].replace(r'^\s*$', np.nan, regex=True)
-            empty_cols = [c for c in tmp.columns if tmp[c].isna().all()]
+        if drop_empty_columns:
+            before = list(cleaned_df.columns)
+            step_key, cleaned_df = run_step("drop_empty_columns", step_key, {}, _drop_empty, cleaned_df)
+            empty_cols = [c for c in before if c not in cleaned_df.columns]
             if empty_cols:
-                cleaned_df.drop(columns=empty_cols, inplace=True)
                 st.success(f"Dropped empty columns: {', '.join(empty_cols)}")
             else:
                 st.info("No empty columns to drop.")
+        # Replay the column drops and renames made on earlier reruns
+        step_key, cleaned_df = run_step("edit_columns", step_key, column_edits, _edit_columns, cleaned_df,
+                                        column_edits["drop_columns"], column_edits["renames"])
+        pipeline_key, pipeline_df = step_key, cleaned_df
+        original_names = {new: old for old, new in column_edits["renames"].items()}
         # --- Column/Row Selection Section ---
         with st.expander("🗑️ Drop Columns or Filter Rows", expanded=False):
             st.markdown("<span style='color:black;font-weight:bold;'>Remove specific columns or rows from dataset</span>", unsafe_allow_html=True)
@@ -257,10 +283,12 @@ def show(conn):
                             # Keep track of original shape
                             orig_cols = cleaned_df.shape[1]
                             
-                            # Create a new DataFrame excluding the selected columns
-                            # This ensures we're creating a new DataFrame, not a view
-                            remaining_columns = [col for col in cleaned_df.columns if col not in columns_to_drop]
-                            cleaned_df = cleaned_df[remaining_columns].copy()
+                            # drop returns a new frame, so the cached frame stays untouched
+                            cleaned_df = cleaned_df.drop(columns=columns_to_drop)
+                            for col in columns_to_drop:
+                                original = original_names.get(col, col)
+                                column_edits["drop_columns"].append(original)
+                                column_edits["renames"].pop(original, None)
                             
                             dropped_count = orig_cols - cleaned_df.shape[1]
                             st.success(f"Dropped {dropped_count} columns: {', '.join(columns_to_drop)}")
@@ -271,21 +299,23 @@ def show(conn):
             st.markdown("---")
             
             # Row filtering section
-            st.markdown("<span style='color:black;font-weight:bold;'>Filter rows by condition:</span>", unsafe_allow_html=True)
+            st.markdown("<span style='color:black;font-weight:bold;'>Filter rows by condition (runs on the full table):</span>", unsafe_allow_html=True)
             
-            filter_col1, filter_col2, filter_col3 = st.columns([1.5, 1, 1.5])
+            filter_col0, filter_col1, filter_col2, filter_col3 = st.columns([0.8, 1.5, 1, 1.5])
+            with filter_col0:
+                filter_join = st.selectbox("Combine", ["AND", "OR"], key="filter_join", disabled=not row_filters)
             with filter_col1:
-                filter_column = st.selectbox("Select column", cleaned_df.columns, key="filter_column")
+                filter_column = st.selectbox("Select column", df.columns, key="filter_column")
             
             with filter_col2:
-                operators = ["equals", "not equals", "greater than", "less than", "contains", "starts with", "ends with", "is null", "is not null"]
-                filter_operator = st.selectbox("Condition", operators, key="filter_operator")
+                filter_operator = st.selectbox("Condition", OPERATORS, key="filter_operator")
             
+            filter_value = None
             with filter_col3:
                 # Only show value input for operators that need it
-                if filter_operator not in ["is null", "is not null"]:
+                if filter_operator not in NO_VALUE_OPERATORS:
                     # Use the appropriate input type based on column data type
-                    col_dtype = str(cleaned_df[filter_column].dtype)
+                    col_dtype = str(df[filter_column].dtype)
                     if "int" in col_dtype or "float" in col_dtype:
                         try:
                             filter_value = st.number_input("Value", value=0, key="filter_value")
@@ -297,43 +327,34 @@ def show(conn):
                         filter_value = st.text_input("Value", key="filter_value")
             
             if st.button("Apply Filter", key="apply_filter_btn"):
-                try:
-                    orig_rows = len(cleaned_df)
-                    
-                    # Create filter based on selected operator
-                    if filter_operator == "equals":
-                        mask = cleaned_df[filter_column] == filter_value
-                    elif filter_operator == "not equals":
-                        mask = cleaned_df[filter_column] != filter_value
-                    elif filter_operator == "greater than":
-                        mask = cleaned_df[filter_column] > filter_value
-                    elif filter_operator == "less than":
-                        mask = cleaned_df[filter_column] < filter_value
-                    elif filter_operator == "contains":
-                        mask = cleaned_df[filter_column].astype(str).str.contains(str(filter_value), na=False)
-                    elif filter_operator == "starts with":
-                        mask = cleaned_df[filter_column].astype(str).str.startswith(str(filter_value), na=False)
-                    elif filter_operator == "ends with":
-                        mask = cleaned_df[filter_column].astype(str).str.endswith(str(filter_value), na=False)
-                    elif filter_operator == "is null":
-                        mask = cleaned_df[filter_column].isna()
-                    elif filter_operator == "is not null":
-                        mask = ~cleaned_df[filter_column].isna()
-                    
-                    # Apply the filter
-                    cleaned_df = cleaned_df[mask]
-                    
-                    # Show results
-                    filtered_rows = len(cleaned_df)
-                    removed_rows = orig_rows - filtered_rows
-                    st.success(f"Filter applied: Kept {filtered_rows} rows, removed {removed_rows} rows")
-                except Exception as e:
-                    st.error(f"Error applying filter: {e}")
+                row_filters.append({"column": filter_column, "operator": filter_operator,
+                                    "value": filter_value, "join": filter_join})
+                st.rerun()
+
+            if row_filters:
+                for i, flt in enumerate(row_filters):
+                    col1, col2 = st.columns([5, 1])
+                    with col1:
+                        join = f"{flt['join']} " if i else ""
+                        value = "" if flt["operator"] in NO_VALUE_OPERATORS else f" '{flt['value']}'"
+                        st.markdown(f"<span style='color:black;'>{join}<b>{flt['column']}</b> {flt['operator']}{value}</span>", unsafe_allow_html=True)
+                    with col2:
+                        if st.button("Remove", key=f"remove_filter_{i}"):
+                            row_filters.pop(i)
+                            st.rerun()
+                count_sql, count_params = filtered_query(table, row_filters)
+                matched = conn.execute(f"SELECT COUNT(*) FROM ({count_sql})", count_params).fetchone()[0]
+                st.success(f"Filter applied: {matched} rows of the full table match; loaded {len(df)} rows")
+                st.code(filter_sql, language="sql")
+                st.markdown(f"<span style='color:black;'>Parameters: {filter_params}</span>", unsafe_allow_html=True)
+                st.markdown("<span style='color:black;'>EXPLAIN QUERY PLAN</span>", unsafe_allow_html=True)
+                st.dataframe(explain_plan(conn, filter_sql, filter_params))
             
             # Option to reset all filters
             if st.button("Reset to Original Data", key="reset_filters"):
-                cleaned_df = df.copy()
-                st.success("Reset to original data. All filters and transformations cleared.")
+                row_filters.clear()
+                st.session_state.pop(f"cleaner_edits_{table}", None)
+                st.rerun()
 
         # --- Column Rename/Edit Section ---
         with st.expander("✏️ Rename or Edit Columns", expanded=False):
@@ -358,6 +379,7 @@ def show(conn):
                                 col_mapping = {col_to_rename: new_col_name}
                                 # Apply rename to the cleaned dataframe
                                 cleaned_df = cleaned_df.rename(columns=col_mapping)
+                                column_edits["renames"][original_names.get(col_to_rename, col_to_rename)] = new_col_name
                                 st.success(f"Column '{col_to_rename}' renamed to '{new_col_name}'")
                             except Exception as e:
                                 st.error(f"Error renaming column: {e}")
@@ -395,6 +417,8 @@ def show(conn):
                 rename_map = {old: new for old, new in zip(old_names, new_names) if old != new}
                 if rename_map:
                     cleaned_df = cleaned_df.rename(columns=rename_map)
+                    for old, new in rename_map.items():
+                        column_edits["renames"][original_names.get(old, old)] = new
                     renamed_cols = list(rename_map.keys())
                     st.success(f"Renamed {len(renamed_cols)} columns")
                 else:
@@ -415,21 +439,104 @@ def show(conn):
             for i, col in enumerate(cleaned_df.columns):
                 st.markdown(f"<span style='color:black;'>{i+1}. {col}</span>", unsafe_allow_html=True)
         
-        st.dataframe(cleaned_df.head().applymap(lambda x: format_large_numbers(x) if isinstance(x, (int, float)) else x))
+        if cleaned_df is pipeline_df:
+            st.dataframe(run_step("format_head", pipeline_key, {}, _format_head, cleaned_df, format_large_numbers)[1])
+        else:
+            st.dataframe(_format_head(cleaned_df, format_large_numbers))
         st.download_button("📥 Export Cleaned CSV", cleaned_df.to_csv(index=False), f"{table}_cleaned.csv", "text/csv")
         
-        # Save cleaned CSV to my_projects/files
-        import os
-        from datetime import datetime
-        files_dir = os.path.join("my_projects", "files")
-        os.makedirs(files_dir, exist_ok=True)
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        cleaned_path = os.path.join(files_dir, f"{table}_cleaned_{timestamp}.csv")
-        cleaned_df.to_csv(cleaned_path, index=False)
-        st.success(f"Cleaned CSV saved to My Projects.")
-
-        # Store the cleaned DataFrame in session state to make it available to other modules
-        st.session_state.cleaned_df = cleaned_df.copy()
+        # Save cleaned CSV to my_projects/files; unchanged data is not written again
+        snapshot_keys = st.session_state.setdefault("cleaner_snapshot_keys", set())
+        if cleaned_df is not pipeline_df or pipeline_key not in snapshot_keys:
+            _, written = save_snapshot(conn, cleaned_df, table, "cleaned")
+            if written:
+                st.success(f"Cleaned CSV saved to My Projects.")
+            if cleaned_df is pipeline_df:
+                snapshot_keys.add(pipeline_key)
+        info = cache_info()
+        query_info = query_cache_info()
+        st.caption(f"Pipeline cache: {info['hits']} hits · {info['misses']} misses · {info['entries']} steps · {info['bytes'] / 1e6:.1f} MB"
+                   f" · Query cache: {query_info['hits']} hits · {query_info['misses']} misses")
+
+        # --- Full-table Cleaning ---
+        with st.expander("🏭 Clean Entire Table", expanded=False):
+            st.markdown("<span style='color:black'>Apply the selected cleaning steps and row filters to every row, streaming the table in chunks into a new table.</span>", unsafe_allow_html=True)
+            col1, col2 = st.columns([2, 1])
+            with col1:
+                cleaned_table_name = st.text_input("Output table", value=f"{table}_cleaned", key="cleaned_table_name")
+            with col2:
+                clean_chunk_rows = st.number_input("Rows per chunk", min_value=1000, max_value=1000000, value=50000, step=10000, key="clean_chunk_rows")
+            if st.button("Clean Entire Table", key="clean_entire_table"):
+                progress_bar = st.progress(0.0)
+                try:
+                    result = clean_table(conn, table, cleaning_steps, detected_types, target=cleaned_table_name,
+                                         filters=row_filters, casts=column_edits["casts"],
+                                         drop_columns=column_edits["drop_columns"], renames=column_edits["renames"],
+                                         datetime_formats=date_formats, chunk_rows=int(clean_chunk_rows),
+                                         progress=lambda done, total: progress_bar.progress(min(done / total, 1.0) if total else 1.0))
+                    progress_bar.progress(1.0)
+                    st.success(f"Wrote {result['rows_out']:,} of {result['rows_in']:,} rows to `{result['target']}` "
+                               f"in {result['seconds']:.1f}s ({result['duplicates']:,} duplicates removed)")
+                    if result["dropped_columns"]:
+                        st.markdown(f"<span style='color:black'>Dropped empty columns: {', '.join(result['dropped_columns'])}</span>", unsafe_allow_html=True)
+                except Exception as e:
+                    st.error(f"Full-table cleaning error: {e}")
+
+        # --- Recipes ---
+        with st.expander("📜 Cleaning Recipes", expanded=False):
+            st.markdown("<span style='color:black'>Save the current filters, datatype changes, cleaning steps and column edits as a recipe, then replay it on any table.</span>", unsafe_allow_html=True)
+            current_recipe = make_recipe(table, cleaning_steps, detected_types, filters=row_filters,
+                                         datetime_formats=date_formats, **column_edits)
+            col1, col2 = st.columns([3, 1])
+            with col1:
+                recipe_name = st.text_input("Recipe name", value=f"{table}_recipe", key="recipe_name")
+            with col2:
+                if st.button("Save Recipe", key="save_recipe"):
+                    version = save_recipe(conn, recipe_name, current_recipe)
+                    st.success(f"Saved `{recipe_name}` version {version}")
+
+            saved = list_recipes(conn)
+            if saved:
+                st.markdown("---")
+                names = [row[0] for row in saved]
+                col1, col2 = st.columns([2, 1])
+                with col1:
+                    replay_name = st.selectbox("Recipe", names, key="replay_recipe")
+                latest = dict((row[0], row[1]) for row in saved)[replay_name]
+                with col2:
+                    replay_version = st.number_input("Version", min_value=1, max_value=latest, value=latest, key=f"replay_version_{replay_name}")
+                recipe = load_recipe(conn, replay_name, replay_version)
+                col1, col2 = st.columns(2)
+                with col1:
+                    replay_source = st.selectbox("Apply to table", tables, index=tables.index(table) if table in tables else 0, key="replay_source")
+                with col2:
+                    replay_target = st.text_input("Output table", value=f"{replay_source}_cleaned", key="replay_target")
+                # Compiling may scan the table for empty columns, so only on request
+                if st.checkbox("Show compiled SQL", key="show_recipe_sql"):
+                    try:
+                        sql, _, reason = compile_recipe(conn, recipe, replay_target, replay_source)
+                    except Exception as e:
+                        sql, reason = None, str(e)
+                    if sql:
+                        st.code(sql, language="sql")
+                    else:
+                        st.markdown(f"<span style='color:black'>Runs as chunked pandas: {reason}</span>", unsafe_allow_html=True)
+                if st.button("Run Recipe", key="run_recipe"):
+                    try:
+                        result = run_recipe(conn, recipe, source_table=replay_source, target=replay_target)
+                        st.success(f"Wrote {result['rows_out']:,} rows to `{result['target']}` with {result['mode']} in {result['seconds']:.2f}s")
+                    except Exception as e:
+                        st.error(f"Recipe error: {e}")
+
+        # Make the cleaned DataFrame available to other modules through the session dataset store
+        try:
+            st.session_state.cleaned_handle = put_frame(cleaned_df, session_id(st.session_state), "cleaned",
+                                                        key=pipeline_key if cleaned_df is pipeline_df else None)
+            st.session_state.pop("cleaned_df", None)
+        except Exception:
+            # Store unavailable: keep the frame in session memory instead
+            st.session_state.pop("cleaned_handle", None)
+            st.session_state.cleaned_df = cleaned_df
         
         # --- Data Modification Section ---
         with st.expander("Update Values", expanded=False):
@@ -444,6 +551,7 @@ def show(conn):
                 try:
                     cursor.execute(f"UPDATE '{table}' SET \"{update_col}\"=? WHERE \"{update_col}\"=?", (update_new, update_old))
                     conn.commit()
+                    bump_version(conn, table)
                     st.success(f"Updated `{update_col}` from '{update_old}' to '{update_new}'")
                 except Exception as e:
                     st.error(f"Update error: {e}")
@@ -459,6 +567,7 @@ def show(conn):
                 try:
                     cursor.execute(f"DELETE FROM '{table}' WHERE \"{delete_col}\"=?", (delete_val,))
                     conn.commit()
+                    bump_version(conn, table)
                     st.success(f"Deleted rows where `{delete_col}` = '{delete_val}'")
                 except Exception as e:
                     st.error(f"Delete error: {e}")
@@ -470,8 +579,6 @@ def show(conn):
                 navigate_to("Preview & Audit")
         with col_next:
             if st.button("Next →"):
-                # Ensure the cleaned DataFrame is in session state before navigating
-                st.session_state.cleaned_df = cleaned_df.copy()
                 navigate_to("Analyst")
 
     except Exception as e:
@@ -0,0 +1,230 @@
+"""
+Cleaning Pipeline
+The Cleaner's steps as plain functions, shared by the on-screen preview and by the
+full-table mode, which streams the source table in chunks and bulk-writes the result
+into a new SQLite table. Duplicate rows are removed across chunks with a set of 128-bit
+BLAKE2b row digests.
+"""
+__all__ = ["CLEANING_STEPS", "DTYPE_MAP", "ROW_STEPS", "convert_values", "cast_column", "apply_step", "clean_frame",
+           "empty_columns", "empty_table_columns", "clean_table"]
+
+import hashlib
+import time
+
+import numpy as np
+import pandas as pd
+
+from modules.ingest import quote_ident, sql_type_for, insert_chunks
+from modules.filters import compile_filters
+from modules.versions import bump_version
+
+CLEANING_STEPS = ["drop_duplicates", "drop_blanks", "drop_nulls", "normalize_case",
+                  "auto_convert_types", "drop_empty_columns"]
+BOOL_MAP = {"true": True, "false": False, "yes": True, "no": False,
+            "y": True, "n": False, "1": True, "0": False}
+DTYPE_MAP = {
+    "String": "object",
+    "Numeric": "float",
+    "Integer": "int",
+    "Datetime": "datetime64[ns]",
+    "Boolean": "bool"
+}
+CHUNK_ROWS = 50000
+
+def convert_values(series, convert):
+    """
+    Apply `convert` to `series`. Categorical columns (as the typed loader builds them) convert
+    their categories once and map the codes back, so the result has the converted dtype
+    instead of staying `category`.
+    """
+    if not isinstance(series.dtype, pd.CategoricalDtype):
+        return convert(series)
+    if not len(series.cat.categories):
+        return convert(series.astype(object))
+    converted = convert(pd.Series(series.cat.categories)).to_numpy()
+    codes = series.cat.codes.to_numpy()
+    return pd.Series(converted[codes], index=series.index, name=series.name).where(codes >= 0)
+
+def cast_column(series, dtype_name):
+    """Convert `series` to one of the DTYPE_MAP types the way the Cleaner's datatype change does"""
+    if DTYPE_MAP[dtype_name] == "datetime64[ns]":
+        return convert_values(series, lambda s: pd.to_datetime(s, errors="coerce"))
+    if DTYPE_MAP[dtype_name] == "bool":
+        return convert_values(series, lambda s: s.astype(str).str.lower().map(BOOL_MAP))
+    try:
+        return convert_values(series, lambda s: s.astype(DTYPE_MAP[dtype_name]))
+    except (ValueError, TypeError):
+        return series
+
+def drop_duplicate_rows(df):
+    return df.drop_duplicates()
+
+def blanks_to_null(df):
+    return df.replace('', np.nan)
+
+def drop_null_rows(df):
+    return df.dropna()
+
+def title_case_text(df):
+    df = df.copy(deep=False)
+    for col in df.select_dtypes(include=['object', 'category']).columns:
+        df[col] = df[col].astype(str).str.title()
+    return df
+
+def convert_types(df, detected_types, datetime_formats=None):
+    """Convert columns to their detected types; datetimes parse with the column's inferred format when known"""
+    df = df.copy(deep=False)
+    for col, dtype in detected_types.items():
+        if col not in df.columns:
+            continue
+        try:
+            if dtype == "Numeric":
+                df[col] = convert_values(df[col], lambda s: pd.to_numeric(s, errors='coerce'))
+            elif dtype == "Datetime":
+                fmt = (datetime_formats or {}).get(col)
+                df[col] = convert_values(df[col], lambda s: pd.to_datetime(s, format=fmt, errors='coerce'))
+            elif dtype == "Boolean":
+                df[col] = convert_values(df[col], lambda s: s.astype(str).str.lower().map(BOOL_MAP))
+        except Exception:
+            # If conversion fails, keep as is
+            pass
+    return df
+
+# Row-level steps in pipeline order; each returns a new frame and leaves its input untouched
+ROW_STEPS = [
+    ("drop_duplicates", drop_duplicate_rows),
+    ("drop_blanks", blanks_to_null),
+    ("drop_nulls", drop_null_rows),
+    ("normalize_case", title_case_text),
+    ("auto_convert_types", convert_types),
+]
+
+def apply_step(name, df, detected_types, datetime_formats=None):
+    """Run one of ROW_STEPS on `df`"""
+    func = dict(ROW_STEPS)[name]
+    return func(df, detected_types, datetime_formats) if name == "auto_convert_types" else func(df)
+
+def clean_frame(df, steps, detected_types, datetime_formats=None):
+    """
+    Apply the row-level cleaning `steps` ({step: bool}) to `df` and return a new frame.
+    drop_empty_columns needs the whole dataset and is handled by the caller.
+    """
+    cleaned_df = df
+    for name, _ in ROW_STEPS:
+        if steps.get(name):
+            cleaned_df = apply_step(name, cleaned_df, detected_types, datetime_formats)
+    return cleaned_df if cleaned_df is not df else df.copy(deep=False)
+
+def empty_columns(df):
+    """Columns of `df` that are entirely NULL or blank/whitespace"""
+    tmp = df.copy(deep=False)
+    obj_cols = tmp.select_dtypes(include=['object', 'category']).columns
+    if len(obj_cols) > 0:
+        # Treat pure whitespace as empty
+        tmp[obj_cols] = tmp[obj_cols].replace(r'^\s*$', np.nan, regex=True)
+    return [c for c in tmp.columns if tmp[c].isna().all()]
+
+def empty_table_columns(conn, table, filters=()):
+    """Columns that are entirely NULL or blank/whitespace across the (filtered) table, in one scan"""
+    columns = [row[1] for row in conn.execute(f"PRAGMA table_info({quote_ident(table)})")]
+    if not columns:
+        return []
+    checks = ", ".join(f"MAX({quote_ident(c)} IS NOT NULL AND TRIM({quote_ident(c)}) <> '')" for c in columns)
+    where, params = compile_filters(list(filters))
+    sql = f"SELECT {checks} FROM {quote_ident(table)}" + (f" WHERE {where}" if where else "")
+    flags = conn.execute(sql, params).fetchone()
+    return [c for c, has_value in zip(columns, flags) if not has_value]
+
+def _column_types(chunk, detected_types, steps):
+    """SQLite types for the cleaned output"""
+    col_types = {}
+    for col in chunk.columns:
+        detected = detected_types.get(col) if steps.get("auto_convert_types") else None
+        if detected == "Numeric":
+            col_types[col] = "REAL"
+        elif detected == "Boolean":
+            col_types[col] = "INTEGER"
+        else:
+            col_types[col] = sql_type_for(chunk[col])
+    return col_types
+
+def _row_digest(row):
+    """128-bit BLAKE2b digest of a raw SQLite row; repr keeps values and their types distinct"""
+    return hashlib.blake2b(repr(row).encode("utf-8"), digest_size=16).digest()
+
+def clean_table(conn, table, steps, detected_types, target=None, filters=(), casts=None,
+                drop_columns=(), renames=None, datetime_formats=None, chunk_rows=CHUNK_ROWS, progress=None):
+    """
+    Clean every row of `table` (matching `filters`) chunk by chunk into `target`
+    (default `<table>_cleaned`), replacing any existing table of that name.
+    Per chunk: `casts` ({column: DTYPE_MAP name}), the row steps, then `drop_columns` and `renames`.
+    `progress(rows_read, total_rows)` is called after each chunk.
+    Returns a dict with target, rows_in, rows_out, duplicates, dropped_columns and seconds.
+    """
+    target = target or f"{table}_cleaned"
+    if target == table:
+        raise ValueError("The cleaned table must have a different name than the source table")
+    start = time.perf_counter()
+    where, params = compile_filters(list(filters))
+    where_sql = f" WHERE {where}" if where else ""
+    total = conn.execute(f"SELECT COUNT(*) FROM {quote_ident(table)}{where_sql}", params).fetchone()[0]
+    dropped = empty_table_columns(conn, table, filters) if steps.get("drop_empty_columns") else []
+    row_steps = dict(steps, drop_duplicates=False)
+    # Before any read is open: DROP TABLE fails while statements are pending
+    conn.execute(f"DROP TABLE IF EXISTS {quote_ident(target)}")
+    conn.commit()
+
+    # A second cursor so the reads are not disturbed by the inserts on `conn`
+    cursor = conn.cursor()
+    cursor.execute(f"SELECT * FROM {quote_ident(table)}{where_sql}", params)
+    columns = [desc[0] for desc in cursor.description]
+    counts = {"rows_in": 0, "duplicates": 0}
+    seen = set()
+
+    def cleaned_chunks():
+        while True:
+            rows = cursor.fetchmany(chunk_rows)
+            if not rows:
+                break
+            counts["rows_in"] += len(rows)
+            if steps.get("drop_duplicates"):
+                # Digest the raw tuples: independent of per-chunk dtype inference
+                unique_rows = []
+                for row in rows:
+                    digest = _row_digest(row)
+                    if digest not in seen:
+                        seen.add(digest)
+                        unique_rows.append(row)
+                counts["duplicates"] += len(rows) - len(unique_rows)
+                rows = unique_rows
+            chunk = pd.DataFrame(rows, columns=columns)
+            for col, dtype_name in (casts or {}).items():
+                chunk[col] = cast_column(chunk[col], dtype_name)
+            chunk = clean_frame(chunk.drop(columns=dropped), row_steps, detected_types, datetime_formats)
+            chunk = chunk.drop(columns=[c for c in drop_columns if c in chunk.columns]).rename(columns=renames or {})
+            if progress:
+                progress(counts["rows_in"], total)
+            yield chunk
+
+    chunks = cleaned_chunks()
+    first = next(chunks, None)
+    if first is None:
+        kept = [c for c in columns if c not in dropped and c not in drop_columns]
+        first = pd.DataFrame(columns=[(renames or {}).get(c, c) for c in kept])
+    col_types = _column_types(first, {(renames or {}).get(c, c): t for c, t in detected_types.items()}, steps)
+
+    def all_chunks():
+        yield first
+        yield from chunks
+
+    result = insert_chunks(conn, target, all_chunks(), col_types)
+    cursor.close()
+    bump_version(conn, target)
+    return {
+        "target": target,
+        "rows_in": counts["rows_in"],
+        "rows_out": result["rows"],
+        "duplicates": counts["duplicates"],
+        "dropped_columns": dropped,
+        "seconds": time.perf_counter() - start,
+    }
@@ -0,0 +1,140 @@
+"""
+Session Dataset Store
+Keeps each browser session's working datasets (such as the Cleaner's output) on disk as
+uncompressed Arrow IPC files instead of in server RAM. Session state only holds a handle;
+readers memory-map the file, so numeric columns are not copied into the process.
+Files are grouped per session, evicted least-recently-used beyond a disk budget, and
+removed once their session has been idle longer than SESSION_TTL_SECONDS.
+"""
+__all__ = ["session_id", "put_frame", "get_frame", "drop_session", "collect_garbage", "store_info"]
+
+import os
+import shutil
+import tempfile
+import time
+import uuid
+
+import pandas as pd
+
+from modules.snapshots import frame_digest
+
+STORE_DIR = os.path.join(tempfile.gettempdir(), "ebi_datasets")
+DISK_BUDGET_BYTES = 2 * 1024 * 1024 * 1024
+SESSION_TTL_SECONDS = 6 * 60 * 60
+
+def session_id(state):
+    """Stable id for the session owning `state` (st.session_state)"""
+    if "dataset_session_id" not in state:
+        state["dataset_session_id"] = uuid.uuid4().hex
+    return state["dataset_session_id"]
+
+def _arrow_ready(df):
+    """`df` with mixed-type object columns stored as text (NULLs kept), which Arrow cannot hold otherwise"""
+    mixed = [col for col in df.columns
+             if df[col].dtype == object and pd.api.types.infer_dtype(df[col], skipna=True).startswith("mixed")]
+    if not mixed:
+        return df
+    df = df.copy(deep=False)
+    for col in mixed:
+        df[col] = df[col].where(df[col].isna(), df[col].astype(str))
+    return df
+
+def _write(df, path):
+    import pyarrow as pa
+
+    table = pa.Table.from_pandas(_arrow_ready(df), preserve_index=False)
+    tmp_path = path + ".tmp"
+    with pa.OSFile(tmp_path, "wb") as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    os.replace(tmp_path, path)
+
+def put_frame(df, session, name, key=None):
+    """
+    Store `df` as the session's dataset `name` and return its handle.
+    `key` identifies the content (a frame digest is computed when omitted); an unchanged
+    dataset is not written again.
+    """
+    key = key or frame_digest(df)
+    session_dir = os.path.join(STORE_DIR, session)
+    os.makedirs(session_dir, exist_ok=True)
+    file_name = f"{name}_{key[:16]}.arrow"
+    path = os.path.join(session_dir, file_name)
+    if os.path.exists(path):
+        os.utime(path)
+    else:
+        _write(df, path)
+        for other in os.listdir(session_dir):
+            if other.startswith(f"{name}_") and other != file_name:
+                os.remove(os.path.join(session_dir, other))
+        collect_garbage(keep=path)
+    return f"{session}/{file_name}"
+
+def get_frame(handle):
+    """The DataFrame behind `handle`, read through a memory map; None if it has been evicted"""
+    import pyarrow as pa
+
+    path = os.path.join(STORE_DIR, handle)
+    try:
+        source = pa.memory_map(path)
+    except FileNotFoundError:
+        return None
+    os.utime(path)
+    # Without an explicit close the map lives as long as the frame's buffers reference it
+    return pa.ipc.open_file(source).read_all().to_pandas(split_blocks=True)
+
+def drop_session(session):
+    """Remove every dataset of `session`"""
+    shutil.rmtree(os.path.join(STORE_DIR, session), ignore_errors=True)
+
+def _files():
+    """[(last access, bytes, path)] for every stored dataset"""
+    files = []
+    if not os.path.isdir(STORE_DIR):
+        return files
+    for session in os.listdir(STORE_DIR):
+        session_dir = os.path.join(STORE_DIR, session)
+        for name in os.listdir(session_dir) if os.path.isdir(session_dir) else []:
+            path = os.path.join(session_dir, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+    return files
+
+def collect_garbage(keep=None, now=None):
+    """
+    Delete sessions idle longer than SESSION_TTL_SECONDS, then the least recently used
+    datasets until the store fits DISK_BUDGET_BYTES. Returns the number of files removed.
+    """
+    now = now or time.time()
+    removed = 0
+    files = sorted(_files())
+    last_seen = {}
+    for mtime, _, path in files:
+        last_seen[os.path.dirname(path)] = mtime
+    for session_dir, mtime in last_seen.items():
+        if now - mtime > SESSION_TTL_SECONDS and (keep is None or not keep.startswith(session_dir + os.sep)):
+            removed += len(os.listdir(session_dir))
+            shutil.rmtree(session_dir, ignore_errors=True)
+    files = [f for f in files if os.path.exists(f[2])]
+    total = sum(size for _, size, _ in files)
+    for _, size, path in files:
+        if total <= DISK_BUDGET_BYTES:
+            break
+        if path == keep:
+            continue
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass  # already removed by another session
+        total -= size
+        removed += 1
+    return removed
+
+def store_info():
+    """Number of sessions and datasets and the bytes they hold"""
+    files = _files()
+    return {"sessions": len({os.path.dirname(path) for _, _, path in files}), "datasets": len(files),
+            "bytes": sum(size for _, size, _ in files), "budget": DISK_BUDGET_BYTES}
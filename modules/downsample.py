@@ -0,0 +1,75 @@
+"""
+Chart Downsampling
+Caps the points a chart draws at about its width in pixels, since more only overdraw.
+Lines keep their shape with largest-triangle-three-buckets (LTTB); scatter plots keep
+their density with a sample spread over a grid, in which every occupied cell keeps at
+least one point and crowded cells shrink in proportion.
+"""
+__all__ = ["POINTS_PER_INCH", "target_points", "lttb", "density_sample"]
+
+import numpy as np
+
+# Matplotlib's figure dpi: one point per on-screen pixel of the figure's width
+POINTS_PER_INCH = 100
+# Share of a scatter's budget that may go to keeping one point in every occupied cell
+CELL_SHARE = 0.25
+
+def target_points(fig_size):
+    """Point budget for a figure of `fig_size` (width, height) inches"""
+    return int(fig_size[0] * POINTS_PER_INCH)
+
+def lttb(x, y, threshold):
+    """
+    Sorted indices of `threshold` points of the line (x, y) chosen by LTTB; every index when
+    there are no more points than that. `x` must be increasing.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    # First and last points are always kept; the rest are split into threshold - 2 buckets
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.intp)
+    keep = np.empty(threshold, dtype=np.intp)
+    keep[0], keep[-1] = 0, n - 1
+    previous = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        # The next bucket's average stands in for the point not chosen yet
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        next_x, next_y = x[end:next_end].mean(), y[end:next_end].mean()
+        areas = np.abs((x[previous] - next_x) * (y[start:end] - y[previous])
+                       - (x[previous] - x[start:end]) * (next_y - y[previous]))
+        previous = start + int(np.argmax(areas))
+        keep[i + 1] = previous
+    return keep
+
+def density_sample(x, y, target, seed=0):
+    """
+    Sorted indices of at most `target` points of (x, y) spread like the full cloud.
+    Sampling is seeded, so the same data always gives the same picture.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(x)
+    if target >= n:
+        return np.arange(n)
+
+    # A grid of at most CELL_SHARE * target cells, so most of the budget follows density
+    grid = max(1, int(np.sqrt(target * CELL_SHARE)))
+
+    def cells(values):
+        low, high = values.min(), values.max()
+        scaled = (values - low) / (high - low) if high > low else np.zeros(n)
+        return np.minimum((scaled * grid).astype(np.intp), grid - 1)
+
+    cell = cells(x) * grid + cells(y)
+    # Random order within each cell; a point's priority is its rank over the cell's size
+    order = np.lexsort((np.random.default_rng(seed).random(n), cell))
+    sizes = np.bincount(cell, minlength=grid * grid)
+    starts = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+    ranks = np.empty(n, dtype=np.intp)
+    ranks[order] = np.arange(n) - starts[cell[order]]
+    priority = ranks / sizes[cell]
+    priority[ranks == 0] = -1.0
+    return np.sort(np.argpartition(priority, target - 1)[:target])
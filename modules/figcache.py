@@ -0,0 +1,115 @@
+"""
+Render Cache
+Rendered charts as PNG bytes, keyed by a hash of everything that shapes the picture (the
+plotted data's digest, chart type, columns, aggregation, binning, labels and size).
+A process-wide LRU serves reruns of the same chart without any matplotlib work; a disk
+tier under the temp directory shares renders across sessions and server restarts.
+"""
+__all__ = ["render_key", "figure_png", "get_png", "put_png", "cache_info", "clear_cache"]
+
+import hashlib
+import io
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+MAX_ENTRIES = 128
+MAX_BYTES = 64 * 1024 * 1024
+DISK_DIR = os.path.join(tempfile.gettempdir(), "ebi_figures")
+DISK_BUDGET_BYTES = 256 * 1024 * 1024
+# Same output as st.pyplot, so a cached image looks exactly like a fresh render
+RENDER_DPI = 200
+
+_cache = OrderedDict()
+_stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "bytes": 0}
+_lock = threading.Lock()
+
+def render_key(*parts):
+    """Stable key for a render from JSON-able parts"""
+    payload = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode()).hexdigest()
+
+def figure_png(fig):
+    """PNG bytes of a matplotlib figure, rendered the way st.pyplot renders it"""
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format="png", bbox_inches="tight", dpi=RENDER_DPI)
+    return buffer.getvalue()
+
+def _remember(key, png):
+    # Caller holds _lock
+    old = _cache.pop(key, None)
+    if old is not None:
+        _stats["bytes"] -= len(old)
+    _cache[key] = png
+    _stats["bytes"] += len(png)
+    while len(_cache) > MAX_ENTRIES or _stats["bytes"] > MAX_BYTES:
+        _, evicted = _cache.popitem(last=False)
+        _stats["bytes"] -= len(evicted)
+
+def get_png(key):
+    """Cached PNG bytes for `key`, from memory or disk; None on a miss"""
+    with _lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            _stats["memory_hits"] += 1
+            return _cache[key]
+    path = os.path.join(DISK_DIR, f"{key}.png")
+    try:
+        with open(path, "rb") as f:
+            png = f.read()
+        os.utime(path)
+    except FileNotFoundError:
+        with _lock:
+            _stats["misses"] += 1
+        return None
+    with _lock:
+        _stats["disk_hits"] += 1
+        _remember(key, png)
+    return png
+
+def _trim_disk():
+    """Delete the least recently used renders until the disk tier fits DISK_BUDGET_BYTES"""
+    files = []
+    for name in os.listdir(DISK_DIR):
+        path = os.path.join(DISK_DIR, name)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            continue
+        files.append((stat.st_mtime, stat.st_size, path))
+    total = sum(size for _, size, _ in files)
+    for _, size, path in sorted(files):
+        if total <= DISK_BUDGET_BYTES:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass  # already removed by another session
+        total -= size
+
+def put_png(key, png):
+    """Store a render in memory and on disk"""
+    with _lock:
+        _remember(key, png)
+    os.makedirs(DISK_DIR, exist_ok=True)
+    path = os.path.join(DISK_DIR, f"{key}.png")
+    tmp_path = f"{path}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(png)
+    os.replace(tmp_path, path)
+    _trim_disk()
+
+def cache_info():
+    """Hit/miss counters, hit rate, entries and bytes held in memory"""
+    with _lock:
+        lookups = _stats["memory_hits"] + _stats["disk_hits"] + _stats["misses"]
+        hits = _stats["memory_hits"] + _stats["disk_hits"]
+        return dict(_stats, hits=hits, hit_rate=hits / lookups if lookups else 0.0,
+                    entries=len(_cache), max_entries=MAX_ENTRIES, max_bytes=MAX_BYTES)
+
+def clear_cache():
+    with _lock:
+        _cache.clear()
+        _stats["bytes"] = 0
@@ -0,0 +1,88 @@
+"""
+Row Filters
+Compiles the Cleaner's row conditions into a parameterized SQL WHERE clause so they run
+against the whole table inside SQLite (and can use its indexes).
+Text matches use GLOB, which is case-sensitive like the pandas string methods they replace.
+"""
+__all__ = ["OPERATORS", "compile_filters", "filtered_query", "explain_plan"]
+
+from datetime import date, datetime
+
+import pandas as pd
+
+from modules.ingest import quote_ident
+
+OPERATORS = ["equals", "not equals", "greater than", "less than", "contains",
+             "starts with", "ends with", "is null", "is not null"]
+NO_VALUE_OPERATORS = ("is null", "is not null")
+
+def _glob_escape(text):
+    """Make GLOB wildcards in `text` match literally"""
+    return "".join(f"[{ch}]" if ch in "*?[" else ch for ch in str(text))
+
+def _sql_value(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if hasattr(value, "item"):
+        return value.item()
+    return value
+
+def _condition(column, operator, value):
+    """(sql, params) for one condition"""
+    col = quote_ident(column)
+    value = _sql_value(value)
+    if operator == "equals":
+        return f"{col} = ?", [value]
+    if operator == "not equals":
+        # pandas keeps NULL rows for !=, so IS NOT rather than <>
+        return f"{col} IS NOT ?", [value]
+    if operator == "greater than":
+        return f"{col} > ?", [value]
+    if operator == "less than":
+        return f"{col} < ?", [value]
+    if operator == "contains":
+        return f"{col} GLOB ?", [f"*{_glob_escape(value)}*"]
+    if operator == "starts with":
+        return f"{col} GLOB ?", [f"{_glob_escape(value)}*"]
+    if operator == "ends with":
+        return f"{col} GLOB ?", [f"*{_glob_escape(value)}"]
+    if operator == "is null":
+        return f"{col} IS NULL", []
+    if operator == "is not null":
+        return f"{col} IS NOT NULL", []
+    raise ValueError(f"Unknown filter operator: {operator}")
+
+def compile_filters(filters):
+    """
+    Compile a list of {"column", "operator", "value", "join"} dicts into (where_sql, params).
+    `join` ("AND"/"OR") links a filter to the one before it; AND binds tighter than OR, as in SQL.
+    Returns ("", []) for no filters.
+    """
+    parts = []
+    params = []
+    for i, flt in enumerate(filters):
+        sql, args = _condition(flt["column"], flt["operator"], flt.get("value"))
+        if i:
+            join = flt.get("join", "AND").upper()
+            if join not in ("AND", "OR"):
+                raise ValueError(f"Filters can only be joined with AND or OR, not {join}")
+            parts.append(join)
+        parts.append(sql)
+        params.extend(args)
+    return " ".join(parts), params
+
+def filtered_query(table, filters, limit=None):
+    """(sql, params) selecting the rows of `table` that match `filters`"""
+    sql = f"SELECT * FROM {quote_ident(table)}"
+    where, params = compile_filters(filters)
+    if where:
+        sql += f" WHERE {where}"
+    if limit is not None:
+        sql += " LIMIT ?"
+        params = params + [int(limit)]
+    return sql, params
+
+def explain_plan(conn, sql, params=()):
+    """EXPLAIN QUERY PLAN of `sql` as a DataFrame"""
+    rows = conn.execute(f"EXPLAIN QUERY PLAN {sql}", list(params)).fetchall()
+    return pd.DataFrame(rows, columns=["id", "parent", "notused", "detail"])[["id", "parent", "detail"]]
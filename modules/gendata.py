@@ -1,37 +1,36 @@
 import streamlit as st
 import pandas as pd
-import numpy as np
-from faker import Faker
-from utils import navigate_to
+import os
+from datetime import datetime
+from utils import navigate_to, list_tables
+from modules.ingest import bulk_insert
+from modules.typeinfer import infer_frame
+from modules.synth import SQL_TYPES, infer_type_from_name, generate_data, generate_sharded, clone_table
+from modules.sandbox import DEFAULT_MEMORY_MB, DEFAULT_TIMEOUT_SECONDS, run_user_code, read_result, discard_result
+from modules import jobs
 
-fake = Faker()
+# Larger foreground generations skip the CSV copy in My Projects
+CSV_COPY_MAX_ROWS = 100000
 
-def infer_type_from_name(col_name):
-    name = col_name.lower()
-    if "name" in name:
-        return "Name"
-    elif "email" in name:
-        return "Email"
-    elif "phone" in name or "mobile" in name or "contact" in name:
-        return "Phone"
-    elif "address" in name or "location" in name:
-        return "Address"
-    elif "date" in name or "dob" in name or "birth" in name:
-        return "Date"
-    elif "id" in name:
-        return "ID"
-    elif "subject" in name:
-        return "Subject"
-    elif "price" in name or "amount" in name or "score" in name or "value" in name:
-        return "Float"
-    elif "category" in name or "type" in name or "group" in name:
-        return "Category"
-    elif "flag" in name or "is_" in name or "active" in name or "status" in name:
-        return "Boolean"
-    elif "desc" in name or "note" in name or "comment" in name or "text" in name:
-        return "Text"
-    else:
-        return None
+def generate_and_insert(conn, table_name, col_defs, sql_col_types, num_rows):
+    """Generate rows in the foreground, save a CSV copy and insert them"""
+    df = generate_data(col_defs, num_rows)
+    st.write("Preview of generated data:", df.head())
+    # Save generated data to my_projects/files; load-test sized tables only go to the database
+    if num_rows <= CSV_COPY_MAX_ROWS:
+        files_dir = os.path.join("my_projects", "files")
+        os.makedirs(files_dir, exist_ok=True)
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        gen_path = os.path.join(files_dir, f"{table_name}_generated_{timestamp}.csv")
+        df.to_csv(gen_path, index=False)
+        st.success(f"Generated data saved to My Projects.")
+
+    try:
+        result = bulk_insert(conn, table_name, df, sql_col_types)
+        st.success(f"Generated and inserted `{num_rows}` rows into `{table_name}`! "
+                   f"({result['rows_per_sec']:,.0f} rows/sec)")
+    except Exception as e:
+        st.error(f"Error creating/inserting: {e}")
 
 def show(conn):
     st.subheader("🧬 Generate & Insert Synthetic Dataset")
@@ -50,12 +49,11 @@ def show(conn):
 
     st.markdown("#### 1. Table & Columns")
     table_name = st.text_input("Table name", value="synthetic_data", placeholder="Enter table name")
-    num_rows = st.number_input("Number of rows", min_value=10, max_value=100000, value=100)
+    num_rows = st.number_input("Number of rows", min_value=10, value=100, step=1000)
 
     st.markdown("Define columns and patterns:")
     col_defs = []
-    col_types = ["ID", "Name", "Email", "Phone", "Address", "Date", "Subject", "Integer", "Float", "Category", "Boolean", "Text"]
-    subjects_list = ["Math", "English", "Science", "History", "Art", "Music", "Geography", "Physics", "Chemistry", "Biology"]
+    col_types = list(SQL_TYPES)
     n_cols = st.number_input("Number of columns", min_value=1, max_value=20, value=5)
     for i in range(n_cols):
         col1, col2 = st.columns([2,2])
@@ -67,151 +65,118 @@ def show(conn):
             col_type = st.selectbox(f"Type for {col_name}", col_types, index=default_index, key=f"coltype_{i}")
         col_defs.append((col_name, col_type))
 
+    run_in_background = st.checkbox("Run in background", value=False, key="gen_background",
+                                    help="Generate and insert in a background job so the page stays responsive")
+
+    with st.expander("⚙️ Multi-core Sharded Generation", expanded=False):
+        st.markdown("<span style='color:black'>Split generation into shards that run in parallel processes. "
+                    "The same seed always produces the same data.</span>", unsafe_allow_html=True)
+        sharded = st.checkbox("Generate in parallel shards", value=False, key="gen_sharded")
+        col1, col2 = st.columns(2)
+        with col1:
+            seed = st.number_input("Seed", min_value=0, value=42, step=1, key="gen_seed")
+        with col2:
+            cpu_count = os.cpu_count() or 1
+            workers = st.number_input("Worker processes", min_value=1, max_value=cpu_count, value=cpu_count, key="gen_workers")
+
     if st.button("Generate & Insert"):
-        # Generate data
-        data = {}
-        for col_name, col_type in col_defs:
-            inferred_type = infer_type_from_name(col_name)
-            use_type = inferred_type if inferred_type else col_type
-            if use_type == "ID":
-                data[col_name] = list(range(1, num_rows+1))
-            elif use_type == "Name":
-                data[col_name] = [fake.name() for _ in range(num_rows)]
-            elif use_type == "Email":
-                data[col_name] = [fake.email() for _ in range(num_rows)]
-            elif use_type == "Phone":
-                data[col_name] = [fake.phone_number() for _ in range(num_rows)]
-            elif use_type == "Address":
-                data[col_name] = [fake.address().replace('\n', ', ') for _ in range(num_rows)]
-            elif use_type == "Date":
-                data[col_name] = [fake.date_between('-5y', 'today').strftime("%Y-%m-%d") for _ in range(num_rows)]
-            elif use_type == "Subject":
-                data[col_name] = np.random.choice(subjects_list, num_rows)
-            elif use_type == "Integer":
-                data[col_name] = np.random.randint(0, 100, num_rows)
-            elif use_type == "Float":
-                data[col_name] = np.round(np.random.uniform(0, 100, num_rows), 2)
-            elif use_type == "Category":
-                cats = ["A", "B", "C", "D"]
-                data[col_name] = np.random.choice(cats, num_rows)
-            elif use_type == "Boolean":
-                data[col_name] = np.random.choice([0, 1], num_rows)
-            elif use_type == "Text":
-                data[col_name] = [fake.sentence(nb_words=8) for _ in range(num_rows)]
-            else:
-                data[col_name] = [None]*num_rows
+        sql_col_types = {col: SQL_TYPES[typ] for col, typ in col_defs}
+        if sharded:
+            try:
+                progress_bar = st.progress(0.0)
+                result = generate_sharded(conn, table_name, col_defs, sql_col_types, num_rows, seed, workers=workers,
+                                          progress=lambda done, total: progress_bar.progress(done / total))
+                st.success(f"Generated and inserted `{num_rows}` rows into `{table_name}` with seed {seed}! "
+                           f"({result['rows_per_sec']:,.0f} rows/sec on {workers} processes)")
+            except Exception as e:
+                st.error(f"Error creating/inserting: {e}")
+        elif run_in_background:
+            job_id = jobs.submit_generate(table_name, col_defs, sql_col_types, num_rows, seed=seed)
+            st.success(f"Started background job #{job_id} for `{num_rows}` rows into `{table_name}`.")
+        else:
+            generate_and_insert(conn, table_name, col_defs, sql_col_types, num_rows)
 
-        df = pd.DataFrame(data)
-        st.write("Preview of generated data:", df.head())
-        # Save generated data to my_projects/files
-        import os
-        from datetime import datetime
-        files_dir = os.path.join("my_projects", "files")
-        os.makedirs(files_dir, exist_ok=True)
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        gen_path = os.path.join(files_dir, f"{table_name}_generated_{timestamp}.csv")
-        df.to_csv(gen_path, index=False)
-        st.success(f"Generated data saved to My Projects.")
+    jobs.show_panel(conn, kinds=["generate"], key="gendata")
 
-        # Create table SQL
-        sql_types = {
-            "ID": "INTEGER",
-            "Name": "TEXT",
-            "Email": "TEXT",
-            "Phone": "TEXT",
-            "Address": "TEXT",
-            "Date": "TEXT",
-            "Subject": "TEXT",
-            "Integer": "INTEGER",
-            "Float": "REAL",
-            "Category": "TEXT",
-            "Boolean": "INTEGER",
-            "Text": "TEXT"
-        }
-        cols_sql = ", ".join([f"'{col}' {sql_types[typ]}" for col, typ in col_defs])
-        try:
-            cursor.execute(f"CREATE TABLE IF NOT EXISTS '{table_name}' ({cols_sql})")
-            conn.commit()
-            # Insert data
-            for _, row in df.iterrows():
-                values = []
-                for col, typ in col_defs:
-                    val = row[col]
-                    if pd.isnull(val):
-                        values.append("NULL")
-                    elif typ in ["ID", "Integer", "Boolean"]:
-                        values.append(str(val))
-                    else:
-                        values.append(f"'{str(val).replace('\'','\\\'')}'")
-                values_sql = ", ".join(values)
-                cursor.execute(f"INSERT INTO '{table_name}' VALUES ({values_sql})")
-            conn.commit()
-            st.success(f"Generated and inserted `{num_rows}` rows into `{table_name}`!")
-        except Exception as e:
-            st.error(f"Error creating/inserting: {e}")
+    # --- Synthetic clone of an existing table ---
+    with st.expander("🪞 Clone an Existing Table"):
+        st.markdown("<span style='color:black'>Profile a table (null rates, cardinalities, top values, distributions) "
+                    "and generate a larger synthetic copy that follows the same profile.</span>", unsafe_allow_html=True)
+        tables = list_tables(conn)
+        if not tables:
+            st.info("No tables to clone yet.")
+        else:
+            source_table = st.selectbox("Source table", tables, key="clone_source")
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                factor = st.number_input("Scale factor", min_value=0.1, value=10.0, step=1.0, key="clone_factor")
+            with col2:
+                clone_seed = st.number_input("Seed", min_value=0, value=42, step=1, key="clone_seed")
+            with col3:
+                clone_name = st.text_input("New table name", value=f"{source_table}_synthetic", key="clone_name")
+            if st.button("Profile & Clone", key="clone_btn"):
+                try:
+                    progress_bar = st.progress(0.0)
+                    profile, result = clone_table(conn, source_table, clone_name, factor, seed=clone_seed,
+                                                  progress=lambda done, total: progress_bar.progress(done / max(total, 1)))
+                    st.success(f"Cloned `{source_table}` ({profile['rows']:,} rows) into `{clone_name}` "
+                               f"with {result['rows']:,} synthetic rows ({result['rows_per_sec']:,.0f} rows/sec)")
+                    st.write(pd.DataFrame([{
+                        "column": col["name"], "kind": col["kind"], "null rate": round(col["null_rate"], 4),
+                        "distinct": col["distinct"], "min": col["min"], "max": col["max"],
+                        "top values": ", ".join(str(v) for v in col["top_values"][:5]),
+                    } for col in profile["columns"]]))
+                except Exception as e:
+                    st.error(f"Error cloning table: {e}")
 
     # --- Collapsible Python code runner for CSV generation ---
     with st.expander("🧮 Run Python to Generate CSV"):
-        st.markdown("Write Python code that creates a pandas DataFrame named `df`. The DataFrame will be saved as a CSV and you can insert it below.")
+        st.markdown("Write Python code that creates a pandas DataFrame named `df`. The code runs in a separate, resource-limited process; the DataFrame will be saved as a CSV and you can insert it below.")
         user_code = st.text_area("Python code (must define a DataFrame called `df`)", height=180, value="import pandas as pd\n# Example:\ndf = pd.DataFrame({'A': [1,2,3], 'B': ['x','y','z']})")
+        col1, col2 = st.columns(2)
+        with col1:
+            time_limit = st.number_input("Time limit (seconds)", min_value=1, max_value=3600, value=DEFAULT_TIMEOUT_SECONDS, key="sandbox_timeout")
+        with col2:
+            memory_limit = st.number_input("Memory limit (MB)", min_value=256, max_value=65536, value=DEFAULT_MEMORY_MB, step=256, key="sandbox_memory")
         run_btn, insert_btn = st.columns(2)
-        generated_csv_path = st.session_state.get("generated_csv_path", "")
+        generated_arrow_path = st.session_state.get("generated_arrow_path", "")
         with run_btn:
             if st.button("Run & Save CSV"):
+                run = None
                 try:
-                    local_vars = {}
-                    exec(user_code, {"pd": pd, "np": np}, local_vars)
-                    if "df" in local_vars and isinstance(local_vars["df"], pd.DataFrame):
-                        df_gen = local_vars["df"]
-                        files_dir = os.path.join("my_projects", "files")
-                        os.makedirs(files_dir, exist_ok=True)
-                        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                        gen_path = os.path.join(files_dir, f"custom_generated_{timestamp}.csv")
-                        df_gen.to_csv(gen_path, index=False)
-                        st.session_state["generated_csv_path"] = gen_path
-                        st.success(f"CSV generated and saved to {gen_path}")
-                        st.write(df_gen.head())
-                    else:
-                        st.error("Your code must define a pandas DataFrame named `df`.")
+                    run = run_user_code(user_code, timeout=time_limit, cpu_seconds=time_limit, memory_mb=memory_limit)
+                    df_gen = read_result(run["arrow_path"])
+                    files_dir = os.path.join("my_projects", "files")
+                    os.makedirs(files_dir, exist_ok=True)
+                    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+                    gen_path = os.path.join(files_dir, f"custom_generated_{timestamp}.csv")
+                    df_gen.to_csv(gen_path, index=False)
+                    discard_result(st.session_state.get("generated_arrow_path"))
+                    st.session_state["generated_arrow_path"] = run["arrow_path"]
+                    st.success(f"CSV generated and saved to {gen_path}")
+                    st.caption(f"Ran in {run['seconds']:.2f}s ({run['wall_seconds']:.2f}s wall), peak memory {run['peak_rss_mb']:,.0f} MB")
+                    st.write(df_gen.head())
                 except Exception as e:
+                    if run and run["arrow_path"] != st.session_state.get("generated_arrow_path"):
+                        discard_result(run["arrow_path"])
                     st.error(f"Error running code: {e}")
         with insert_btn:
-            if st.button("Insert Generated CSV to Database") and generated_csv_path and os.path.exists(generated_csv_path):
+            if st.button("Insert Generated CSV to Database") and generated_arrow_path and os.path.exists(generated_arrow_path):
                 try:
-                    df_insert = pd.read_csv(generated_csv_path)
+                    df_insert = read_result(generated_arrow_path)
                     st.write("Preview of generated CSV:", df_insert.head())
                     # Use the same logic as Insert CSV
                     table_name = st.text_input("Table name for generated CSV", value=f"custom_generated_{datetime.now().strftime('%Y%m%d_%H%M%S')}", key="gen_csv_table_name")
-                    dtype_map = {
-                        "int64": "INTEGER",
-                        "float64": "REAL",
-                        "object": "TEXT",
-                        "bool": "INTEGER",
-                        "datetime64[ns]": "TEXT"
-                    }
+                    inferred_types = infer_frame(df_insert)
                     col_types = {}
                     for col in df_insert.columns:
-                        inferred = dtype_map.get(str(df_insert[col].dtype), "TEXT")
-                        col_types[col] = st.selectbox(f"{col}", [inferred, "INTEGER", "REAL", "TEXT"], index=0, key=f"gen_csv_dtype_{col}")
+                        info = inferred_types[col]
+                        label = f"{col} ({info['kind']}, {info['datetime_format']})" if info["datetime_format"] else f"{col} ({info['kind']})"
+                        col_types[col] = st.selectbox(label, [info["sql_type"], "INTEGER", "REAL", "TEXT"], index=0, key=f"gen_csv_dtype_{col}")
                     if st.button("Confirm Insert", key="confirm_insert_gen_csv"):
-                        cursor = conn.cursor()
-                        cols_sql = ", ".join([f"'{col}' {col_types[col]}" for col in df_insert.columns])
-                        cursor.execute(f"CREATE TABLE IF NOT EXISTS '{table_name}' ({cols_sql})")
-                        conn.commit()
-                        for _, row in df_insert.iterrows():
-                            values = []
-                            for col in df_insert.columns:
-                                val = row[col]
-                                if pd.isnull(val):
-                                    values.append("NULL")
-                                elif col_types[col] == "TEXT":
-                                    values.append(f"'{str(val).replace('\'','\\\'')}'")
-                                else:
-                                    values.append(str(val))
-                            values_sql = ", ".join(values)
-                            cursor.execute(f"INSERT INTO '{table_name}' VALUES ({values_sql})")
-                        conn.commit()
-                        st.success(f"Generated CSV inserted into `{table_name}` successfully!")
+                        result = bulk_insert(conn, table_name, df_insert, col_types)
+                        st.success(f"Generated CSV inserted into `{table_name}` successfully! "
+                                   f"{result['rows']:,} rows in {result['seconds']:.2f}s ({result['rows_per_sec']:,.0f} rows/sec)")
                 except Exception as e:
                     st.error(f"Error inserting generated CSV: {e}")
 
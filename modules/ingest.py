@@ -0,0 +1,130 @@
+"""
+Ingestion Engine
+Bulk-loads DataFrames into SQLite with bound parameters and chunked executemany.
+Shared by Insert CSV and Generate Data. Large CSVs can be streamed chunk by chunk
+so peak memory depends on the chunk size, not the file size.
+"""
+__all__ = ["quote_ident", "sql_type_for", "create_table", "insert_statement", "frame_records",
+           "insert_chunks", "bulk_insert", "read_csv_head", "stream_csv"]
+
+import time
+import pandas as pd
+
+DEFAULT_CHUNK_SIZE = 5000
+
+
+def quote_ident(name):
+    """Quote a table/column name for SQLite, escaping embedded double quotes"""
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+def sql_type_for(series):
+    """Map a pandas column to the SQLite type used when creating tables"""
+    if pd.api.types.is_bool_dtype(series) or pd.api.types.is_integer_dtype(series):
+        return "INTEGER"
+    if pd.api.types.is_float_dtype(series):
+        return "REAL"
+    return "TEXT"
+
+
+def create_table(conn, table, col_types):
+    """CREATE TABLE IF NOT EXISTS from an ordered {column: sql_type} mapping"""
+    cols_sql = ", ".join(f"{quote_ident(col)} {typ}" for col, typ in col_types.items())
+    conn.execute(f"CREATE TABLE IF NOT EXISTS {quote_ident(table)} ({cols_sql})")
+
+
+def insert_statement(table, columns):
+    """Parameterized INSERT statement for `columns` of `table`"""
+    placeholders = ", ".join("?" for _ in columns)
+    cols_sql = ", ".join(quote_ident(col) for col in columns)
+    return f"INSERT INTO {quote_ident(table)} ({cols_sql}) VALUES ({placeholders})"
+
+
+def frame_records(frame):
+    """Convert a DataFrame chunk into a list of tuples sqlite3 can bind"""
+    out = frame.astype(object)
+    for col in frame.columns:
+        if pd.api.types.is_datetime64_any_dtype(frame[col]):
+            out[col] = frame[col].dt.strftime("%Y-%m-%d %H:%M:%S").astype(object)
+    out = out.where(frame.notna(), None)
+    return list(out.itertuples(index=False, name=None))
+
+
+def insert_chunks(conn, table, chunks, col_types, progress=None):
+    """
+    Create `table` (if needed) and insert an iterable of DataFrame chunks in one transaction.
+    Every chunk must have the columns of `col_types`, in order.
+    `progress(rows_done)` is called after each chunk when given.
+    Returns a dict with rows, seconds and rows_per_sec.
+    """
+    columns = list(col_types)
+    insert_sql = insert_statement(table, columns)
+
+    rows = 0
+    start = time.perf_counter()
+    with conn:
+        create_table(conn, table, col_types)
+        for chunk in chunks:
+            conn.executemany(insert_sql, frame_records(chunk[columns]))
+            rows += len(chunk)
+            if progress:
+                progress(rows)
+    seconds = time.perf_counter() - start
+    return {
+        "rows": rows,
+        "seconds": seconds,
+        "rows_per_sec": rows / seconds if seconds > 0 else float(rows),
+    }
+
+
+def bulk_insert(conn, table, df, col_types=None, chunk_size=DEFAULT_CHUNK_SIZE, progress=None):
+    """
+    Create `table` (if needed) and insert every row of `df` in one transaction.
+    Rows are sent in chunks through executemany with bound parameters.
+    `progress(done, total)` is called after each chunk when given.
+    Returns a dict with rows, seconds and rows_per_sec.
+    """
+    if col_types is None:
+        col_types = {col: sql_type_for(df[col]) for col in df.columns}
+    total = len(df)
+    chunks = (df.iloc[offset:offset + chunk_size] for offset in range(0, total, chunk_size))
+    return insert_chunks(conn, table, chunks, col_types,
+                         progress=(lambda done: progress(done, total)) if progress else None)
+
+
+def read_csv_head(source, nrows=DEFAULT_CHUNK_SIZE):
+    """Read the first `nrows` rows of a CSV for preview/type inference, then rewind the source"""
+    head = pd.read_csv(source, nrows=nrows)
+    source.seek(0)
+    return head
+
+
+def stream_csv(conn, table, source, col_types=None, chunk_size=DEFAULT_CHUNK_SIZE, progress=None):
+    """
+    Stream a CSV file object into `table` in fixed-size chunks.
+    Column types are inferred from the first chunk unless `col_types` is given.
+    `progress(fraction)` reports the share of the source consumed so far.
+    Returns a dict with rows, seconds and rows_per_sec.
+    """
+    source.seek(0, 2)
+    size = source.tell()
+    source.seek(0)
+    reader = pd.read_csv(source, chunksize=chunk_size)
+    first = next(reader, None)
+    if first is None:
+        raise ValueError("CSV file is empty")
+    if col_types is None:
+        col_types = {col: sql_type_for(first[col]) for col in first.columns}
+
+    def chunks():
+        yield first
+        yield from reader
+
+    def report(_rows):
+        if progress and size:
+            progress(min(source.tell() / size, 1.0))
+
+    try:
+        return insert_chunks(conn, table, chunks(), col_types, progress=report)
+    finally:
+        reader.close()
@@ -1,9 +1,30 @@
 import streamlit as st
 import pandas as pd
+import os
+import shutil
+from datetime import datetime
 from utils import navigate_to
+from modules import jobs
+from modules.ingest import DEFAULT_CHUNK_SIZE, bulk_insert, read_csv_head, stream_csv
+from modules.typeinfer import infer_frame
+
+# Uploads above this size default to streaming mode
+STREAM_THRESHOLD_BYTES = 50 * 1024 * 1024
+
+def save_upload(uploaded_file, table_name):
+    """Copy the raw upload to my_projects/files in blocks and return its path"""
+    files_dir = os.path.join("my_projects", "files")
+    os.makedirs(files_dir, exist_ok=True)
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    csv_path = os.path.join(files_dir, f"{table_name}_uploaded_{timestamp}.csv")
+    uploaded_file.seek(0)
+    with open(csv_path, "wb") as f:
+        shutil.copyfileobj(uploaded_file, f)
+    return csv_path
 
 def show(conn):
     st.subheader("📤 Insert CSV to Database")
+    jobs.show_panel(conn, kinds=["ingest"], key="insertcsv")
 
     cursor = conn.cursor()
 
@@ -25,7 +46,15 @@ def show(conn):
             navigate_to("Navigator")
         return
 
-    df = pd.read_csv(uploaded_file)
+    # Large uploads are streamed in chunks so memory stays bounded by the chunk size
+    stream_mode = st.checkbox("Streaming mode (large files)", value=uploaded_file.size > STREAM_THRESHOLD_BYTES,
+                              help="Read and insert the file in fixed-size chunks instead of loading it all at once")
+    if stream_mode:
+        chunk_size = st.number_input("Rows per chunk", min_value=1000, max_value=500000, value=DEFAULT_CHUNK_SIZE, step=1000)
+        df = read_csv_head(uploaded_file, nrows=chunk_size)
+        st.caption(f"Column types are inferred from the first {len(df):,} rows.")
+    else:
+        df = pd.read_csv(uploaded_file)
     st.write("Preview of uploaded CSV:", df.head())
 
     # Step 2: Table Name
@@ -34,50 +63,39 @@ def show(conn):
 
     # Step 3: Datatype Selection
     st.markdown("#### Column Datatypes")
-    dtype_map = {
-        "int64": "INTEGER",
-        "float64": "REAL",
-        "object": "TEXT",
-        "bool": "INTEGER",
-        "datetime64[ns]": "TEXT"
-    }
+    # Inferred from a stratified sample of the rows read so far
+    inferred_types = infer_frame(df)
     col_types = {}
     for col in df.columns:
-        inferred = dtype_map.get(str(df[col].dtype), "TEXT")
-        col_types[col] = st.selectbox(f"{col}", [inferred, "INTEGER", "REAL", "TEXT"], index=0)
+        info = inferred_types[col]
+        label = f"{col} ({info['kind']}, {info['datetime_format']})" if info["datetime_format"] else f"{col} ({info['kind']})"
+        col_types[col] = st.selectbox(label, [info["sql_type"], "INTEGER", "REAL", "TEXT"], index=0, key=f"insert_type_{col}")
+
+    run_in_background = st.checkbox("Run in background", value=False, key="insert_background",
+                                    help="Insert in a background job that can be cancelled and resumed")
 
     # Step 4: Insert
     if st.button("Insert CSV to Database"):
         try:
-            # Create table
-            cols_sql = ", ".join([f"'{col}' {col_types[col]}" for col in df.columns])
-            cursor.execute(f"CREATE TABLE IF NOT EXISTS '{table_name}' ({cols_sql})")
-            conn.commit()
-
-            # Insert rows
-            for _, row in df.iterrows():
-                values = []
-                for col in df.columns:
-                    val = row[col]
-                    if pd.isnull(val):
-                        values.append("NULL")
-                    elif col_types[col] == "TEXT":
-                        values.append(f"'{str(val).replace('\'','\\\'')}'")
-                    else:
-                        values.append(str(val))
-                values_sql = ", ".join(values)
-                cursor.execute(f"INSERT INTO '{table_name}' VALUES ({values_sql})")
-            conn.commit()
-            st.success(f"CSV inserted into `{table_name}` successfully!")
-            # Save uploaded CSV to my_projects/files
-            import os
-            from datetime import datetime
-            files_dir = os.path.join("my_projects", "files")
-            os.makedirs(files_dir, exist_ok=True)
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            csv_path = os.path.join(files_dir, f"{table_name}_uploaded_{timestamp}.csv")
-            df.to_csv(csv_path, index=False)
-            st.success(f"Uploaded CSV saved to My Projects.")
+            if run_in_background:
+                # The job reads the saved copy, so it can outlive this upload and resume later
+                csv_path = save_upload(uploaded_file, table_name)
+                job_id = jobs.submit_ingest(csv_path, table_name, col_types,
+                                            chunk_size=chunk_size if stream_mode else DEFAULT_CHUNK_SIZE)
+                st.success(f"Started background job #{job_id} to insert into `{table_name}`.")
+            else:
+                progress_bar = st.progress(0.0)
+                if stream_mode:
+                    result = stream_csv(conn, table_name, uploaded_file, col_types, chunk_size=chunk_size,
+                                        progress=progress_bar.progress)
+                else:
+                    result = bulk_insert(conn, table_name, df, col_types,
+                                         progress=lambda done, total: progress_bar.progress(done / max(total, 1)))
+                progress_bar.progress(1.0)
+                st.success(f"CSV inserted into `{table_name}` successfully! "
+                           f"{result['rows']:,} rows in {result['seconds']:.2f}s ({result['rows_per_sec']:,.0f} rows/sec)")
+                save_upload(uploaded_file, table_name)
+                st.success(f"Uploaded CSV saved to My Projects.")
         except Exception as e:
             st.error(f"Error inserting CSV: {e}")
 
@@ -0,0 +1,257 @@
+"""
+Background Jobs
+Runs long ingestion and generation work on a thread pool so the Streamlit page stays responsive.
+Job status lives in the `_ebi_jobs` table. Each chunk is committed together with the job's
+progress, so a cancelled or interrupted job resumes from its last committed chunk.
+"""
+__all__ = ["submit_ingest", "submit_generate", "cancel", "resume", "list_jobs", "show_panel"]
+
+import json
+import os
+import random
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from config import DB_PATH
+from modules.ingest import DEFAULT_CHUNK_SIZE, create_table, insert_statement, frame_records
+from modules.synth import POOL_SIZE, generate_data, seeded_pools, shard_seeds
+
+JOBS_TABLE = "_ebi_jobs"
+MAX_WORKERS = 2
+ACTIVE_STATUSES = ("queued", "running")
+RESUMABLE_STATUSES = ("cancelled", "failed", "interrupted")
+
+# Module-level state survives Streamlit reruns; one executor serves every session
+_executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="ebi-job")
+_cancel_events = {}
+_lock = threading.Lock()
+
+
+def _now():
+    return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _connect():
+    """Worker threads get their own connection; WAL lets the UI read while a job writes"""
+    conn = sqlite3.connect(DB_PATH, timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    return conn
+
+
+def _ensure_table(conn):
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {JOBS_TABLE} (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            kind TEXT NOT NULL,
+            target_table TEXT NOT NULL,
+            params TEXT NOT NULL,
+            status TEXT NOT NULL,
+            rows_done INTEGER NOT NULL DEFAULT 0,
+            chunks_done INTEGER NOT NULL DEFAULT 0,
+            progress REAL NOT NULL DEFAULT 0,
+            error TEXT,
+            created_at TEXT NOT NULL,
+            updated_at TEXT NOT NULL
+        )
+    """)
+    conn.commit()
+
+
+def _set_status(conn, job_id, status, error=None):
+    with conn:
+        conn.execute(f"UPDATE {JOBS_TABLE} SET status=?, error=?, updated_at=? WHERE id=?",
+                     (status, error, _now(), job_id))
+
+
+def _commit_chunk(conn, job_id, insert_sql, chunk, rows_done, chunks_done, progress):
+    """Insert one chunk and advance the job's resume point in the same transaction"""
+    with conn:
+        conn.executemany(insert_sql, frame_records(chunk))
+        conn.execute(f"UPDATE {JOBS_TABLE} SET rows_done=?, chunks_done=?, progress=?, updated_at=? WHERE id=?",
+                     (rows_done, chunks_done, progress, _now(), job_id))
+
+
+def _run_ingest(conn, job_id, table, params, rows_done, chunks_done, cancel_event):
+    col_types = params["col_types"]
+    columns = list(col_types)
+    with conn:
+        create_table(conn, table, col_types)
+    insert_sql = insert_statement(table, columns)
+    size = os.path.getsize(params["path"])
+    with open(params["path"], "rb") as source:
+        with pd.read_csv(source, chunksize=params["chunk_size"]) as reader:
+            for index, chunk in enumerate(reader):
+                if index < chunks_done:
+                    continue  # committed by an earlier run of this job
+                if cancel_event.is_set():
+                    return False
+                rows_done += len(chunk)
+                progress = min(source.tell() / size, 1.0) if size else 1.0
+                _commit_chunk(conn, job_id, insert_sql, chunk[columns], rows_done, index + 1, progress)
+    return True
+
+
+def _run_generate(conn, job_id, table, params, rows_done, chunks_done, cancel_event):
+    col_defs = [tuple(col_def) for col_def in params["col_defs"]]
+    col_types = params["col_types"]
+    num_rows = params["num_rows"]
+    chunk_size = params["chunk_size"]
+    with conn:
+        create_table(conn, table, col_types)
+    insert_sql = insert_statement(table, list(col_types))
+    # Pools come from the job seed and each chunk gets its own derived stream, so a resumed
+    # job writes the same rows as an uninterrupted one (jobs queued without a seed are unseeded)
+    seed = params.get("seed")
+    offsets = range(0, num_rows, chunk_size)
+    chunk_seeds = shard_seeds(seed, len(offsets)) if seed is not None else None
+    pools = seeded_pools(col_defs, seed, min(POOL_SIZE, num_rows)) if seed is not None else None
+    for index, offset in enumerate(offsets):
+        if index < chunks_done:
+            continue
+        if cancel_event.is_set():
+            return False
+        n = min(chunk_size, num_rows - offset)
+        rng = np.random.default_rng(chunk_seeds[index]) if chunk_seeds else None
+        chunk = generate_data(col_defs, n, id_start=offset + 1, rng=rng, pools=pools)
+        _commit_chunk(conn, job_id, insert_sql, chunk, offset + n, index + 1, (offset + n) / num_rows)
+    return True
+
+
+_RUNNERS = {
+    "ingest": _run_ingest,
+    "generate": _run_generate,
+}
+
+
+def _run(job_id, cancel_event):
+    conn = _connect()
+    try:
+        kind, table, params, rows_done, chunks_done = conn.execute(
+            f"SELECT kind, target_table, params, rows_done, chunks_done FROM {JOBS_TABLE} WHERE id=?",
+            (job_id,)).fetchone()
+        _set_status(conn, job_id, "running")
+        finished = _RUNNERS[kind](conn, job_id, table, json.loads(params), rows_done, chunks_done, cancel_event)
+        _set_status(conn, job_id, "done" if finished else "cancelled")
+    except Exception as e:
+        _set_status(conn, job_id, "failed", error=str(e))
+    finally:
+        with _lock:
+            _cancel_events.pop(job_id, None)
+        conn.close()
+
+
+def _start(job_id):
+    event = threading.Event()
+    _cancel_events[job_id] = event
+    _executor.submit(_run, job_id, event)
+
+
+def _submit(kind, table, params):
+    conn = _connect()
+    try:
+        _ensure_table(conn)
+        with _lock:
+            with conn:
+                cursor = conn.execute(
+                    f"INSERT INTO {JOBS_TABLE} (kind, target_table, params, status, created_at, updated_at) "
+                    f"VALUES (?, ?, ?, 'queued', ?, ?)",
+                    (kind, table, json.dumps(params), _now(), _now()))
+            job_id = cursor.lastrowid
+            _start(job_id)
+    finally:
+        conn.close()
+    return job_id
+
+
+def submit_ingest(path, table, col_types, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Queue a job that streams the CSV at `path` into `table`; returns the job id"""
+    return _submit("ingest", table, {"path": path, "col_types": col_types, "chunk_size": int(chunk_size)})
+
+
+def submit_generate(table, col_defs, col_types, num_rows, chunk_size=DEFAULT_CHUNK_SIZE, seed=None):
+    """
+    Queue a job that generates `num_rows` synthetic rows into `table`; returns the job id.
+    The seed (random when not given) is stored with the job so a resume continues the same data.
+    """
+    if seed is None:
+        seed = random.SystemRandom().randrange(2 ** 32)
+    return _submit("generate", table, {"col_defs": col_defs, "col_types": col_types,
+                                       "num_rows": int(num_rows), "chunk_size": int(chunk_size),
+                                       "seed": int(seed)})
+
+
+def cancel(job_id):
+    """Ask a queued or running job to stop after its current chunk"""
+    event = _cancel_events.get(job_id)
+    if event:
+        event.set()
+    return event is not None
+
+
+def resume(job_id):
+    """Restart a cancelled, failed or interrupted job from its last committed chunk"""
+    conn = _connect()
+    try:
+        with _lock:
+            if job_id in _cancel_events:
+                return
+            _set_status(conn, job_id, "queued")
+            _start(job_id)
+    finally:
+        conn.close()
+
+
+def list_jobs(conn, kinds=None, limit=20):
+    """Most recent jobs as dicts, newest first"""
+    _ensure_table(conn)
+    with _lock:
+        # Jobs left active by a previous server process have no worker any more
+        active = [row[0] for row in conn.execute(
+            f"SELECT id FROM {JOBS_TABLE} WHERE status IN ({', '.join('?' for _ in ACTIVE_STATUSES)})",
+            ACTIVE_STATUSES)]
+        for job_id in active:
+            if job_id not in _cancel_events:
+                _set_status(conn, job_id, "interrupted")
+    sql = f"SELECT * FROM {JOBS_TABLE}"
+    args = []
+    if kinds:
+        sql += f" WHERE kind IN ({', '.join('?' for _ in kinds)})"
+        args.extend(kinds)
+    sql += " ORDER BY id DESC LIMIT ?"
+    args.append(limit)
+    cursor = conn.execute(sql, args)
+    cols = [desc[0] for desc in cursor.description]
+    return [dict(zip(cols, row)) for row in cursor.fetchall()]
+
+
+def show_panel(conn, kinds=None, key="jobs"):
+    """Render recent background jobs with progress, cancel and resume controls"""
+    jobs = list_jobs(conn, kinds)
+    if not jobs:
+        return
+    with st.expander("⏳ Background Jobs", expanded=any(job["status"] in ACTIVE_STATUSES for job in jobs)):
+        st.button("🔄 Refresh", key=f"jobs_refresh_{key}")
+        for job in jobs:
+            col1, col2 = st.columns([5, 1])
+            with col1:
+                st.markdown(f"<span style='color:black'><b>#{job['id']}</b> {job['kind']} → <code>{job['target_table']}</code> · "
+                            f"{job['status']} · {job['rows_done']:,} rows · {job['updated_at']}</span>",
+                            unsafe_allow_html=True)
+                st.progress(min(float(job["progress"]), 1.0))
+                if job["error"]:
+                    st.caption(f"Error: {job['error']}")
+            with col2:
+                if job["status"] in ACTIVE_STATUSES:
+                    if st.button("Cancel", key=f"job_cancel_{key}_{job['id']}"):
+                        cancel(job["id"])
+                        st.rerun()
+                elif job["status"] in RESUMABLE_STATUSES:
+                    if st.button("Resume", key=f"job_resume_{key}_{job['id']}"):
+                        resume(job["id"])
+                        st.rerun()
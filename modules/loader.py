@@ -0,0 +1,53 @@
+"""
+Typed Loader
+Builds DataFrames column by column straight from cursor rows instead of through an
+all-object frame. Integer columns are downcast to the smallest integer type that holds
+them, floats to float32 only when that is lossless, and repetitive text becomes
+`category`; other text can optionally be stored as Arrow-backed strings.
+"""
+__all__ = ["compact_column", "frame_from_rows", "load_frame", "frame_memory"]
+
+import numpy as np
+import pandas as pd
+
+# Text columns with at most this share of distinct values (and enough rows) become categories
+CATEGORY_MAX_RATIO = 0.5
+CATEGORY_MIN_ROWS = 50
+
+def compact_column(values, arrow_strings=False):
+    """A Series of `values` in the most compact dtype that keeps every value exact"""
+    series = pd.Series(values)
+    if pd.api.types.is_bool_dtype(series):
+        return series
+    if pd.api.types.is_integer_dtype(series):
+        return pd.to_numeric(series, downcast="integer")
+    if pd.api.types.is_float_dtype(series):
+        narrow = series.astype(np.float32)
+        lossless = (narrow.astype(np.float64) == series) | series.isna()
+        return narrow if lossless.all() else series
+    # Text only (NULLs aside): mixed columns stay object so no value changes type
+    if pd.api.types.infer_dtype(series, skipna=True) == "string":
+        if len(series) >= CATEGORY_MIN_ROWS and series.nunique() <= CATEGORY_MAX_RATIO * len(series):
+            return series.astype("category")
+        if arrow_strings:
+            return series.astype("string[pyarrow]")
+    return series
+
+def frame_from_rows(rows, columns, arrow_strings=False):
+    """Typed DataFrame from a list of row tuples; duplicate column names are kept"""
+    if not rows:
+        return pd.DataFrame(columns=columns)
+    data = {i: compact_column(list(values), arrow_strings) for i, values in enumerate(zip(*rows))}
+    df = pd.DataFrame(data)
+    df.columns = columns
+    return df
+
+def load_frame(conn, sql, params=(), arrow_strings=False):
+    """Run `sql` and return its rows as a typed DataFrame"""
+    cursor = conn.execute(sql, params)
+    columns = [desc[0] for desc in cursor.description]
+    return frame_from_rows(cursor.fetchall(), columns, arrow_strings)
+
+def frame_memory(df):
+    """Bytes held by `df`, including the Python objects of object columns"""
+    return int(df.memory_usage(deep=True, index=False).sum())
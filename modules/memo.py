@@ -0,0 +1,71 @@
+"""
+Step Cache
+Memoizes the outputs of pipeline steps in a process-wide LRU bounded by a memory budget.
+A step's key hashes its name, its upstream step's key and its parameters; the root key of a
+pipeline carries the table's data version. Changing one step's parameters therefore only
+misses for that step and the steps downstream of it.
+Cached values are shared: steps must return new objects and callers must not mutate them.
+"""
+__all__ = ["step_key", "run_step", "cache_info", "clear_cache"]
+
+import hashlib
+import json
+import sys
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+MEMORY_BUDGET_BYTES = 512 * 1024 * 1024
+
+_cache = OrderedDict()
+_sizes = {}
+_stats = {"hits": 0, "misses": 0, "bytes": 0}
+_lock = threading.Lock()
+
+def step_key(name, upstream, params):
+    """Stable key for a step from its name, its upstream key and JSON-able params"""
+    payload = json.dumps([name, upstream, params], sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode()).hexdigest()
+
+def _sizeof(value):
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        usage = value.memory_usage(deep=True)
+        return int(usage.sum()) if isinstance(usage, pd.Series) else int(usage)
+    return sys.getsizeof(value)
+
+def run_step(name, upstream, params, func, *args):
+    """
+    Return (key, value) for a step, calling func(*args) only on a cache miss.
+    `upstream` is the key of the step whose output feeds this one (or any root identity).
+    """
+    key = step_key(name, upstream, params)
+    with _lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            _stats["hits"] += 1
+            return key, _cache[key]
+        _stats["misses"] += 1
+    value = func(*args)
+    size = _sizeof(value)
+    if size <= MEMORY_BUDGET_BYTES:
+        with _lock:
+            if key not in _cache:
+                _cache[key] = value
+                _sizes[key] = size
+                _stats["bytes"] += size
+            while _stats["bytes"] > MEMORY_BUDGET_BYTES:
+                old_key, _ = _cache.popitem(last=False)
+                _stats["bytes"] -= _sizes.pop(old_key)
+    return key, value
+
+def cache_info():
+    """Hit/miss counters, entries and bytes held"""
+    with _lock:
+        return dict(_stats, entries=len(_cache), budget=MEMORY_BUDGET_BYTES)
+
+def clear_cache():
+    with _lock:
+        _cache.clear()
+        _sizes.clear()
+        _stats["bytes"] = 0
@@ -1,13 +1,12 @@
 import streamlit as st
-from utils import navigate_to
+from utils import navigate_to, list_tables
 
 def show(conn):
     st.subheader("📂 Data Navigator")
 
     try:
         cursor = conn.cursor()
-        cursor.execute("SELECT name FROM sqlite_master WHERE type='table' ORDER BY name")
-        tables = [row[0] for row in cursor.fetchall()]
+        tables = list_tables(conn)
 
         col1, col2 = st.columns(2)
         with col1:
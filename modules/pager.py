@@ -0,0 +1,142 @@
+"""
+Table Browser
+Keyset pagination over rowid (or a single-column primary key) with an optional sort
+column, so every page costs the same as the first. The next page is prefetched on a
+background thread and recent pages are cached per session.
+"""
+__all__ = ["key_column", "fetch_page", "show_browser"]
+
+import sqlite3
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import streamlit as st
+
+from config import DB_PATH
+from modules.ingest import quote_ident
+from modules.querycache import database_version
+
+PAGE_SIZE = 50
+CACHE_PAGES = 8
+KEY_ALIAS = "__ebi_key"
+SORT_ALIAS = "__ebi_sort"
+
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="ebi-pager")
+_local = threading.local()
+
+def _thread_conn():
+    """One read connection per prefetch thread"""
+    if getattr(_local, "conn", None) is None:
+        _local.conn = sqlite3.connect(DB_PATH, timeout=30)
+    return _local.conn
+
+def key_column(conn, table):
+    """rowid, or the primary key of a WITHOUT ROWID table"""
+    try:
+        conn.execute(f"SELECT rowid FROM {quote_ident(table)} LIMIT 0")
+        return "rowid"
+    except sqlite3.OperationalError:
+        pk = [row[1] for row in conn.execute(f"PRAGMA table_info({quote_ident(table)})") if row[5]]
+        if len(pk) != 1:
+            raise ValueError(f"Table '{table}' has no rowid or single-column primary key to page on")
+        return quote_ident(pk[0])
+
+def _seek_clause(sort_sql, key_sql, cursor, descending):
+    """WHERE clause that resumes after `cursor` = (sort_value, key_value); NULLs sort first ascending"""
+    sort_value, key_value = cursor
+    if sort_sql is None:
+        return f"{key_sql} {'<' if descending else '>'} ?", [key_value]
+    if descending:
+        if sort_value is None:
+            return f"{sort_sql} IS NULL AND {key_sql} < ?", [key_value]
+        return (f"({sort_sql} < ? OR ({sort_sql} = ? AND {key_sql} < ?) OR {sort_sql} IS NULL)",
+                [sort_value, sort_value, key_value])
+    if sort_value is None:
+        return f"(({sort_sql} IS NULL AND {key_sql} > ?) OR {sort_sql} IS NOT NULL)", [key_value]
+    return f"({sort_sql} > ? OR ({sort_sql} = ? AND {key_sql} > ?))", [sort_value, sort_value, key_value]
+
+def fetch_page(conn, table, cursor=None, sort_col=None, descending=False, page_size=PAGE_SIZE):
+    """
+    One page of `table` starting after `cursor`.
+    Returns (df, next_cursor); next_cursor is None on the last page.
+    """
+    key_sql = key_column(conn, table)
+    sort_sql = quote_ident(sort_col) if sort_col else None
+    direction = "DESC" if descending else "ASC"
+    select = f"SELECT *, {key_sql} AS {KEY_ALIAS}"
+    order = f"{key_sql} {direction}"
+    if sort_sql:
+        select += f", {sort_sql} AS {SORT_ALIAS}"
+        order = f"{sort_sql} {direction}, {order}"
+    sql = f"{select} FROM {quote_ident(table)}"
+    args = []
+    if cursor is not None:
+        where, args = _seek_clause(sort_sql, key_sql, cursor, descending)
+        sql += f" WHERE {where}"
+    sql += f" ORDER BY {order} LIMIT ?"
+    args.append(page_size)
+
+    result = conn.execute(sql, args)
+    cols = [desc[0] for desc in result.description]
+    df = pd.DataFrame(result.fetchall(), columns=cols)
+    next_cursor = None
+    if len(df) == page_size:
+        last = df.iloc[-1]
+        next_cursor = (last[SORT_ALIAS] if sort_sql else None, last[KEY_ALIAS])
+        next_cursor = tuple(None if pd.isna(v) else v.item() if hasattr(v, "item") else v for v in next_cursor)
+    return df.drop(columns=[c for c in (KEY_ALIAS, SORT_ALIAS) if c in df.columns]), next_cursor
+
+def _page_future(cache, page_key):
+    """Cached page future, submitting the fetch to the background pool on a miss"""
+    if page_key in cache:
+        cache.move_to_end(page_key)
+        return cache[page_key]
+    table, sort_col, descending, page_size, cursor, _ = page_key
+    future = _executor.submit(lambda: fetch_page(_thread_conn(), table, cursor, sort_col, descending, page_size))
+    cache[page_key] = future
+    while len(cache) > CACHE_PAGES:
+        cache.popitem(last=False)
+    return future
+
+def show_browser(conn, table, key="browser", page_size=PAGE_SIZE):
+    """Render a paginated view of `table` and return the current page as a DataFrame"""
+    columns = [row[1] for row in conn.execute(f"PRAGMA table_info({quote_ident(table)})")]
+    col1, col2 = st.columns([3, 1])
+    with col1:
+        sort_choice = st.selectbox("Sort by", ["(table order)"] + columns, key=f"{key}_sort")
+    with col2:
+        descending = st.checkbox("Descending", value=False, key=f"{key}_desc")
+    sort_col = None if sort_choice == "(table order)" else sort_choice
+
+    # Cursor stack: one entry per visited page, so Prev never re-walks the table
+    view = (table, sort_col, descending, page_size)
+    state = st.session_state.get(f"{key}_state")
+    if not state or state["view"] != view:
+        state = {"view": view, "stack": [None]}
+        st.session_state[f"{key}_state"] = state
+    cache = st.session_state.setdefault(f"{key}_cache", OrderedDict())
+    version = database_version(conn) or conn.total_changes
+
+    nav_first, nav_prev, nav_next, nav_info = st.columns([1, 1, 1, 3])
+    with nav_first:
+        if st.button("⏮ First", key=f"{key}_first", disabled=len(state["stack"]) == 1):
+            state["stack"] = [None]
+    with nav_prev:
+        if st.button("◀ Prev", key=f"{key}_prev", disabled=len(state["stack"]) == 1):
+            state["stack"].pop()
+
+    df, next_cursor = _page_future(cache, view + (state["stack"][-1], version)).result()
+    with nav_next:
+        if st.button("Next ▶", key=f"{key}_next", disabled=next_cursor is None):
+            state["stack"].append(next_cursor)
+            df, next_cursor = _page_future(cache, view + (next_cursor, version)).result()
+    page = len(state["stack"])
+    with nav_info:
+        first_row = (page - 1) * page_size + 1
+        st.caption(f"Page {page} · rows {first_row:,}–{first_row + len(df) - 1:,}")
+    if next_cursor is not None:
+        _page_future(cache, view + (next_cursor, version))  # prefetch
+    st.dataframe(df)
+    return df
@@ -1,13 +1,15 @@
 import streamlit as st
 import pandas as pd
-from utils import navigate_to
-import os
-from datetime import datetime
+from utils import navigate_to, list_tables
+from modules.snapshots import save_snapshot
+from modules.pager import show_browser
+from modules.profiler import get_stats, stats_frame
+from modules.sketches import get_sketches, sketch_frame
+from modules.querycache import cached_query
 
 def show(conn):
     cursor = conn.cursor()
-    cursor.execute("SELECT name FROM sqlite_master WHERE type='table' ORDER BY name")
-    tables = [row[0] for row in cursor.fetchall()]
+    tables = list_tables(conn)
     current_table = st.session_state.get("selected_table", tables[0] if tables else None)
     table = current_table
 
@@ -19,31 +21,35 @@ def show(conn):
     cursor = conn.cursor()
 
     try:
-        cursor.execute(f"SELECT * FROM '{table}' LIMIT 50")
-        rows = cursor.fetchall()
-        cols = [desc[0] for desc in cursor.description]
-        df = pd.DataFrame(rows, columns=cols)
-        st.dataframe(df)
+        df = show_browser(conn, table, key="preview_browser")
 
         st.download_button("📥 Export CSV", df.to_csv(index=False), f"{table}.csv", "text/csv")
         st.download_button("📥 Export JSON", df.to_json(orient="records"), f"{table}.json", "application/json")
-        # Save files to my_projects/files
-        files_dir = os.path.join("my_projects", "files")
-        os.makedirs(files_dir, exist_ok=True)
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        csv_path = os.path.join(files_dir, f"{table}_{timestamp}.csv")
-        json_path = os.path.join(files_dir, f"{table}_{timestamp}.json")
-        df.to_csv(csv_path, index=False)
-        df.to_json(json_path, orient="records")
-        st.success(f"CSV and JSON saved to My Projects.")
-
-        cursor.execute(f"PRAGMA table_info('{table}')")
-        schema = cursor.fetchall()
+        # Save files to my_projects/files; unchanged data is not written again
+        _, written = save_snapshot(conn, df, table, "preview", formats=("csv", "json"))
+        if written:
+            st.success(f"CSV and JSON saved to My Projects.")
+
+        _, schema = cached_query(conn, f"PRAGMA table_info('{table}')")
         with st.expander("📌 Columns"):
             st.write(pd.DataFrame(schema, columns=["cid", "name", "type", "notnull", "default_value", "pk"]))
 
-        cursor.execute(f"PRAGMA index_list('{table}')")
-        indexes = cursor.fetchall()
+        with st.expander("📊 Column Statistics"):
+            mode = st.radio("Profiling mode", ["Exact (SQL)", "Approximate (sketches)"], horizontal=True, key="preview_stats_mode")
+            if mode == "Exact (SQL)":
+                refresh = st.button("🔄 Recompute", key="preview_stats_refresh")
+                stats = get_stats(conn, table, refresh=refresh)
+                st.markdown(f"<span style='color:black'>{stats['rows']:,} rows · {stats['duplicate_rows']:,} duplicate rows · "
+                            f"computed {stats['computed_at']} in {stats['seconds']:.2f}s</span>", unsafe_allow_html=True)
+                st.write(stats_frame(stats).astype(str))
+            else:
+                # One streaming pass the first time; later appends only scan the new rows
+                with st.spinner("Updating sketches..."):
+                    sketches = get_sketches(conn, table)
+                st.markdown("<span style='color:black'>Distinct counts, quantiles and top values are estimates</span>", unsafe_allow_html=True)
+                st.write(sketch_frame(sketches).astype(str))
+
+        _, indexes = cached_query(conn, f"PRAGMA index_list('{table}')")
         with st.expander("📍 Indexes"):
             st.write(pd.DataFrame(indexes, columns=["seq", "name", "unique", "origin", "partial"]))
 
@@ -0,0 +1,88 @@
+"""
+Column Profiler
+Whole-table column statistics computed in SQLite with a single aggregate scan
+(plus one DISTINCT pass for duplicate rows). Results are stored in the
+`_ebi_stats` catalog keyed by table and data version, so pages read them back
+instead of recomputing them on every rerun.
+"""
+__all__ = ["compute_stats", "get_stats", "stats_frame"]
+
+import json
+import time
+from datetime import datetime
+
+import pandas as pd
+
+from modules.ingest import quote_ident
+from modules.versions import table_version
+
+STATS_TABLE = "_ebi_stats"
+
+def _ensure_table(conn):
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {STATS_TABLE} (
+            table_name TEXT NOT NULL,
+            version TEXT NOT NULL,
+            rows INTEGER NOT NULL,
+            duplicate_rows INTEGER NOT NULL,
+            columns TEXT NOT NULL,
+            seconds REAL NOT NULL,
+            computed_at TEXT NOT NULL,
+            PRIMARY KEY (table_name, version)
+        )
+    """)
+
+def compute_stats(conn, table):
+    """
+    Scan `table` once and return {"rows", "duplicate_rows", "seconds", "columns"}, where
+    columns is a list of dicts with name, nulls, blanks, distinct, duplicates, min and max.
+    """
+    start = time.perf_counter()
+    columns = [row[1] for row in conn.execute(f"PRAGMA table_info({quote_ident(table)})")]
+    parts = ["COUNT(*)"]
+    for col in columns:
+        q = quote_ident(col)
+        parts += [f"COUNT({q})", f"SUM({q} = '')", f"COUNT(DISTINCT {q})", f"MIN({q})", f"MAX({q})"]
+    values = conn.execute(f"SELECT {', '.join(parts)} FROM {quote_ident(table)}").fetchone()
+    rows = values[0]
+    distinct_rows = conn.execute(f"SELECT COUNT(*) FROM (SELECT DISTINCT * FROM {quote_ident(table)})").fetchone()[0]
+
+    stats = []
+    for i, col in enumerate(columns):
+        non_null, blanks, distinct, low, high = values[1 + 5 * i: 6 + 5 * i]
+        stats.append({
+            "name": col,
+            "nulls": rows - non_null,
+            "blanks": blanks or 0,
+            "distinct": distinct,
+            "duplicates": non_null - distinct,
+            "min": low,
+            "max": high,
+        })
+    return {"rows": rows, "duplicate_rows": rows - distinct_rows,
+            "seconds": time.perf_counter() - start, "columns": stats}
+
+def get_stats(conn, table, refresh=False):
+    """Catalogued stats for the current version of `table`, computing and storing them on a miss"""
+    _ensure_table(conn)
+    version = table_version(conn, table)
+    if not refresh:
+        row = conn.execute(f"SELECT rows, duplicate_rows, columns, seconds, computed_at FROM {STATS_TABLE} "
+                           f"WHERE table_name=? AND version=?", (table, version)).fetchone()
+        if row:
+            return {"rows": row[0], "duplicate_rows": row[1], "columns": json.loads(row[2]),
+                    "seconds": row[3], "computed_at": row[4], "version": version}
+
+    stats = compute_stats(conn, table)
+    stats.update(computed_at=datetime.now().strftime("%Y-%m-%d %H:%M:%S"), version=version)
+    with conn:
+        # Older versions can never be read again
+        conn.execute(f"DELETE FROM {STATS_TABLE} WHERE table_name=?", (table,))
+        conn.execute(f"INSERT INTO {STATS_TABLE} VALUES (?, ?, ?, ?, ?, ?, ?)",
+                     (table, version, stats["rows"], stats["duplicate_rows"],
+                      json.dumps(stats["columns"], default=str), stats["seconds"], stats["computed_at"]))
+    return stats
+
+def stats_frame(stats):
+    """Per-column stats as a DataFrame indexed by column name"""
+    return pd.DataFrame(stats["columns"]).set_index("name")
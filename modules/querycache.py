@@ -0,0 +1,110 @@
+"""
+Query Cache
+Process-wide LRU of query results keyed by database file, normalized SQL and parameters.
+Every entry records the database version it was read at: `PRAGMA schema_version` plus the
+`PRAGMA data_version` of a long-lived watcher connection, which changes whenever any other
+connection commits. A lookup at a newer version is a miss, so results never outlive a write.
+Cached rows and frames are shared: callers must not mutate them.
+"""
+__all__ = ["normalize_sql", "database_version", "cached_query", "cached_frame", "cache_info", "clear_cache"]
+
+import re
+import sqlite3
+import sys
+import threading
+from collections import OrderedDict
+
+from modules.loader import frame_from_rows
+
+MAX_ENTRIES = 512
+MAX_BYTES = 128 * 1024 * 1024
+
+_cache = OrderedDict()
+_watchers = {}
+_stats = {"hits": 0, "misses": 0, "invalidations": 0, "bytes": 0}
+_lock = threading.Lock()
+
+# String literals and quoted identifiers are kept verbatim; whitespace elsewhere is collapsed
+_QUOTED = re.compile(r"""('(?:[^']|'')*'|"(?:[^"]|"")*"|`[^`]*`|\[[^\]]*\])""")
+
+def normalize_sql(sql):
+    """`sql` with insignificant whitespace and trailing semicolons removed"""
+    parts = _QUOTED.split(sql.strip().rstrip(";").strip())
+    return "".join(part if i % 2 else re.sub(r"\s+", " ", part) for i, part in enumerate(parts))
+
+def _database_path(conn):
+    return next(row[2] for row in conn.execute("PRAGMA database_list") if row[1] == "main")
+
+def _watcher(path):
+    """Connection whose data_version moves on every commit made by the app's connections"""
+    if path not in _watchers:
+        _watchers[path] = sqlite3.connect(path, check_same_thread=False)
+    return _watchers[path]
+
+def database_version(conn):
+    """(data_version, schema_version) of the database behind `conn`, comparable across connections"""
+    path = _database_path(conn)
+    if not path:
+        return None  # in-memory or temporary database: private to `conn`
+    with _lock:
+        watcher = _watcher(path)
+        return (watcher.execute("PRAGMA data_version").fetchone()[0],
+                watcher.execute("PRAGMA schema_version").fetchone()[0])
+
+def _sizeof(columns, rows):
+    size = sys.getsizeof(rows) + sum(sys.getsizeof(c) for c in columns)
+    if rows:
+        # Estimate from the first row rather than walking every value
+        size += len(rows) * sum(sys.getsizeof(v) for v in rows[0])
+    return size
+
+def _lookup(kind, conn, sql, params, build):
+    # Uncommitted changes on `conn` are invisible to the watcher; read them directly
+    version = None if conn.in_transaction else database_version(conn)
+    if version is None:
+        cursor = conn.execute(sql, params)
+        return build([desc[0] for desc in cursor.description or ()], cursor.fetchall())
+    key = (kind, _database_path(conn), normalize_sql(sql), tuple(params))
+    with _lock:
+        entry = _cache.get(key)
+        if entry and entry[0] == version:
+            _cache.move_to_end(key)
+            _stats["hits"] += 1
+            return entry[1]
+        _stats["misses"] += 1
+        if entry:
+            _stats["invalidations"] += 1
+    cursor = conn.execute(sql, params)
+    columns = [desc[0] for desc in cursor.description or ()]
+    rows = cursor.fetchall()
+    value = build(columns, rows)
+    size = _sizeof(columns, rows)
+    with _lock:
+        old = _cache.pop(key, None)
+        if old:
+            _stats["bytes"] -= old[2]
+        if size <= MAX_BYTES:
+            _cache[key] = (version, value, size)
+            _stats["bytes"] += size
+        while _cache and (len(_cache) > MAX_ENTRIES or _stats["bytes"] > MAX_BYTES):
+            _, (_, _, evicted) = _cache.popitem(last=False)
+            _stats["bytes"] -= evicted
+    return value
+
+def cached_query(conn, sql, params=()):
+    """(columns, rows) of `sql`, from the cache when the database has not changed since"""
+    return _lookup("rows", conn, sql, params, lambda columns, rows: (columns, rows))
+
+def cached_frame(conn, sql, params=()):
+    """Typed DataFrame of `sql` (see loader.frame_from_rows), cached like cached_query"""
+    return _lookup("frame", conn, sql, params, lambda columns, rows: frame_from_rows(rows, columns))
+
+def cache_info():
+    """Hit/miss/invalidation counters, entries and approximate bytes held"""
+    with _lock:
+        return dict(_stats, entries=len(_cache), max_entries=MAX_ENTRIES, max_bytes=MAX_BYTES)
+
+def clear_cache():
+    with _lock:
+        _cache.clear()
+        _stats["bytes"] = 0
@@ -0,0 +1,179 @@
+"""
+Cleaning Recipes
+A recipe records the Cleaner's choices (row filters, datatype casts, cleaning steps, dropped
+and renamed columns) as JSON, versioned by name in `_ebi_recipes`, so it can be replayed on
+any table with the same columns. When every step has an exact SQL equivalent the recipe runs
+as a single CREATE TABLE AS SELECT; otherwise it falls back to the chunked pandas pipeline.
+"""
+__all__ = ["make_recipe", "save_recipe", "load_recipe", "list_recipes", "compile_recipe", "run_recipe"]
+
+import json
+import time
+from datetime import datetime
+
+from modules.ingest import quote_ident
+from modules.filters import compile_filters
+from modules.cleaning import BOOL_MAP, empty_table_columns, clean_table
+from modules.versions import bump_version
+
+RECIPES_TABLE = "_ebi_recipes"
+NUMERIC_AFFINITY = ("INT", "REAL", "FLOA", "DOUB", "NUM", "DEC")
+
+def make_recipe(source_table, steps, detected_types, filters=(), casts=None, drop_columns=(), renames=None,
+                datetime_formats=None):
+    """Plain-dict recipe; every field is JSON-serializable"""
+    return {
+        "source_table": source_table,
+        "filters": [dict(flt, value=str(flt["value"]) if hasattr(flt.get("value"), "isoformat") else flt.get("value"))
+                    for flt in filters],
+        "casts": dict(casts or {}),
+        "steps": dict(steps),
+        "detected_types": dict(detected_types),
+        "drop_columns": list(drop_columns),
+        "renames": dict(renames or {}),
+        "datetime_formats": dict(datetime_formats or {}),
+    }
+
+def _ensure_table(conn):
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {RECIPES_TABLE} (
+            name TEXT NOT NULL,
+            version INTEGER NOT NULL,
+            source_table TEXT NOT NULL,
+            recipe TEXT NOT NULL,
+            created_at TEXT NOT NULL,
+            PRIMARY KEY (name, version)
+        )
+    """)
+
+def save_recipe(conn, name, recipe):
+    """Store `recipe` as the next version of `name`; returns the new version number"""
+    _ensure_table(conn)
+    with conn:
+        version = conn.execute(f"SELECT COALESCE(MAX(version), 0) + 1 FROM {RECIPES_TABLE} WHERE name=?",
+                               (name,)).fetchone()[0]
+        conn.execute(f"INSERT INTO {RECIPES_TABLE} VALUES (?, ?, ?, ?, ?)",
+                     (name, version, recipe["source_table"], json.dumps(recipe),
+                      datetime.now().strftime("%Y-%m-%d %H:%M:%S")))
+    return version
+
+def load_recipe(conn, name, version=None):
+    """The recipe dict for `name` at `version` (latest when None), or None"""
+    _ensure_table(conn)
+    sql = f"SELECT recipe, version FROM {RECIPES_TABLE} WHERE name=?"
+    args = [name]
+    if version is not None:
+        sql += " AND version=?"
+        args.append(int(version))
+    row = conn.execute(sql + " ORDER BY version DESC LIMIT 1", args).fetchone()
+    if not row:
+        return None
+    return dict(json.loads(row[0]), name=name, version=row[1])
+
+def list_recipes(conn):
+    """[(name, latest version, source_table, created_at)] for every saved recipe"""
+    _ensure_table(conn)
+    return conn.execute(f"""
+        SELECT name, version, source_table, created_at FROM {RECIPES_TABLE} r
+        WHERE version = (SELECT MAX(version) FROM {RECIPES_TABLE} WHERE name = r.name)
+        ORDER BY name
+    """).fetchall()
+
+def _declared_types(conn, table):
+    return {row[1]: (row[2] or "").upper() for row in conn.execute(f"PRAGMA table_info({quote_ident(table)})")}
+
+def _is_numeric_affinity(declared):
+    return any(token in declared for token in NUMERIC_AFFINITY)
+
+def _bool_sql(col):
+    cases = " ".join(f"WHEN '{text}' THEN {int(flag)}" for text, flag in BOOL_MAP.items())
+    return f"CASE LOWER({col}) {cases} END"
+
+def compile_recipe(conn, recipe, target, source_table=None):
+    """
+    (sql, params, None) for a single CREATE TABLE AS SELECT that reproduces `recipe`, or
+    (None, None, reason) when a step has no exact SQL equivalent.
+    """
+    table = source_table or recipe["source_table"]
+    declared = _declared_types(conn, table)
+    steps = recipe["steps"]
+    detected = recipe["detected_types"] if steps.get("auto_convert_types") else {}
+
+    # Inner query: filters, casts and dedup act on the raw rows, as in the pandas pipeline
+    inner = []
+    for col in declared:
+        cast = recipe["casts"].get(col)
+        q = quote_ident(col)
+        if cast is None:
+            inner.append(q)
+        elif cast == "String":
+            inner.append(f"CAST({q} AS TEXT) AS {q}")
+        elif cast == "Boolean":
+            inner.append(f"{_bool_sql(q)} AS {q}")
+        elif cast == "Numeric" and _is_numeric_affinity(declared[col]):
+            inner.append(f"CASE WHEN typeof({q}) IN ('integer', 'real') THEN {q} END AS {q}")
+        else:
+            return None, None, f"the {cast} cast of '{col}' needs pandas"
+    where, params = compile_filters(recipe["filters"])
+    inner_sql = (f"SELECT {'DISTINCT ' if steps.get('drop_duplicates') else ''}{', '.join(inner)} "
+                 f"FROM {quote_ident(table)}" + (f" WHERE {where}" if where else ""))
+
+    # Empty columns go before the row steps (as in clean_table); dropped columns after them
+    empty = set(empty_table_columns(conn, table, recipe["filters"])) if steps.get("drop_empty_columns") else set()
+    dropped = empty | set(recipe["drop_columns"])
+    outer = []
+    conditions = []
+    for col in declared:
+        q = quote_ident(col)
+        if col in empty:
+            continue
+        if steps.get("drop_nulls"):
+            conditions.append(f"{q} IS NOT NULL" + (f" AND {q} <> ''" if steps.get("drop_blanks") else ""))
+        if col in dropped:
+            continue
+        expr = f"NULLIF({q}, '')" if steps.get("drop_blanks") and not steps.get("drop_nulls") else q
+        text_column = not _is_numeric_affinity(declared[col]) and recipe["casts"].get(col) not in ("Numeric", "Boolean")
+        if steps.get("normalize_case") and text_column:
+            return None, None, f"Title Case for '{col}' needs pandas"
+        kind = detected.get(col)
+        if kind == "Boolean":
+            expr = _bool_sql(expr)
+        elif kind == "Numeric" and _is_numeric_affinity(declared[col]):
+            expr = f"CASE WHEN typeof({expr}) IN ('integer', 'real') THEN {expr} END"
+        elif kind in ("Numeric", "Datetime"):
+            return None, None, f"{kind} conversion of '{col}' needs pandas"
+        outer.append(f"{expr} AS {quote_ident(recipe['renames'].get(col, col))}")
+    if not outer:
+        return None, None, "the recipe drops every column"
+
+    sql = f"CREATE TABLE {quote_ident(target)} AS SELECT {', '.join(outer)} FROM ({inner_sql})"
+    if conditions:
+        sql += " WHERE " + " AND ".join(conditions)
+    return sql, params, None
+
+def run_recipe(conn, recipe, source_table=None, target=None, progress=None):
+    """
+    Replay `recipe` on `source_table` (default: the table it was recorded on) into `target`
+    (default `<source>_cleaned`). Returns a dict with target, mode ("sql" or "pandas"),
+    rows_out, seconds and, for SQL, the statement; reason says why pandas was needed.
+    """
+    table = source_table or recipe["source_table"]
+    target = target or f"{table}_cleaned"
+    if target == table:
+        raise ValueError("The cleaned table must have a different name than the source table")
+    start = time.perf_counter()
+    sql, params, reason = compile_recipe(conn, recipe, target, table)
+    if sql:
+        with conn:
+            conn.execute(f"DROP TABLE IF EXISTS {quote_ident(target)}")
+            conn.execute(sql, params)
+        bump_version(conn, target)
+        rows = conn.execute(f"SELECT COUNT(*) FROM {quote_ident(target)}").fetchone()[0]
+        return {"target": target, "mode": "sql", "sql": sql, "rows_out": rows,
+                "seconds": time.perf_counter() - start}
+
+    result = clean_table(conn, table, recipe["steps"], recipe["detected_types"], target=target,
+                         filters=recipe["filters"], casts=recipe["casts"],
+                         drop_columns=recipe["drop_columns"], renames=recipe["renames"],
+                         datetime_formats=recipe.get("datetime_formats"), progress=progress)
+    return dict(result, mode="pandas", reason=reason)
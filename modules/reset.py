@@ -1,5 +1,6 @@
 import streamlit as st
 from utils import navigate_to
+from modules.datastore import drop_session
 
 def show():
     st.subheader("🔄 Reset Session")
@@ -11,6 +12,8 @@ def show():
             navigate_to("Analyst")
     with col_reset:
         if st.button("Reset All"):
+            if "dataset_session_id" in st.session_state:
+                drop_session(st.session_state["dataset_session_id"])
             for key in list(st.session_state.keys()):
                 del st.session_state[key]
             st.success("Session reset. Please reload or start from Welcome.")
@@ -0,0 +1,128 @@
+"""
+Sandboxed Code Runner
+Runs user Python for "Run Python to Generate CSV" in a separate worker process with
+CPU-time and address-space limits and a wall-clock timeout. The resulting `df` comes
+back as an Arrow IPC file that the server reads through a memory map.
+"""
+__all__ = ["run_user_code", "read_result", "discard_result"]
+
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+try:
+    import resource  # POSIX only; limits are skipped where it is unavailable
+except ImportError:
+    resource = None
+
+DEFAULT_TIMEOUT_SECONDS = 60
+DEFAULT_CPU_SECONDS = 60
+DEFAULT_MEMORY_MB = 2048
+
+def _limit_resources(cpu_seconds, memory_mb):
+    """Cap CPU time and address space; called by the worker itself, as preexec_fn is unsafe in a threaded server"""
+    if resource is None:
+        return
+    resource.setrlimit(resource.RLIMIT_CPU, (cpu_seconds, cpu_seconds))
+    memory_bytes = memory_mb * 1024 * 1024
+    resource.setrlimit(resource.RLIMIT_AS, (memory_bytes, memory_bytes))
+
+def run_user_code(code, timeout=DEFAULT_TIMEOUT_SECONDS, cpu_seconds=DEFAULT_CPU_SECONDS,
+                  memory_mb=DEFAULT_MEMORY_MB):
+    """
+    Execute `code` in a resource-limited worker process.
+    Returns a dict with arrow_path, rows, columns, seconds (execution time inside the worker),
+    wall_seconds and peak_rss_mb; release the result with discard_result() once replaced.
+    The worker directory is removed before raising. Raises RuntimeError if the code fails, is killed
+    for exceeding a limit, or does not define a DataFrame named `df`.
+    """
+    workdir = tempfile.mkdtemp(prefix="ebi_sandbox_")
+    try:
+        code_path = os.path.join(workdir, "user_code.py")
+        arrow_path = os.path.join(workdir, "df.arrow")
+        meta_path = os.path.join(workdir, "meta.json")
+        with open(code_path, "w") as f:
+            f.write(code)
+
+        env = dict(os.environ, OMP_NUM_THREADS="1", OPENBLAS_NUM_THREADS="1", MKL_NUM_THREADS="1")
+        start = time.perf_counter()
+        try:
+            proc = subprocess.run([sys.executable, os.path.abspath(__file__), code_path, arrow_path, meta_path,
+                                   str(int(cpu_seconds)), str(int(memory_mb))],
+                                  cwd=workdir, env=env,
+                                  capture_output=True, text=True, timeout=timeout)
+        except subprocess.TimeoutExpired:
+            raise RuntimeError(f"Code exceeded the {timeout}s time limit and was stopped")
+        wall_seconds = time.perf_counter() - start
+
+        meta = {}
+        if os.path.exists(meta_path):
+            with open(meta_path) as f:
+                meta = json.load(f)
+        if meta.get("error"):
+            raise RuntimeError(meta["error"])
+        if proc.returncode != 0:
+            reason = proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else f"exit code {proc.returncode}"
+            if proc.returncode < 0:
+                reason = f"worker was killed (signal {-proc.returncode}); CPU or memory limit exceeded"
+            raise RuntimeError(reason)
+    except BaseException:
+        shutil.rmtree(workdir, ignore_errors=True)
+        raise
+    return dict(meta, arrow_path=arrow_path, wall_seconds=wall_seconds)
+
+def read_result(arrow_path):
+    """Load the worker's DataFrame from its Arrow IPC file via a memory map"""
+    import pyarrow as pa
+
+    with pa.memory_map(arrow_path) as source:
+        return pa.ipc.open_file(source).read_all().to_pandas()
+
+def discard_result(arrow_path):
+    """Remove the worker directory holding a previous run's Arrow result"""
+    if arrow_path:
+        shutil.rmtree(os.path.dirname(arrow_path), ignore_errors=True)
+
+def _peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss if resource else 0
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+def _worker(code_path, arrow_path, meta_path, cpu_seconds, memory_mb):
+    """Entry point of the worker process; applies the limits before importing anything heavy"""
+    _limit_resources(int(cpu_seconds), int(memory_mb))
+    import traceback
+    import numpy as np
+    import pandas as pd
+    import pyarrow as pa
+
+    meta = {}
+    try:
+        with open(code_path) as f:
+            code = f.read()
+        namespace = {"pd": pd, "np": np}
+        start = time.perf_counter()
+        exec(compile(code, "<user code>", "exec"), namespace)
+        meta["seconds"] = time.perf_counter() - start
+        df = namespace.get("df")
+        if not isinstance(df, pd.DataFrame):
+            meta["error"] = "Your code must define a pandas DataFrame named `df`."
+        else:
+            df.columns = [str(col) for col in df.columns]
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            with pa.OSFile(arrow_path, "wb") as sink:
+                with pa.ipc.new_file(sink, table.schema) as writer:
+                    writer.write_table(table)
+            meta.update(rows=len(df), columns=len(df.columns))
+    except BaseException as e:
+        meta["error"] = "".join(traceback.format_exception_only(type(e), e)).strip()
+    meta["peak_rss_mb"] = _peak_rss_mb()
+    with open(meta_path, "w") as f:
+        json.dump(meta, f)
+
+if __name__ == "__main__":
+    _worker(*sys.argv[1:6])
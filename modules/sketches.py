@@ -0,0 +1,324 @@
+"""
+Column Sketches
+Approximate, mergeable per-column summaries built in one streaming pass over a table:
+HyperLogLog for distinct counts, t-digest for quantiles and a count-min sketch for top
+values, plus simple type counters. Sketches are stored in `_ebi_sketches`; when a table
+has only been appended to, just the new rows are scanned and merged in.
+"""
+__all__ = ["HyperLogLog", "TDigest", "CountMinSketch", "ColumnSketch",
+           "get_sketches", "sketch_frame"]
+
+import json
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from modules.ingest import quote_ident
+from modules.versions import version_parts
+
+SKETCHES_TABLE = "_ebi_sketches"
+BATCH_ROWS = 100000
+BOOL_VALUES = {'true', 'false', 'yes', 'no', 't', 'f', 'y', 'n', '1', '0'}
+DATE_PATTERN = r"^\s*(\d{4}[-/]\d{1,2}[-/]\d{1,2}|\d{1,2}[-/]\d{1,2}[-/]\d{2,4})"
+
+_MASK64 = np.uint64(0xFFFFFFFFFFFFFFFF)
+
+def hash_values(series):
+    """64-bit hashes of the non-null values; numbers hash by value so 1 and 1.0 agree"""
+    values = series.dropna()
+    if pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(values):
+        return pd.util.hash_array(values.to_numpy(dtype="float64"))
+    return pd.util.hash_array(values.astype(str).to_numpy(dtype=object))
+
+class HyperLogLog:
+    """Distinct-count sketch with 2**p registers (relative error about 1.04 / sqrt(2**p))"""
+
+    def __init__(self, p=14, registers=None):
+        self.p = p
+        self.registers = np.zeros(1 << p, dtype=np.uint8) if registers is None else registers
+
+    def add_hashes(self, hashes):
+        if len(hashes) == 0:
+            return
+        p = np.uint64(self.p)
+        index = (hashes >> (np.uint64(64) - p)).astype(np.int64)
+        rest = (hashes << p) & _MASK64
+        # rank = position of the first 1-bit in the remaining 64-p bits
+        _, exponent = np.frexp(rest.astype(np.float64))
+        rank = np.where(rest == 0, 64 - self.p + 1, 64 - exponent + 1).astype(np.uint8)
+        np.maximum.at(self.registers, index, rank)
+
+    def merge(self, other):
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def estimate(self):
+        m = float(len(self.registers))
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / np.sum(np.exp2(-self.registers.astype(np.float64)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if raw <= 2.5 * m and zeros:
+            return m * np.log(m / zeros)  # linear counting for small cardinalities
+        return raw
+
+    def to_bytes(self):
+        return self.registers.tobytes()
+
+    @classmethod
+    def from_bytes(cls, data):
+        registers = np.frombuffer(data, dtype=np.uint8).copy()
+        return cls(p=int(np.log2(len(registers))), registers=registers)
+
+class TDigest:
+    """Quantile sketch of at most about `delta` weighted centroids, accurate at the tails"""
+
+    def __init__(self, delta=200, means=None, weights=None, low=np.inf, high=-np.inf):
+        self.delta = delta
+        self.means = np.empty(0) if means is None else means
+        self.weights = np.empty(0) if weights is None else weights
+        self.low = low
+        self.high = high
+
+    def _compress(self, means, weights):
+        order = np.argsort(means, kind="stable")
+        means, weights = means[order], weights[order]
+        total = weights.sum()
+        cumulative = np.cumsum(weights)
+        q = (cumulative - weights / 2) / total
+        # k1 scale function: clusters are narrow near q=0 and q=1
+        k = np.floor(self.delta / (2 * np.pi) * np.arcsin(2 * q - 1))
+        starts = np.flatnonzero(np.r_[True, k[1:] != k[:-1]])
+        new_weights = np.add.reduceat(weights, starts)
+        self.means = np.add.reduceat(means * weights, starts) / new_weights
+        self.weights = new_weights
+
+    def add(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        values = values[np.isfinite(values)]
+        if len(values) == 0:
+            return
+        self.low = min(self.low, values.min())
+        self.high = max(self.high, values.max())
+        self._compress(np.r_[self.means, values], np.r_[self.weights, np.ones(len(values))])
+
+    def merge(self, other):
+        if len(other.weights) == 0:
+            return
+        self.low = min(self.low, other.low)
+        self.high = max(self.high, other.high)
+        self._compress(np.r_[self.means, other.means], np.r_[self.weights, other.weights])
+
+    def count(self):
+        return float(self.weights.sum())
+
+    def quantile(self, q):
+        if len(self.weights) == 0:
+            return None
+        cumulative = np.cumsum(self.weights) - self.weights / 2
+        points = np.r_[0.0, cumulative, self.count()]
+        means = np.r_[self.low, self.means, self.high]
+        return float(np.interp(q * self.count(), points, means))
+
+    def to_bytes(self):
+        header = np.array([self.delta, self.low, self.high], dtype=np.float64)
+        return np.r_[header, self.means, self.weights].astype(np.float64).tobytes()
+
+    @classmethod
+    def from_bytes(cls, data):
+        values = np.frombuffer(data, dtype=np.float64)
+        n = (len(values) - 3) // 2
+        return cls(delta=int(values[0]), means=values[3:3 + n].copy(), weights=values[3 + n:].copy(),
+                   low=values[1], high=values[2])
+
+class CountMinSketch:
+    """Frequency sketch (never underestimates) with a small candidate list for the top values"""
+
+    _SEEDS = np.array([0x9E3779B97F4A7C15, 0xC2B2AE3D27D4EB4F, 0x165667B19E3779F9,
+                       0xD6E8FEB86659FD93, 0xFF51AFD7ED558CCD], dtype=np.uint64)
+
+    def __init__(self, width=2048, depth=4, top_k=10, table=None, top=None):
+        self.width = width
+        self.depth = depth
+        self.top_k = top_k
+        self.table = np.zeros((depth, width), dtype=np.int64) if table is None else table
+        self.top = {} if top is None else top
+
+    def _columns(self, hashes):
+        mixed = (hashes[None, :] ^ self._SEEDS[:self.depth, None]) * np.uint64(0xBF58476D1CE4E5B9)
+        return ((mixed >> np.uint64(29)) % np.uint64(self.width)).astype(np.int64)
+
+    def estimate_hashes(self, hashes):
+        columns = self._columns(np.asarray(hashes, dtype=np.uint64))
+        return self.table[np.arange(self.depth)[:, None], columns].min(axis=0)
+
+    def add(self, series):
+        counts = series.dropna().astype(str).value_counts()
+        if counts.empty:
+            return
+        hashes = pd.util.hash_array(counts.index.to_numpy(dtype=object))
+        columns = self._columns(hashes)
+        for row in range(self.depth):
+            np.add.at(self.table[row], columns[row], counts.to_numpy())
+        candidates = set(self.top) | set(counts.index[:self.top_k * 2])
+        self._refresh_top(candidates)
+
+    def merge(self, other):
+        self.table += other.table
+        self._refresh_top(set(self.top) | set(other.top))
+
+    def _refresh_top(self, candidates):
+        candidates = list(candidates)
+        estimates = self.estimate_hashes(pd.util.hash_array(np.array(candidates, dtype=object)))
+        ranked = sorted(zip(candidates, estimates.tolist()), key=lambda item: -item[1])
+        self.top = dict(ranked[:self.top_k])
+
+    def top_values(self, n=3):
+        """Up to `n` (value, estimate) pairs that stand out from the collision noise"""
+        noise = self.table[0].sum() / self.width
+        return [(value, count) for value, count in self.top.items() if count > 2 * noise][:n]
+
+    def to_bytes(self):
+        return self.table.tobytes()
+
+    @classmethod
+    def from_bytes(cls, data, top):
+        table = np.frombuffer(data, dtype=np.int64).copy().reshape(4, -1)
+        return cls(width=table.shape[1], depth=4, table=table, top=top)
+
+class ColumnSketch:
+    """All sketches and type counters for one column"""
+
+    def __init__(self, counts=None, hll=None, digest=None, cms=None):
+        self.counts = counts or {"rows": 0, "non_null": 0, "numeric": 0, "boolean": 0, "datetime": 0}
+        self.hll = hll or HyperLogLog()
+        self.digest = digest or TDigest()
+        self.cms = cms or CountMinSketch()
+
+    def add(self, series):
+        values = series.dropna()
+        text = values.astype(str)
+        numbers = pd.to_numeric(values, errors="coerce")
+        self.counts["rows"] += len(series)
+        self.counts["non_null"] += len(values)
+        self.counts["numeric"] += int(numbers.notna().sum())
+        self.counts["boolean"] += int(text.str.lower().isin(BOOL_VALUES).sum())
+        self.counts["datetime"] += int(text.str.match(DATE_PATTERN).sum())
+        self.hll.add_hashes(hash_values(values))
+        self.digest.add(numbers.dropna().to_numpy(dtype=np.float64))
+        self.cms.add(text)
+
+    def merge(self, other):
+        for name, value in other.counts.items():
+            self.counts[name] += value
+        self.hll.merge(other.hll)
+        self.digest.merge(other.digest)
+        self.cms.merge(other.cms)
+
+    def percent(self, name):
+        """Share of all rows (NULLs included) counted as `name`, 0-100"""
+        return 100.0 * self.counts[name] / self.counts["rows"] if self.counts["rows"] else 0.0
+
+def _ensure_table(conn):
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {SKETCHES_TABLE} (
+            table_name TEXT NOT NULL,
+            column_name TEXT NOT NULL,
+            base TEXT NOT NULL,
+            high TEXT,
+            counts TEXT NOT NULL,
+            hll BLOB NOT NULL,
+            digest BLOB NOT NULL,
+            cms BLOB NOT NULL,
+            top TEXT NOT NULL,
+            updated_at TEXT NOT NULL,
+            PRIMARY KEY (table_name, column_name)
+        )
+    """)
+
+def _load(conn, table):
+    rows = conn.execute(f"SELECT column_name, base, high, counts, hll, digest, cms, top FROM {SKETCHES_TABLE} "
+                        f"WHERE table_name=?", (table,)).fetchall()
+    if not rows:
+        return None, None, {}
+    sketches = {}
+    for column, _, _, counts, hll, digest, cms, top in rows:
+        sketches[column] = ColumnSketch(json.loads(counts), HyperLogLog.from_bytes(hll),
+                                        TDigest.from_bytes(digest), CountMinSketch.from_bytes(cms, json.loads(top)))
+    return rows[0][1], rows[0][2], sketches
+
+def _save(conn, table, base, high, sketches):
+    now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    with conn:
+        conn.execute(f"DELETE FROM {SKETCHES_TABLE} WHERE table_name=?", (table,))
+        conn.executemany(f"INSERT INTO {SKETCHES_TABLE} VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                         [(table, column, base, None if high is None else str(high), json.dumps(sketch.counts),
+                           sketch.hll.to_bytes(), sketch.digest.to_bytes(), sketch.cms.to_bytes(),
+                           json.dumps(sketch.cms.top), now)
+                          for column, sketch in sketches.items()])
+
+def _scan(conn, table, columns, after=None, batch_rows=BATCH_ROWS, progress=None):
+    """Sketch the rows of `table` (only rowid > `after` when given) in one streaming pass"""
+    sketches = {column: ColumnSketch() for column in columns}
+    sql = f"SELECT {', '.join(quote_ident(c) for c in columns)} FROM {quote_ident(table)}"
+    args = ()
+    if after is not None:
+        sql += " WHERE rowid > ?"
+        args = (after,)
+    cursor = conn.execute(sql, args)
+    rows_done = 0
+    while True:
+        batch = cursor.fetchmany(batch_rows)
+        if not batch:
+            break
+        frame = pd.DataFrame(batch, columns=columns)
+        for column in columns:
+            sketches[column].add(frame[column])
+        rows_done += len(batch)
+        if progress:
+            progress(rows_done)
+    return sketches
+
+def get_sketches(conn, table, build=True, progress=None):
+    """
+    Up-to-date sketches for `table` as {column: ColumnSketch}.
+    Appended rows are merged into the stored sketches; any other change rebuilds them.
+    With build=False nothing is scanned: the stored sketches are returned only while they are
+    current, and None when the table was never sketched or has changed since.
+    """
+    _ensure_table(conn)
+    counter, high, schema_crc = version_parts(conn, table)
+    base = f"{counter}.{schema_crc:08x}"
+    stored_base, stored_high, sketches = _load(conn, table)
+    if stored_base == base and str(high) == str(stored_high):
+        return sketches
+    if not build:
+        return None
+
+    columns = [row[1] for row in conn.execute(f"PRAGMA table_info({quote_ident(table)})")]
+    appendable = isinstance(high, int) and stored_high is not None and stored_high.lstrip("-").isdigit()
+    if stored_base == base and appendable and int(stored_high) < high and set(sketches) == set(columns):
+        for column, sketch in _scan(conn, table, columns, after=int(stored_high), progress=progress).items():
+            sketches[column].merge(sketch)
+    else:
+        sketches = _scan(conn, table, columns, progress=progress)
+    _save(conn, table, base, high, sketches)
+    return sketches
+
+def sketch_frame(sketches):
+    """Summary of approximate stats per column"""
+    records = []
+    for column, sketch in sketches.items():
+        digest = sketch.digest
+        numeric = digest.count() > 0
+        top = ", ".join(f"{value} (~{count:,})" for value, count in sketch.cms.top_values())
+        records.append({
+            "column": column,
+            "rows": sketch.counts["rows"],
+            "nulls": sketch.counts["rows"] - sketch.counts["non_null"],
+            "~distinct": int(round(sketch.hll.estimate())),
+            "~p05": digest.quantile(0.05) if numeric else None,
+            "~median": digest.quantile(0.5) if numeric else None,
+            "~p95": digest.quantile(0.95) if numeric else None,
+            "top values": top,
+        })
+    return pd.DataFrame(records).set_index("column")
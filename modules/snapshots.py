@@ -0,0 +1,73 @@
+"""
+Snapshot Store
+Content-addressed, compressed copies of DataFrames saved to My Projects.
+A snapshot is keyed by a hash of the frame's content, so reruns that see the same
+data skip the write entirely. Metadata lives in the `_ebi_snapshots` table.
+"""
+__all__ = ["frame_digest", "save_snapshot"]
+
+import hashlib
+import os
+from datetime import datetime
+
+import pandas as pd
+
+SNAPSHOTS_TABLE = "_ebi_snapshots"
+SNAPSHOT_DIR = os.path.join("my_projects", "files")
+
+def frame_digest(df):
+    """SHA-256 of a DataFrame's columns, dtypes and values"""
+    h = hashlib.sha256()
+    h.update("\x1f".join(f"{col}:{dtype}" for col, dtype in df.dtypes.items()).encode())
+    try:
+        h.update(pd.util.hash_pandas_object(df, index=False).values.tobytes())
+    except TypeError:
+        # Unhashable cell values (lists, dicts); fall back to the serialized form
+        h.update(df.to_csv(index=False).encode())
+    return h.hexdigest()
+
+def _ensure_table(conn):
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {SNAPSHOTS_TABLE} (
+            digest TEXT NOT NULL,
+            fmt TEXT NOT NULL,
+            kind TEXT NOT NULL,
+            source_table TEXT,
+            path TEXT NOT NULL,
+            rows INTEGER NOT NULL,
+            columns INTEGER NOT NULL,
+            bytes INTEGER NOT NULL,
+            created_at TEXT NOT NULL,
+            PRIMARY KEY (digest, fmt)
+        )
+    """)
+
+def _write(df, path, fmt):
+    tmp_path = path + ".tmp"
+    if fmt == "json":
+        df.to_json(tmp_path, orient="records", compression="gzip")
+    else:
+        df.to_csv(tmp_path, index=False, compression="gzip")
+    os.replace(tmp_path, path)
+
+def save_snapshot(conn, df, table, kind, formats=("csv",)):
+    """
+    Store gzip-compressed `formats` ("csv", "json") of `df` unless identical content is already stored.
+    Returns (digest, paths written); the list is empty when nothing changed.
+    """
+    digest = frame_digest(df)
+    _ensure_table(conn)
+    known = dict(conn.execute(f"SELECT fmt, path FROM {SNAPSHOTS_TABLE} WHERE digest=?", (digest,)).fetchall())
+    written = []
+    for fmt in formats:
+        if fmt in known and os.path.exists(known[fmt]):
+            continue
+        os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+        path = os.path.join(SNAPSHOT_DIR, f"{table}_{kind}_{digest[:12]}.{fmt}.gz")
+        _write(df, path, fmt)
+        conn.execute(f"INSERT OR REPLACE INTO {SNAPSHOTS_TABLE} VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                     (digest, fmt, kind, table, path, len(df), len(df.columns), os.path.getsize(path),
+                      datetime.now().strftime("%Y-%m-%d %H:%M:%S")))
+        written.append(path)
+    conn.commit()
+    return digest, written
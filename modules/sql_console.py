@@ -0,0 +1,178 @@
+"""
+SQL Console
+Runs ad-hoc read-only queries on a worker thread with its own read-only connection to the
+app's database. Rows stream back in fetchmany pages while the page shows progress; a
+progress handler stops the query when its time budget runs out or the user cancels it.
+Each result comes with its EXPLAIN QUERY PLAN and execution/fetch timings.
+"""
+__all__ = ["database_path", "run_query", "cancel", "show"]
+
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote
+
+import streamlit as st
+
+from utils import navigate_to
+from modules.filters import explain_plan
+from modules.loader import frame_from_rows
+from modules.datastore import session_id
+
+PAGE_ROWS = 500
+MAX_ROWS = 10000
+TIME_BUDGET_SECONDS = 30
+PROGRESS_OPCODES = 1000
+POLL_SECONDS = 0.1
+
+# Module-level state survives Streamlit reruns; one executor serves every session
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="ebi-sql")
+_cancel_events = {}
+_lock = threading.Lock()
+
+def database_path(conn):
+    """File behind the `main` database of `conn`"""
+    return next(row[2] for row in conn.execute("PRAGMA database_list") if row[1] == "main")
+
+def run_query(path, sql, state, cancel_event, page_rows=PAGE_ROWS, max_rows=MAX_ROWS,
+              budget_seconds=TIME_BUDGET_SECONDS):
+    """
+    Execute `sql` on a read-only connection to `path`, appending rows to state["rows"] one
+    fetchmany page at a time (at most `max_rows`). Fills columns, execute_seconds,
+    fetch_seconds, truncated and error in `state`, and sets state["done"] when finished.
+    """
+    conn = sqlite3.connect(f"file:{quote(path)}?mode=ro", uri=True, timeout=30)
+    deadline = time.perf_counter() + budget_seconds
+    # A non-zero return interrupts the statement with OperationalError("interrupted")
+    conn.set_progress_handler(lambda: int(cancel_event.is_set() or time.perf_counter() > deadline),
+                              PROGRESS_OPCODES)
+    start = time.perf_counter()
+    try:
+        cursor = conn.execute(sql)
+        state["columns"] = [desc[0] for desc in cursor.description] if cursor.description else []
+        state["execute_seconds"] = time.perf_counter() - start
+        while cursor.description:
+            rows = cursor.fetchmany(min(page_rows, max_rows - len(state["rows"]) + 1))
+            if not rows:
+                break
+            state["rows"].extend(rows)
+            if len(state["rows"]) > max_rows:
+                del state["rows"][max_rows:]
+                state["truncated"] = True
+                break
+    except sqlite3.OperationalError as e:
+        if str(e) == "interrupted":
+            state["error"] = ("Query cancelled" if cancel_event.is_set()
+                              else f"Query stopped after its {budget_seconds}s time budget")
+        else:
+            state["error"] = str(e)
+    except Exception as e:
+        state["error"] = str(e)
+    finally:
+        conn.close()
+        state["fetch_seconds"] = time.perf_counter() - start - state.get("execute_seconds", 0.0)
+        state["done"] = True
+    return state
+
+def cancel(session):
+    """Interrupt the query `session` is running, if any"""
+    with _lock:
+        event = _cancel_events.get(session)
+    if event:
+        event.set()
+    return event is not None
+
+def _submit(path, session, sql, page_rows, max_rows, budget_seconds):
+    """Start `sql` for `session` (cancelling its previous query) and return the shared result state"""
+    state = {"sql": sql, "rows": [], "columns": [], "truncated": False, "error": None, "done": False,
+             "max_rows": max_rows}
+    event = threading.Event()
+    with _lock:
+        previous = _cancel_events.get(session)
+        if previous:
+            previous.set()
+        _cancel_events[session] = event
+
+    def work():
+        try:
+            run_query(path, sql, state, event, page_rows, max_rows, budget_seconds)
+        finally:
+            with _lock:
+                if _cancel_events.get(session) is event:
+                    del _cancel_events[session]
+
+    _executor.submit(work)
+    return state
+
+def show(conn):
+    st.subheader("🧮 SQL Console")
+    st.markdown("<span style='color:black'>Run read-only SQL against the database. Results stream in pages; long queries stop at the time budget or when cancelled.</span>", unsafe_allow_html=True)
+
+    sql = st.text_area("SQL", value="SELECT name, type FROM sqlite_master ORDER BY name", height=160, key="sql_console_sql")
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        page_rows = st.number_input("Rows per fetch", min_value=10, max_value=10000, value=PAGE_ROWS, step=100, key="sql_console_page_rows")
+    with col2:
+        max_rows = st.number_input("Max rows", min_value=100, max_value=1000000, value=MAX_ROWS, step=1000, key="sql_console_max_rows")
+    with col3:
+        budget_seconds = st.number_input("Time budget (s)", min_value=1, max_value=600, value=TIME_BUDGET_SECONDS, step=5, key="sql_console_budget")
+
+    session = session_id(st.session_state)
+    col_run, col_cancel = st.columns([1, 1], gap="small")
+    with col_run:
+        run_clicked = st.button("▶ Run Query", key="sql_console_run")
+    with col_cancel:
+        if st.button("⏹ Cancel", key="sql_console_cancel"):
+            if cancel(session):
+                st.info("Cancelling the running query...")
+
+    if run_clicked and sql.strip():
+        result = _submit(database_path(conn), session, sql.strip().rstrip(";"), int(page_rows), int(max_rows), int(budget_seconds))
+        try:
+            result["plan"] = explain_plan(conn, result["sql"])
+        except Exception as e:
+            result["plan_error"] = str(e)
+        st.session_state["sql_console_result"] = result
+
+    result = st.session_state.get("sql_console_result")
+    if not result:
+        return
+
+    # Rows arrive page by page and the partial result is redrawn whenever a page lands;
+    # a rerun (e.g. Cancel) leaves this loop and the worker keeps filling `result`
+    start = time.perf_counter()
+    status = st.empty()
+    partial = st.empty()
+    shown = 0
+    while not result["done"]:
+        fetched = min(len(result["rows"]), result["max_rows"])
+        status.caption(f"Running... {fetched:,} rows fetched · {time.perf_counter() - start:.1f}s")
+        if result["columns"] and fetched > shown:
+            partial.dataframe(frame_from_rows(result["rows"][:fetched], result["columns"]))
+            shown = fetched
+        time.sleep(POLL_SECONDS)
+    status.empty()
+    partial.empty()
+
+    if result["error"]:
+        st.error(f"SQL error: {result['error']}")
+    if result["columns"]:
+        if "frame" not in result:
+            result["frame"] = frame_from_rows(result["rows"], result["columns"])
+        df = result["frame"]
+        note = f" (first {result['max_rows']:,} rows)" if result["truncated"] else ""
+        st.caption(f"{len(df):,} rows{note} · executed in {result['execute_seconds'] * 1000:.1f} ms · "
+                   f"fetched in {result['fetch_seconds'] * 1000:.1f} ms")
+        st.dataframe(df)
+        st.download_button("📥 Export Result CSV", df.to_csv(index=False), "query_result.csv", "text/csv", key="sql_console_download")
+    elif not result["error"]:
+        st.success(f"Query finished in {result.get('execute_seconds', 0) * 1000:.1f} ms (no rows returned)")
+    with st.expander("🧭 Query Plan", expanded=False):
+        if "plan" in result:
+            st.dataframe(result["plan"])
+        else:
+            st.markdown(f"<span style='color:black'>No plan: {result.get('plan_error')}</span>", unsafe_allow_html=True)
+
+    if st.button("← Back", key="sql_console_back"):
+        navigate_to("Cleaner & Query")
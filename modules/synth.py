@@ -0,0 +1,347 @@
+"""
+Synthetic Data Engine
+Vectorized generators behind Generate Data, including synthetic clones of existing
+tables from their statistical profile. Kept free of Streamlit so worker processes
+can import it for multi-core sharded generation.
+"""
+__all__ = ["SQL_TYPES", "infer_type_from_name", "value_pool", "generate_data",
+           "shard_seeds", "seeded_pools", "generate_shard", "generate_sharded",
+           "profile_table", "generate_from_profile", "clone_table"]
+
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+import multiprocessing
+
+import numpy as np
+import pandas as pd
+from faker import Faker
+
+from modules.ingest import quote_ident, insert_chunks
+
+fake = Faker()
+
+SUBJECTS = ["Math", "English", "Science", "History", "Art", "Music", "Geography", "Physics", "Chemistry", "Biology"]
+CATEGORIES = ["A", "B", "C", "D"]
+
+# Text types are drawn from pools of Faker values instead of calling Faker once per row
+POOL_SIZE = 5000
+# Generated dates end here rather than today, so a seed gives the same rows on any day and machine
+DATE_ANCHOR = date(2025, 1, 1)
+FAKER_POOLS = {
+    "Name": lambda f: f.name(),
+    "Email": lambda f: f.email(),
+    "Phone": lambda f: f.phone_number(),
+    "Address": lambda f: f.address().replace('\n', ', '),
+    "Text": lambda f: f.sentence(nb_words=8),
+}
+_pools = {}
+
+# SQLite column type for each generator type
+SQL_TYPES = {
+    "ID": "INTEGER",
+    "Name": "TEXT",
+    "Email": "TEXT",
+    "Phone": "TEXT",
+    "Address": "TEXT",
+    "Date": "TEXT",
+    "Subject": "TEXT",
+    "Integer": "INTEGER",
+    "Float": "REAL",
+    "Category": "TEXT",
+    "Boolean": "INTEGER",
+    "Text": "TEXT"
+}
+
+def infer_type_from_name(col_name):
+    """Guess a generator type from a column name, or None"""
+    name = col_name.lower()
+    if "name" in name:
+        return "Name"
+    elif "email" in name:
+        return "Email"
+    elif "phone" in name or "mobile" in name or "contact" in name:
+        return "Phone"
+    elif "address" in name or "location" in name:
+        return "Address"
+    elif "date" in name or "dob" in name or "birth" in name:
+        return "Date"
+    elif "id" in name:
+        return "ID"
+    elif "subject" in name:
+        return "Subject"
+    elif "price" in name or "amount" in name or "score" in name or "value" in name:
+        return "Float"
+    elif "category" in name or "type" in name or "group" in name:
+        return "Category"
+    elif "flag" in name or "is_" in name or "active" in name or "status" in name:
+        return "Boolean"
+    elif "desc" in name or "note" in name or "comment" in name or "text" in name:
+        return "Text"
+    else:
+        return None
+
+def resolve_type(col_name, col_type):
+    """Type actually generated for a column: a name-based guess wins over the chosen type"""
+    return infer_type_from_name(col_name) or col_type
+
+def value_pool(use_type, faker=None, size=POOL_SIZE):
+    """Array of pre-built Faker values for a text generator type; cached per process for the shared Faker"""
+    if faker is None:
+        if use_type not in _pools:
+            _pools[use_type] = value_pool(use_type, fake, size)
+        return _pools[use_type]
+    make = FAKER_POOLS[use_type]
+    pool = np.empty(size, dtype=object)
+    pool[:] = [make(faker) for _ in range(size)]
+    return pool
+
+def random_dates(rng, num_rows, years=5, anchor=DATE_ANCHOR):
+    """ISO dates drawn uniformly from the `years` years up to `anchor` as vectorized day offsets"""
+    end = np.datetime64(anchor, "D")
+    start = end - np.timedelta64(int(years * 365.25), "D")
+    offsets = rng.integers(0, (end - start).astype(int) + 1, num_rows)
+    return np.datetime_as_string(start + offsets, unit="D").astype(object)
+
+def generate_data(col_defs, num_rows, id_start=1, rng=None, pools=None):
+    """
+    Build a DataFrame of `num_rows` synthetic rows for [(column, type), ...].
+    Text columns sample from Faker value pools by index, so no Faker call is made per row.
+    """
+    rng = rng if rng is not None else np.random.default_rng()
+    pools = pools if pools is not None else {}
+    data = {}
+    for col_name, col_type in col_defs:
+        use_type = resolve_type(col_name, col_type)
+        if use_type == "ID":
+            data[col_name] = np.arange(id_start, id_start + num_rows)
+        elif use_type in FAKER_POOLS:
+            pool = pools.get(use_type)
+            if pool is None:
+                pool = value_pool(use_type)
+            data[col_name] = pool[rng.integers(0, len(pool), num_rows)]
+        elif use_type == "Date":
+            data[col_name] = random_dates(rng, num_rows)
+        elif use_type == "Subject":
+            data[col_name] = rng.choice(SUBJECTS, num_rows)
+        elif use_type == "Integer":
+            data[col_name] = rng.integers(0, 100, num_rows)
+        elif use_type == "Float":
+            data[col_name] = np.round(rng.uniform(0, 100, num_rows), 2)
+        elif use_type == "Category":
+            data[col_name] = rng.choice(CATEGORIES, num_rows)
+        elif use_type == "Boolean":
+            data[col_name] = rng.integers(0, 2, num_rows)
+        else:
+            data[col_name] = np.full(num_rows, None, dtype=object)
+    return pd.DataFrame(data)
+
+# Rows per shard; fixed so a seed gives the same data whatever the core count
+SHARD_ROWS = 250000
+
+def shard_seeds(seed, n_shards):
+    """Independent, reproducible per-shard seeds derived from one base seed"""
+    return [int(child.generate_state(1)[0]) for child in np.random.SeedSequence(seed).spawn(n_shards)]
+
+def seeded_pools(col_defs, seed, size=POOL_SIZE):
+    """Faker value pools for the text types of `col_defs`, reproducible from `seed`"""
+    faker = Faker()
+    faker.seed_instance(seed)
+    # Sorted: set order depends on the per-process hash seed
+    types = sorted({resolve_type(col_name, col_type) for col_name, col_type in col_defs})
+    return {t: value_pool(t, faker, size) for t in types if t in FAKER_POOLS}
+
+def generate_shard(col_defs, num_rows, id_start, seed):
+    """Generate one shard with its own seeded Faker pools and NumPy generator"""
+    pools = seeded_pools(col_defs, seed, min(POOL_SIZE, num_rows))
+    return generate_data(col_defs, num_rows, id_start, rng=np.random.default_rng(seed), pools=pools)
+
+def _worker_context():
+    """
+    Start method for the shard workers. Forking the threaded Streamlit server can deadlock
+    on locks other threads hold, so workers come from a single-threaded forkserver (with
+    this module preloaded) or are spawned; app.py guards its page behind __main__ so the
+    workers' re-import of it only runs imports.
+    """
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context("forkserver")
+        context.set_forkserver_preload(["modules.synth"])
+        return context
+    return multiprocessing.get_context("spawn")
+
+def generate_sharded(conn, table, col_defs, col_types, num_rows, seed, workers=None,
+                     shard_rows=SHARD_ROWS, progress=None):
+    """
+    Generate `num_rows` rows across a process pool and stream each shard into `table`.
+    Shards are written in order by this single writer, and at most two per worker are
+    in flight, so the full DataFrame is never held in memory.
+    `progress(rows_done, num_rows)` is called after each shard when given.
+    Returns the insert_chunks result dict.
+    """
+    workers = workers or os.cpu_count() or 1
+    shards = [(offset, min(shard_rows, num_rows - offset)) for offset in range(0, num_rows, shard_rows)]
+    seeds = shard_seeds(seed, len(shards))
+
+    def frames():
+        with ProcessPoolExecutor(max_workers=workers, mp_context=_worker_context()) as pool:
+            pending = deque()
+            for (offset, n), shard_seed in zip(shards, seeds):
+                pending.append(pool.submit(generate_shard, col_defs, n, offset + 1, shard_seed))
+                if len(pending) >= 2 * workers:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+
+    return insert_chunks(conn, table, frames(), col_types,
+                         progress=(lambda done: progress(done, num_rows)) if progress else None)
+
+# --- Synthetic clone of an existing table ---
+
+PROFILE_TOP_K = 20
+PROFILE_SAMPLE_ROWS = 20000
+PROFILE_QUANTILES = 101
+CLONE_CHUNK_ROWS = 50000
+ISO_DATE_PATTERN = r"^\d{4}-\d{2}-\d{2}"
+
+def profile_table(conn, table, top_k=PROFILE_TOP_K, sample_rows=PROFILE_SAMPLE_ROWS):
+    """
+    Statistical profile of `table`: per-column null rate, cardinality, min/max,
+    top-k values with frequencies and empirical quantiles of numeric and date columns.
+    Counts come from one aggregate scan; quantiles from an evenly spaced rowid sample.
+    """
+    cursor = conn.cursor()
+    cursor.execute(f"PRAGMA table_info({quote_ident(table)})")
+    schema = [(row[1], row[2] or "") for row in cursor.fetchall()]
+    aggregates = []
+    for name, _ in schema:
+        col = quote_ident(name)
+        aggregates += [f"COUNT({col})", f"COUNT(DISTINCT {col})", f"MIN({col})", f"MAX({col})",
+                       f"SUM(typeof({col}) IN ('integer', 'real'))", f"SUM(typeof({col}) = 'integer')"]
+    cursor.execute(f"SELECT COUNT(*), {', '.join(aggregates)} FROM {quote_ident(table)}")
+    stats = cursor.fetchone()
+    rows = stats[0]
+
+    step = max(1, rows // sample_rows)
+    cursor.execute(f"SELECT * FROM {quote_ident(table)} WHERE rowid % {step} = 0 LIMIT {sample_rows}")
+    sample = pd.DataFrame(cursor.fetchall(), columns=[desc[0] for desc in cursor.description])
+
+    columns = []
+    for i, (name, decl_type) in enumerate(schema):
+        non_null, distinct, min_val, max_val, numeric, integer = stats[1 + 6 * i: 7 + 6 * i]
+        numeric, integer = numeric or 0, integer or 0
+        col = {"name": name, "decl_type": decl_type, "null_rate": 1 - non_null / rows if rows else 0.0,
+               "distinct": distinct, "unique": non_null > 0 and distinct == non_null,
+               "min": min_val, "max": max_val, "top_values": [], "top_freqs": [], "quantiles": []}
+        values = sample[name].dropna()
+        if non_null and numeric >= 0.95 * non_null:
+            col["kind"] = "integer" if integer == numeric else "real"
+            numbers = pd.to_numeric(values, errors="coerce").dropna()
+            if len(numbers):
+                col["quantiles"] = np.quantile(numbers, np.linspace(0, 1, PROFILE_QUANTILES)).tolist()
+        elif len(values) and values.astype(str).str.match(ISO_DATE_PATTERN).mean() >= 0.95:
+            col["kind"] = "date"
+            days = pd.to_datetime(values.astype(str).str[:10], format="%Y-%m-%d", errors="coerce").dropna()
+            if len(days):
+                days = days.values.astype("datetime64[D]").astype(np.int64)
+                col["quantiles"] = np.quantile(days, np.linspace(0, 1, PROFILE_QUANTILES)).tolist()
+        else:
+            col["kind"] = "text"
+        if non_null and not col["unique"]:
+            cursor.execute(f"SELECT {quote_ident(name)}, COUNT(*) FROM {quote_ident(table)} "
+                           f"WHERE {quote_ident(name)} IS NOT NULL GROUP BY 1 ORDER BY 2 DESC LIMIT {int(top_k)}")
+            top = cursor.fetchall()
+            col["top_values"] = [value for value, _ in top]
+            col["top_freqs"] = [count / non_null for _, count in top]
+        columns.append(col)
+    return {"table": table, "rows": rows, "columns": columns}
+
+def _sample_quantiles(rng, quantiles, num_rows):
+    """Inverse-CDF sampling from empirical quantiles"""
+    return np.interp(rng.random(num_rows), np.linspace(0, 1, len(quantiles)), quantiles)
+
+def _quantile_values(col, num_rows, rng):
+    """Draws from an integer, real or date column's empirical quantiles, in the column's own type"""
+    values = _sample_quantiles(rng, col["quantiles"], num_rows)
+    if col["kind"] == "integer":
+        return np.rint(values).astype(np.int64)
+    if col["kind"] == "date":
+        return np.datetime_as_string(np.rint(values).astype("datetime64[D]"), unit="D").astype(object)
+    return values
+
+def _sample_column(col, num_rows, offset, scale, rng):
+    """Vectorized draw of `num_rows` values for one profiled column, starting at row `offset`"""
+    kind = col["kind"]
+    if col["unique"] and kind == "integer":
+        return np.arange(offset, offset + num_rows) + int(col["min"])
+    if col["unique"] and kind == "text":
+        return np.char.add(f"{col['name']}_", np.arange(offset + 1, offset + num_rows + 1).astype(str)).astype(object)
+    covered = sum(col["top_freqs"])
+    if col["top_values"] and (covered >= 0.999 or kind == "text"):
+        # Top-k categories keep their frequencies; the tail is filled with synthetic values
+        # (text) or quantile draws (numbers and dates), or left out when there are no quantiles
+        tail_share = max(0.0, 1 - covered) if kind == "text" or col["quantiles"] else 0.0
+        values = np.empty(num_rows, dtype=object)
+        weights = np.array(col["top_freqs"] + [tail_share])
+        choices = rng.choice(len(weights), num_rows, p=weights / weights.sum())
+        top = np.empty(len(col["top_values"]), dtype=object)
+        top[:] = col["top_values"]
+        in_top = choices < len(top)
+        values[in_top] = top[choices[in_top]]
+        tail = int((~in_top).sum())
+        if tail:
+            values[~in_top] = (_tail_values(col, tail, scale, rng) if kind == "text"
+                               else _quantile_values(col, tail, rng))
+        return values
+    if kind in ("integer", "real", "date") and col["quantiles"]:
+        return _quantile_values(col, num_rows, rng)
+    return _tail_values(col, num_rows, scale, rng)
+
+def _tail_values(col, num_rows, scale, rng):
+    """Synthetic text values outside the top-k, with cardinality scaled like the table"""
+    use_type = infer_type_from_name(col["name"])
+    if use_type in FAKER_POOLS:
+        pool = value_pool(use_type)
+        return pool[rng.integers(0, len(pool), num_rows)]
+    cardinality = max(1, int((col["distinct"] - len(col["top_values"])) * scale))
+    return np.char.add(f"{col['name']}_", rng.integers(0, cardinality, num_rows).astype(str)).astype(object)
+
+def generate_from_profile(profile, num_rows, id_start=1, rng=None, scale=None):
+    """
+    Build a DataFrame of `num_rows` rows that follows a profile_table() profile.
+    `scale` (clone size / source size) drives the cardinality of synthetic tail values.
+    """
+    rng = rng if rng is not None else np.random.default_rng()
+    if scale is None:
+        scale = num_rows / profile["rows"] if profile["rows"] else 1.0
+    data = {}
+    for col in profile["columns"]:
+        values = _sample_column(col, num_rows, id_start - 1, scale, rng)
+        if col["null_rate"] > 0:
+            values = values.astype(object) if values.dtype != object else values
+            values[rng.random(num_rows) < col["null_rate"]] = None
+        data[col["name"]] = values
+    return pd.DataFrame(data)
+
+def clone_table(conn, table, target, factor, seed=None, chunk_rows=CLONE_CHUNK_ROWS, progress=None):
+    """
+    Profile `table` and write a synthetic clone with `factor` times as many rows into `target`.
+    Rows are generated and inserted chunk by chunk.
+    `progress(rows_done, total)` is called after each chunk when given.
+    Returns (profile, insert_chunks result dict).
+    """
+    profile = profile_table(conn, table)
+    total = int(profile["rows"] * factor)
+    rng = np.random.default_rng(seed)
+    col_types = {col["name"]: col["decl_type"] or ("REAL" if col["kind"] == "real" else
+                                                  "INTEGER" if col["kind"] == "integer" else "TEXT")
+                 for col in profile["columns"]}
+
+    def frames():
+        for offset in range(0, total, chunk_rows):
+            n = min(chunk_rows, total - offset)
+            yield generate_from_profile(profile, n, id_start=offset + 1, rng=rng, scale=factor)
+
+    result = insert_chunks(conn, target, frames(), col_types,
+                           progress=(lambda done: progress(done, total)) if progress else None)
+    return profile, result
@@ -0,0 +1,180 @@
+"""
+Type Inference
+Infers column types from a sample instead of the whole column. Values are first checked
+with cheap regex probes; datetime candidates are narrowed to a handful of explicit formats,
+and the single best format per column is kept so conversions can parse with it directly.
+Table results are cached in `_ebi_types` per table data version.
+"""
+__all__ = ["stratified_sample", "sample_table", "infer_series", "infer_frame", "infer_table",
+           "cleaner_types", "datetime_formats"]
+
+import json
+import random
+import sqlite3
+
+import pandas as pd
+
+from modules.ingest import quote_ident
+from modules.versions import table_version
+
+TYPES_TABLE = "_ebi_types"
+SAMPLE_ROWS = 2000
+THRESHOLD = 0.8
+
+INTEGER_PATTERN = r"[+-]?\d+"
+REAL_PATTERN = r"[+-]?(\d+\.?\d*|\.\d+)([eE][+-]?\d+)?"
+BOOL_PATTERN = r"(?i)true|false|yes|no|t|f|y|n"
+# Shape probe -> explicit formats worth trying for it
+DATE_PROBES = [
+    (r"\d{4}-\d{2}-\d{2}", ["%Y-%m-%d"]),
+    (r"\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}", ["%Y-%m-%d %H:%M:%S"]),
+    (r"\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}", ["%Y-%m-%dT%H:%M:%S"]),
+    (r"\d{4}-\d{2}-\d{2} \d{2}:\d{2}", ["%Y-%m-%d %H:%M"]),
+    (r"\d{4}/\d{1,2}/\d{1,2}", ["%Y/%m/%d"]),
+    (r"\d{1,2}/\d{1,2}/\d{4}", ["%m/%d/%Y", "%d/%m/%Y"]),
+    (r"\d{1,2}-\d{1,2}-\d{4}", ["%d-%m-%Y", "%m-%d-%Y"]),
+    (r"\d{1,2}\.\d{1,2}\.\d{4}", ["%d.%m.%Y"]),
+    (r"\d{1,2} [A-Za-z]{3} \d{4}", ["%d %b %Y"]),
+    (r"[A-Za-z]{3} \d{1,2}, \d{4}", ["%b %d, %Y"]),
+]
+SQL_TYPES = {"Integer": "INTEGER", "Real": "REAL", "Boolean": "INTEGER", "Datetime": "TEXT",
+             "Text": "TEXT", "Empty": "TEXT"}
+CLEANER_KINDS = {"Integer": "Numeric", "Real": "Numeric", "Boolean": "Boolean", "Datetime": "Datetime",
+                 "Text": "Text", "Empty": "Text"}
+
+def stratified_sample(df, n=SAMPLE_ROWS, strata=10, seed=0):
+    """Up to `n` rows drawn evenly from `strata` consecutive slices of `df`, so head and tail are both covered"""
+    if len(df) <= n:
+        return df
+    rng = random.Random(seed)
+    bounds = [len(df) * i // strata for i in range(strata + 1)]
+    positions = []
+    for lo, hi in zip(bounds, bounds[1:]):
+        positions.extend(sorted(rng.sample(range(lo, hi), min(n // strata, hi - lo))))
+    return df.iloc[positions]
+
+def sample_table(conn, table, n=SAMPLE_ROWS, seed=0):
+    """
+    min(n, row count) rows of `table`, picked at random rowids without scanning it. When
+    rowids are too sparse for that to find enough rows, random row positions are sampled
+    instead in one pass over the rowids.
+    """
+    source = quote_ident(table)
+    try:
+        low, high = conn.execute(f"SELECT MIN(rowid), MAX(rowid) FROM {source}").fetchone()
+    except sqlite3.OperationalError:
+        low = high = None  # WITHOUT ROWID table
+    if low is None or high - low + 1 <= n:
+        cursor = conn.execute(f"SELECT * FROM {source} LIMIT ?", (n,))
+        cols = [desc[0] for desc in cursor.description]
+        return pd.DataFrame(cursor.fetchall(), columns=cols)
+
+    rng = random.Random(seed)
+    rowids = sorted(rng.sample(range(low, high + 1), n))
+    cursor = conn.execute(f"SELECT * FROM {source} WHERE rowid IN (SELECT value FROM json_each(?))",
+                          (json.dumps(rowids),))
+    cols = [desc[0] for desc in cursor.description]
+    rows = cursor.fetchall()
+    if len(rows) < n:
+        total = conn.execute(f"SELECT COUNT(*) FROM {source}").fetchone()[0]
+        if len(rows) < min(n, total):
+            positions = sorted(rng.sample(range(total), min(n, total)))
+            rows = conn.execute(f"""
+                SELECT * FROM {source} WHERE rowid IN (
+                    SELECT rowid FROM (SELECT rowid, ROW_NUMBER() OVER (ORDER BY rowid) - 1 AS pos FROM {source})
+                    WHERE pos IN (SELECT value FROM json_each(?)))
+            """, (json.dumps(positions),)).fetchall()
+    return pd.DataFrame(rows, columns=cols)
+
+def _share(text, pattern):
+    return float(text.str.fullmatch(pattern).mean())
+
+def _best_datetime_format(text, threshold):
+    """(format, share) of the explicit format parsing most of `text`, or (None, 0)"""
+    best = (None, 0.0)
+    for probe, formats in DATE_PROBES:
+        if _share(text, probe) < threshold:
+            continue
+        for fmt in formats:
+            share = float(pd.to_datetime(text, format=fmt, errors="coerce").notna().mean())
+            if share > best[1]:
+                best = (fmt, share)
+    return best if best[1] >= threshold else (None, 0.0)
+
+def infer_series(series, threshold=THRESHOLD):
+    """
+    Type of one column from its (sampled) values: a dict with kind (Integer, Real, Boolean,
+    Datetime, Text or Empty), sql_type, datetime_format, confidence and null_share.
+    """
+    total = len(series)
+    values = series.dropna()
+    null_share = 1 - len(values) / total if total else 1.0
+    result = {"kind": "Text", "datetime_format": None, "confidence": 1.0, "null_share": null_share}
+    if pd.api.types.is_bool_dtype(values):
+        result["kind"] = "Boolean"
+    elif pd.api.types.is_integer_dtype(values):
+        result["kind"] = "Integer"
+    elif pd.api.types.is_float_dtype(values):
+        result["kind"] = "Real"
+    elif pd.api.types.is_datetime64_any_dtype(values):
+        result["kind"] = "Datetime"
+    else:
+        text = values.astype(str).str.strip()
+        text = text[text != ""]
+        if text.empty:
+            result["kind"] = "Empty"
+        else:
+            # Cheapest probes first; full parsing only with an explicit format
+            binary_share = float(text.isin(["0", "1"]).mean())
+            bool_share = _share(text, BOOL_PATTERN) + binary_share
+            int_share = _share(text, INTEGER_PATTERN)
+            real_share = _share(text, REAL_PATTERN)
+            if int_share >= threshold and binary_share < 1:
+                result.update(kind="Integer", confidence=int_share)
+            elif real_share >= threshold and binary_share < 1:
+                result.update(kind="Real", confidence=real_share)
+            elif bool_share >= threshold:
+                result.update(kind="Boolean", confidence=min(bool_share, 1.0))
+            else:
+                fmt, share = _best_datetime_format(text, threshold)
+                if fmt:
+                    result.update(kind="Datetime", datetime_format=fmt, confidence=share)
+    result["sql_type"] = SQL_TYPES[result["kind"]]
+    return result
+
+def infer_frame(df, sample_rows=SAMPLE_ROWS, threshold=THRESHOLD):
+    """{column: infer_series result} for a stratified sample of `df`"""
+    sample = stratified_sample(df, sample_rows)
+    return {col: infer_series(sample[col], threshold) for col in df.columns}
+
+def _ensure_table(conn):
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {TYPES_TABLE} (
+            table_name TEXT NOT NULL,
+            version TEXT NOT NULL,
+            types TEXT NOT NULL,
+            PRIMARY KEY (table_name, version)
+        )
+    """)
+
+def infer_table(conn, table, sample_rows=SAMPLE_ROWS, threshold=THRESHOLD):
+    """infer_frame over a random-rowid sample of `table`, cached per table version"""
+    _ensure_table(conn)
+    version = table_version(conn, table)
+    row = conn.execute(f"SELECT types FROM {TYPES_TABLE} WHERE table_name=? AND version=?",
+                       (table, version)).fetchone()
+    if row:
+        return json.loads(row[0])
+    types = infer_frame(sample_table(conn, table, sample_rows), sample_rows, threshold)
+    with conn:
+        conn.execute(f"DELETE FROM {TYPES_TABLE} WHERE table_name=?", (table,))
+        conn.execute(f"INSERT INTO {TYPES_TABLE} VALUES (?, ?, ?)", (table, version, json.dumps(types)))
+    return types
+
+def cleaner_types(types):
+    """The Cleaner's labels (Numeric, Datetime, Boolean, Text) for inferred types"""
+    return {col: CLEANER_KINDS[info["kind"]] for col, info in types.items()}
+
+def datetime_formats(types):
+    """{column: format} for the columns inferred as datetimes"""
+    return {col: info["datetime_format"] for col, info in types.items() if info.get("datetime_format")}
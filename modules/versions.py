@@ -0,0 +1,51 @@
+"""
+Table Versions
+A cheap per-table data version used to key cached stats and results.
+It combines a counter that EBI bumps on its own writes with MAX(rowid) and the
+table's schema, so appends from other tools and ALTERs are noticed as well.
+"""
+__all__ = ["bump_version", "version_parts", "table_version"]
+
+import zlib
+import sqlite3
+
+from modules.ingest import quote_ident
+
+VERSIONS_TABLE = "_ebi_table_versions"
+
+def _ensure_table(conn):
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {VERSIONS_TABLE} (
+            table_name TEXT PRIMARY KEY,
+            version INTEGER NOT NULL
+        )
+    """)
+
+def bump_version(conn, table):
+    """Record that `table` changed; call after UPDATE/DELETE/INSERT issued by EBI (commits)"""
+    _ensure_table(conn)
+    conn.execute(f"INSERT INTO {VERSIONS_TABLE} (table_name, version) VALUES (?, 1) "
+                 f"ON CONFLICT(table_name) DO UPDATE SET version = version + 1", (table,))
+    conn.commit()
+
+def version_parts(conn, table):
+    """
+    (counter, high, schema_crc) for `table`. `high` is MAX(rowid), or "n<count>" for
+    WITHOUT ROWID tables; with counter and schema unchanged, a larger high means rows were only appended.
+    """
+    _ensure_table(conn)
+    row = conn.execute(f"SELECT version FROM {VERSIONS_TABLE} WHERE table_name=?", (table,)).fetchone()
+    counter = row[0] if row else 0
+    schema = conn.execute("SELECT sql FROM sqlite_master WHERE type='table' AND name=?", (table,)).fetchone()
+    schema_crc = zlib.crc32((schema[0] if schema else "").encode())
+    try:
+        # O(log n) on the rowid b-tree
+        high = conn.execute(f"SELECT MAX(rowid) FROM {quote_ident(table)}").fetchone()[0]
+    except sqlite3.OperationalError:
+        high = "n" + str(conn.execute(f"SELECT COUNT(*) FROM {quote_ident(table)}").fetchone()[0])
+    return counter, high, schema_crc
+
+def table_version(conn, table):
+    """Version string for `table`; changes whenever its data or schema changes"""
+    counter, high, schema_crc = version_parts(conn, table)
+    return f"{counter}.{high}.{schema_crc:08x}"
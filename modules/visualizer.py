@@ -5,6 +5,16 @@ import matplotlib.pyplot as plt
 import matplotlib.ticker as mticker
 import os
 from datetime import datetime
+from modules.sketches import get_sketches
+from modules.aggregate import group_totals, bin_totals, agg_values
+from modules.binning import bin_edges, bin_index, bin_frame
+from modules.memo import run_step
+from modules.snapshots import frame_digest
+from modules.figcache import render_key, figure_png, get_png, put_png, cache_info as render_cache_info
+from modules.downsample import target_points, lttb, density_sample
+
+# Charts whose values are per-group aggregates, so they can be computed in SQL over the whole table
+SQL_CHARTS = ("Bar", "Line", "Pie", "Area", "Pareto")
 
 def format_number(n):
     """Format numbers based on their scale, removing .0 for integers"""
@@ -28,89 +38,112 @@ def truncate_text(text, max_words=1):
         return str(text)
     return " ".join(words[:max_words]) + "..."
 
-def clean_bin_label(x):
-    """Clean bin labels and handle invalid cases to create readable ranges"""
-    try:
-        x_str = str(x).replace('(', '').replace(']', '').replace(', ', '-')
-        parts = x_str.split('-')
-        # Skip empty or invalid parts
-        formatted_parts = [format_number(float(p)) for p in parts if p.strip() and p != 'nan']
-        if not formatted_parts:
-            return str(x)
-        
-        # For ranges with multiple parts, ensure a clean range format
-        if len(formatted_parts) > 1:
-            # Create a clean range format like "0-20", "21-40", etc.
-            return f"{formatted_parts[0]}-{formatted_parts[-1]}"
-        return '-'.join(formatted_parts)
-    except (ValueError, TypeError) as e:
-        return str(x)  # Fallback to original string
+def _column_digest(series):
+    """Data version of a column: digest of its name, dtype and values"""
+    return frame_digest(series.to_frame(name=str(series.name)))
+
+def _group_x(series, y_series, max_categories):
+    """(grouped series, error message) for intelligent_group"""
+    valid = pd.DataFrame({'x': series, 'y': y_series}).dropna()
+    if valid.empty:
+        return series, "Cannot group: No valid numeric data in Y-axis."
+    num_bins = min(5, valid['y'].nunique())
+    if num_bins < 2:
+        return series, "Cannot group: Insufficient unique Y-axis values."
+    edges = bin_edges(valid['y'], "Equal frequency", num_bins)
+    labels = np.array([f"{format_number(low)}-{format_number(high)}" for low, high in zip(edges[:-1], edges[1:])], dtype=object)
+    # Each x value takes the Y bin of its last row; values with no valid row stay as they are
+    codes, uniques = pd.factorize(valid['x'])
+    last = pd.DataFrame({'code': codes, 'bin': bin_index(valid['y'].to_numpy(dtype=np.float64), edges)}).drop_duplicates('code', keep='last')
+    bin_of = np.empty(len(uniques), dtype=np.intp)
+    bin_of[last['code'].to_numpy()] = last['bin'].to_numpy()
+    positions = pd.Index(uniques).get_indexer(series)
+    found = positions >= 0
+    values = series.to_numpy(dtype=object, copy=True)
+    values[found] = labels[bin_of[positions[found]]]
+    # Categories keep the bins in Y order for groupby and plotting
+    categories = pd.unique(np.concatenate([labels, values[~found & pd.notna(values)]]))
+    return pd.Series(pd.Categorical(values, categories=categories), index=series.index, name=series.name), None
 
 def intelligent_group(series, y_series, max_categories=10):
     """Group x-axis data by y-axis values into bins if >10 categories and y is numeric"""
-    counts = series.value_counts()
-    if len(counts) > max_categories and pd.api.types.is_numeric_dtype(y_series):
+    if series.nunique() > max_categories and pd.api.types.is_numeric_dtype(y_series):
         try:
-            # Filter out NaN values to avoid invalid bins
-            valid_data = pd.DataFrame({'x': series, 'y': y_series}).dropna()
-            if valid_data.empty:
-                st.markdown("<span style='color:#d90429;font-size:14px;'>Cannot group: No valid numeric data in Y-axis.</span>", unsafe_allow_html=True)
+            # Cached per column versions: the main chart and every "Generate Multiple Charts" chart share it
+            _, (grouped, error) = run_step("intelligent_group", [_column_digest(series), _column_digest(y_series)],
+                                           {"max_categories": max_categories}, _group_x, series, y_series, max_categories)
+            if error:
+                st.markdown(f"<span style='color:#d90429;font-size:14px;'>{error}</span>", unsafe_allow_html=True)
                 return series
-            num_bins = min(5, len(valid_data['y'].unique()))
-            if num_bins < 2:
-                st.markdown("<span style='color:#d90429;font-size:14px;'>Cannot group: Insufficient unique Y-axis values.</span>", unsafe_allow_html=True)
-                return series
-            bins = pd.qcut(valid_data['y'], q=num_bins, duplicates='drop')
-            df_temp = pd.DataFrame({'x': valid_data['x'], 'y': valid_data['y'], 'bin': bins})
-            grouped_data = df_temp.groupby('bin', observed=True)['x'].agg(lambda x: ', '.join(x)).reset_index()
-            
-            # Create cleaner bin labels that look like "0-20", "21-40", etc.
-            grouped_data['bin'] = grouped_data['bin'].apply(clean_bin_label)
-            
-            # Ensure bins are sorted properly
-            grouped_data['sort_key'] = grouped_data['bin'].apply(
-                lambda x: float(x.split('-')[0].replace('K', '000').replace('M', '000000'))
-                if '-' in x else float(x.replace('K', '000').replace('M', '000000'))
-            )
-            grouped_data = grouped_data.sort_values('sort_key').drop('sort_key', axis=1).reset_index(drop=True)
-            
-            # Map the original values to their bins
-            bin_dict = dict(zip(df_temp['x'], df_temp['bin']))
-            
-            # Calculate how many unique values were grouped
-            original_count = len(series.unique())
-            new_count = len(grouped_data)
-            
-            # Store this info for display
             st.session_state[f'grouping_info_{series.name}'] = {
-                'original': original_count,
-                'grouped': new_count
+                'original': series.nunique(dropna=False),
+                'grouped': grouped.nunique(dropna=False)
             }
-            
-            return series.map(lambda x: bin_dict.get(x, x))
+            return grouped
         except Exception as e:
             st.markdown(f"<span style='color:#d90429;font-size:14px;'>Grouping failed: {str(e)}. Using raw data.</span>", unsafe_allow_html=True)
             return series
     return series
 
+def _group_y(series, x_series, max_categories):
+    """Values of `series` replaced by their x value when that x is among the most frequent"""
+    top_x = x_series.value_counts().head(max_categories).index
+    # Each y value takes the x of its last row
+    last = pd.DataFrame({'x': x_series, 'y': series}).dropna().drop_duplicates('y', keep='last')
+    x_of = last['x'].to_numpy(dtype=object)
+    positions = pd.Index(last['y']).get_indexer(series)
+    found = positions >= 0
+    found[found] = pd.Index(top_x).get_indexer(x_of[positions[found]]) >= 0
+    values = series.to_numpy(dtype=object, copy=True)
+    values[found] = x_of[positions[found]]
+    return pd.Series(values, index=series.index, name=series.name)
+
 def intelligent_group_y(series, x_series, max_categories=10):
     """Group y-axis data by x-axis values into up to 10 groups if >10 categories"""
-    counts = series.value_counts()
-    if len(counts) > max_categories:
+    if series.nunique() > max_categories:
         try:
-            x_counts = x_series.value_counts()
-            top_x = x_counts.head(max_categories).index
-            df_temp = pd.DataFrame({'x': x_series, 'y': series}).dropna()
-            grouped_data = df_temp.groupby('x')['y'].agg(lambda x: ', '.join(x)).reset_index()
-            grouped_data = grouped_data[grouped_data['x'].isin(top_x)]
-            y_to_x = dict(zip(df_temp['y'], df_temp['x']))
-            return series.map(lambda y: y_to_x.get(y, y) if y_to_x.get(y) in top_x else y)
+            return run_step("intelligent_group_y", [_column_digest(series), _column_digest(x_series)],
+                            {"max_categories": max_categories}, _group_y, series, x_series, max_categories)[1]
         except Exception as e:
             st.markdown(f"<span style='color:#d90429;font-size:14px;'>Y-axis grouping failed: {str(e)}. Using raw data.</span>", unsafe_allow_html=True)
             return series
     return series
 
-def show(df, title="📊 Visualize Data", key=None):
+def _axis_values(series):
+    """Numbers placing `series` on a chart axis: its values, or category codes for other data"""
+    if pd.api.types.is_numeric_dtype(series):
+        return series.to_numpy(dtype=np.float64)
+    return pd.factorize(series)[0].astype(np.float64)
+
+def _label_positions(ax, labels):
+    """Tick labels for a line drawn at the integer positions of `labels`"""
+    def tick(v, p):
+        if not 0 <= int(v) < len(labels):
+            return ""
+        label = labels[int(v)]
+        return format_number(label) if isinstance(label, (int, float, np.number)) else truncate_text(label, 1)
+    ax.xaxis.set_major_locator(mticker.MaxNLocator(nbins=10, integer=True))
+    ax.xaxis.set_major_formatter(mticker.FuncFormatter(tick))
+
+def full_table_insights(sketches, x_col, y_col):
+    """Show approximate whole-table figures for the plotted columns from stored sketches"""
+    if not sketches:
+        return
+    parts = []
+    if y_col in sketches and sketches[y_col].digest.count() > 0:
+        digest = sketches[y_col].digest
+        parts.append(f"{y_col} median ~{format_number(digest.quantile(0.5))}, "
+                     f"p95 ~{format_number(digest.quantile(0.95))}")
+    if x_col in sketches:
+        parts.append(f"~{format_number(sketches[x_col].hll.estimate())} distinct {x_col}")
+        top = sketches[x_col].cms.top_values(3)
+        if top:
+            parts.append("top: " + ", ".join(f"{truncate_text(value)} (~{format_number(count)})" for value, count in top))
+    if parts:
+        rows = format_number(next(iter(sketches.values())).counts["rows"])
+        st.markdown(f"<span style='color:black;font-size:12px;'>Full table ({rows} rows, approx.): {' · '.join(parts)}</span>", unsafe_allow_html=True)
+
+def show(df, title="📊 Visualize Data", key=None, conn=None, table=None, pushdown=False):
     st.markdown(
         """
         <style>
@@ -204,6 +237,11 @@ def show(df, title="📊 Visualize Data", key=None):
                     with col2:
                         bin_end = st.number_input("End value", value=max_val, key=f"bin_end_{key}")
 
+    # With `pushdown`, `df` holds rows of `table` as stored, so its groups can be aggregated in SQL instead
+    sql_mode = False
+    if pushdown and conn is not None and table and chart_type in SQL_CHARTS and x_col != y_col:
+        sql_mode = st.checkbox("Aggregate over the full table (SQL)", value=True, key=f"viz_sql_{key}")
+
     x_data = df[x_col]
     y_data = df[y_col]
     
@@ -211,66 +249,57 @@ def show(df, title="📊 Visualize Data", key=None):
     original_x_count = len(df[x_col].unique())
     original_y_count = len(df[y_col].unique())
     
-    if enable_binning and pd.api.types.is_numeric_dtype(df[x_col]):
+    # x_data/y_data already hold one value per group (binned or SQL-aggregated)
+    pre_aggregated = False
+    if sql_mode:
         try:
-            if bin_method == "Equal width":
-                bins = pd.cut(df[x_col], bins=num_bins)
-                df_binned = df.copy()
-                df_binned[x_col] = bins
-                grouped_data = df_binned.groupby(x_col, observed=True)[y_col].agg([agg_method, 'count']).reset_index()
-                grouped_data[x_col] = grouped_data[x_col].apply(clean_bin_label)
-                grouped_data['sort_key'] = grouped_data[x_col].apply(
-                    lambda x: float(x.split('-')[0].replace('K', '000').replace('M', '000000'))
-                    if '-' in x else float(x.replace('K', '000').replace('M', '000000'))
-                )
-                grouped_data = grouped_data.sort_values('sort_key').drop('sort_key', axis=1).reset_index(drop=True)
-                x_data = grouped_data[x_col]
-                y_data = grouped_data[agg_method]
-                counts = grouped_data['count']
-                st.markdown(f"<span style='color:black;font-style:italic;'>Binned {original_x_count} unique {x_col} values into {len(grouped_data)} groups</span>", unsafe_allow_html=True)
-            elif bin_method == "Equal frequency":
-                bins = pd.qcut(df[x_col], q=num_bins, duplicates='drop')
-                df_binned = df.copy()
-                df_binned[x_col] = bins
-                grouped_data = df_binned.groupby(x_col, observed=True)[y_col].agg([agg_method, 'count']).reset_index()
-                grouped_data[x_col] = grouped_data[x_col].apply(clean_bin_label)
-                grouped_data['sort_key'] = grouped_data[x_col].apply(
-                    lambda x: float(x.split('-')[0].replace('K', '000').replace('M', '000000'))
-                    if '-' in x else float(x.replace('K', '000').replace('M', '000000'))
-                )
-                grouped_data = grouped_data.sort_values('sort_key').drop('sort_key', axis=1).reset_index(drop=True)
-                x_data = grouped_data[x_col]
-                y_data = grouped_data[agg_method]
-                counts = grouped_data['count']
-                st.markdown(f"<span style='color:black;font-style:italic;'>Binned {original_x_count} unique {x_col} values into {len(grouped_data)} groups with ~{len(df)//num_bins} points per bin</span>", unsafe_allow_html=True)
-            else:  # Custom range
-                custom_bins = np.linspace(bin_start, bin_end, num_bins + 1)
-                bins = pd.cut(df[x_col], bins=custom_bins)
-                df_binned = df.copy()
-                df_binned[x_col] = bins
-                grouped_data = df_binned.groupby(x_col, observed=True)[y_col].agg([agg_method, 'count']).reset_index()
-                grouped_data[x_col] = grouped_data[x_col].apply(clean_bin_label)
-                grouped_data['sort_key'] = grouped_data[x_col].apply(
-                    lambda x: float(x.split('-')[0].replace('K', '000').replace('M', '000000'))
-                    if '-' in x else float(x.replace('K', '000').replace('M', '000000'))
-                )
-                grouped_data = grouped_data.sort_values('sort_key').drop('sort_key', axis=1).reset_index(drop=True)
-                x_data = grouped_data[x_col]
-                y_data = grouped_data[agg_method]
-                counts = grouped_data['count']
-                st.markdown(f"<span style='color:black;font-style:italic;'>Binned {original_x_count} unique {x_col} values using custom range into {len(grouped_data)} groups</span>", unsafe_allow_html=True)
+            numeric_y = pd.api.types.is_numeric_dtype(df[y_col])
+            if enable_binning and pd.api.types.is_numeric_dtype(df[x_col]):
+                custom = bin_method == "Custom range"
+                frame = bin_totals(conn, table, x_col, y_col, numeric_y, bin_method, num_bins,
+                                   bin_start if custom else None, bin_end if custom else None)
+                labels = [f"{format_number(low)}-{format_number(high)}" for low, high in zip(frame["low"], frame["high"])]
+            else:
+                frame = group_totals(conn, table, x_col, y_col, numeric_y)
+                labels = frame["label"].tolist()
+            x_data = pd.Series(labels, name=x_col)
+            y_data = agg_values(frame, agg_method if numeric_y else "count").rename(y_col)
+            counts = frame["count"]
+            pre_aggregated = True
+            st.markdown(f"<span style='color:black;font-style:italic;'>Aggregated {format_number(frame['count'].sum())} rows of {table} in SQL into {len(frame)} groups</span>", unsafe_allow_html=True)
         except Exception as e:
-            st.markdown(f"<span style='color:#d90429;font-size:14px;'>Binning failed: {str(e)}. Using raw data.</span>", unsafe_allow_html=True)
-    else:
-        x_data = intelligent_group(df[x_col], df[y_col], max_categories=10)
-        if len(df[x_col].unique()) > 10 and pd.api.types.is_numeric_dtype(df[y_col]):
-            grouped_count = len(x_data.unique())
-            st.markdown(f"<span style='color:black;font-style:italic;'>Grouped {original_x_count} unique {x_col} values into {grouped_count} categories</span>", unsafe_allow_html=True)
+            st.markdown(f"<span style='color:#d90429;font-size:14px;'>SQL aggregation failed: {str(e)}. Using loaded rows.</span>", unsafe_allow_html=True)
+            sql_mode = False
+
+    if not sql_mode:
+        if enable_binning and pd.api.types.is_numeric_dtype(df[x_col]):
+            try:
+                numeric_y = pd.api.types.is_numeric_dtype(df[y_col])
+                custom = bin_method == "Custom range"
+                edges = bin_edges(df[x_col], bin_method, num_bins, bin_start if custom else None, bin_end if custom else None)
+                frame = bin_frame(df[x_col], df[y_col], edges, numeric_y, formatter=format_number)
+                x_data = frame["label"].rename(x_col)
+                y_data = agg_values(frame, agg_method if numeric_y else "count").rename(y_col)
+                counts = frame["count"]
+                pre_aggregated = True
+                if bin_method == "Equal frequency":
+                    st.markdown(f"<span style='color:black;font-style:italic;'>Binned {original_x_count} unique {x_col} values into {len(frame)} groups with ~{len(df)//num_bins} points per bin</span>", unsafe_allow_html=True)
+                elif custom:
+                    st.markdown(f"<span style='color:black;font-style:italic;'>Binned {original_x_count} unique {x_col} values using custom range into {len(frame)} groups</span>", unsafe_allow_html=True)
+                else:
+                    st.markdown(f"<span style='color:black;font-style:italic;'>Binned {original_x_count} unique {x_col} values into {len(frame)} groups</span>", unsafe_allow_html=True)
+            except Exception as e:
+                st.markdown(f"<span style='color:#d90429;font-size:14px;'>Binning failed: {str(e)}. Using raw data.</span>", unsafe_allow_html=True)
+        else:
+            x_data = intelligent_group(df[x_col], df[y_col], max_categories=10)
+            if len(df[x_col].unique()) > 10 and pd.api.types.is_numeric_dtype(df[y_col]):
+                grouped_count = len(x_data.unique())
+                st.markdown(f"<span style='color:black;font-style:italic;'>Grouped {original_x_count} unique {x_col} values into {grouped_count} categories</span>", unsafe_allow_html=True)
     
-    if not pd.api.types.is_numeric_dtype(df[y_col]) and len(df[y_col].unique()) > 10:
-        y_data = intelligent_group_y(df[y_col], df[x_col], max_categories=10)
-        grouped_count = len(y_data.unique())
-        st.markdown(f"<span style='color:black;font-style:italic;'>Grouped {original_y_count} unique {y_col} values into {grouped_count} categories</span>", unsafe_allow_html=True)
+        if not pre_aggregated and not pd.api.types.is_numeric_dtype(df[y_col]) and len(df[y_col].unique()) > 10:
+            y_data = intelligent_group_y(df[y_col], df[x_col], max_categories=10)
+            grouped_count = len(y_data.unique())
+            st.markdown(f"<span style='color:black;font-style:italic;'>Grouped {original_y_count} unique {y_col} values into {grouped_count} categories</span>", unsafe_allow_html=True)
     
     unique_x = x_data.unique()
     if len(unique_x) <= 10:
@@ -282,11 +311,12 @@ def show(df, title="📊 Visualize Data", key=None):
     y_label = y_axis_label if 'y_axis_label' in locals() else truncate_text(y_col, 1)
     
     fig = None
+    png = None
     if x_col == y_col and chart_type != "Pie":
         st.markdown("<span style='color:#198754;font-size:14px;font-weight:bold;'>X and Y axis should be different columns for most chart types.</span>", unsafe_allow_html=True)
     else:
         try:
-            if enable_binning and pd.api.types.is_numeric_dtype(df[x_col]):
+            if pre_aggregated:
                 plot_df = pd.DataFrame({x_col: x_data, y_col: y_data})
                 if 'counts' in locals():
                     plot_df['count'] = counts
@@ -296,297 +326,345 @@ def show(df, title="📊 Visualize Data", key=None):
             if plot_df.empty:
                 st.markdown("<span style='color:#198754;font-size:14px;font-weight:bold;'>No data to plot for selected columns.</span>", unsafe_allow_html=True)
             else:
-                if chart_type == "Bar":
+                # Reruns that would draw the same picture reuse the cached PNG without touching matplotlib.
+                # Heatmap is drawn fresh: it shows its own category selector while rendering.
+                # Line, Area and Scatter draw at most about one point per pixel of the chart's width
+                point_budget = target_points(fig_size)
+                if chart_type == "Scatter":
+                    total_points = len(plot_df)
+                elif chart_type in ("Line", "Area"):
+                    total_points = len(plot_df) if pre_aggregated else plot_df[x_col].nunique()
+                else:
+                    total_points = 0
+
+                png_key = None
+                if chart_type != "Heatmap":
                     try:
-                        fig, ax = plt.subplots(figsize=fig_size)
-                        if enable_binning and pd.api.types.is_numeric_dtype(df[x_col]):
-                            grouped = plot_df.set_index(x_col)[y_col]
-                        else:
-                            grouped = plot_df.groupby(x_col)[y_col].agg(agg_method if pd.api.types.is_numeric_dtype(df[y_col]) else 'count')
+                        png_key = render_key(frame_digest(plot_df), chart_type, x_col, y_col, agg_method,
+                                             [enable_binning, num_bins, locals().get("bin_method"), locals().get("bin_start"), locals().get("bin_end")],
+                                             [chart_title, x_label, y_label], fig_size)
+                    except Exception:
+                        pass  # unhashable data: render without caching
+                png = get_png(png_key) if png_key else None
+                if png is None:
+                    if chart_type == "Bar":
+                        try:
+                            fig, ax = plt.subplots(figsize=fig_size)
+                            if pre_aggregated:
+                                grouped = plot_df.set_index(x_col)[y_col]
+                            else:
+                                grouped = plot_df.groupby(x_col)[y_col].agg(agg_method if pd.api.types.is_numeric_dtype(df[y_col]) else 'count')
                         
-                        x_labels = [truncate_text(idx, 1) for idx in grouped.index]
-                        if enable_binning and pd.api.types.is_numeric_dtype(df[x_col]) and 'count' in plot_df.columns:
-                            x_labels = [f"{label} (n={int(plot_df.loc[plot_df[x_col] == idx, 'count'].iloc[0])})" 
-                                     for idx, label in zip(grouped.index, x_labels)]
+                            x_labels = [truncate_text(idx, 1) for idx in grouped.index]
+                            if enable_binning and pd.api.types.is_numeric_dtype(df[x_col]) and 'count' in plot_df.columns:
+                                x_labels = [f"{label} (n={int(plot_df.loc[plot_df[x_col] == idx, 'count'].iloc[0])})" 
+                                         for idx, label in zip(grouped.index, x_labels)]
                         
-                        # Adjust spacing for better readability if many labels
-                        fig_width_per_bar = fig_size[0] / len(grouped)
-                        rotation = 45
-                        fontsize = 8
+                            # Adjust spacing for better readability if many labels
+                            fig_width_per_bar = fig_size[0] / len(grouped)
+                            rotation = 45
+                            fontsize = 8
                         
-                        # Adjust rotation and font size based on number of bars
-                        if len(grouped) > 8:
-                            rotation = 90
-                            fontsize = 7 if len(grouped) <= 15 else 6
+                            # Adjust rotation and font size based on number of bars
+                            if len(grouped) > 8:
+                                rotation = 90
+                                fontsize = 7 if len(grouped) <= 15 else 6
                         
-                        bars = ax.bar(x_labels, grouped.values, color=colors[:len(grouped.index)])
+                            bars = ax.bar(x_labels, grouped.values, color=colors[:len(grouped.index)])
                         
-                        for bar in bars:
-                            height = bar.get_height()
-                            ax.annotate(format_number(height), 
-                                      xy=(bar.get_x() + bar.get_width() / 2, height),
-                                      xytext=(0, 3), textcoords="offset points", 
-                                      ha='center', va='bottom', fontsize=6, color='black')
+                            for bar in bars:
+                                height = bar.get_height()
+                                ax.annotate(format_number(height), 
+                                          xy=(bar.get_x() + bar.get_width() / 2, height),
+                                          xytext=(0, 3), textcoords="offset points", 
+                                          ha='center', va='bottom', fontsize=6, color='black')
                         
-                        if len(grouped) > 2 and pd.api.types.is_numeric_dtype(df[y_col]):
-                            z = np.polyfit(range(len(grouped)), grouped.values, 1)
-                            p = np.poly1d(z)
-                            ax.plot(range(len(grouped)), p(range(len(grouped))), 
-                                  "r--", alpha=0.7, linewidth=1)
+                            if len(grouped) > 2 and pd.api.types.is_numeric_dtype(df[y_col]):
+                                z = np.polyfit(range(len(grouped)), grouped.values, 1)
+                                p = np.poly1d(z)
+                                ax.plot(range(len(grouped)), p(range(len(grouped))), 
+                                      "r--", alpha=0.7, linewidth=1)
                         
-                        ax.set_ylabel(y_label, fontsize=9)
-                        ax.set_xlabel(x_label, fontsize=9)
+                            ax.set_ylabel(y_label, fontsize=9)
+                            ax.set_xlabel(x_label, fontsize=9)
                         
-                        # Improve label spacing to avoid overlap
-                        plt.xticks(rotation=rotation, ha='right' if rotation < 90 else 'center', fontsize=fontsize)
-                        plt.yticks(fontsize=8)
+                            # Improve label spacing to avoid overlap
+                            plt.xticks(rotation=rotation, ha='right' if rotation < 90 else 'center', fontsize=fontsize)
+                            plt.yticks(fontsize=8)
                         
-                        # Add spacing at the bottom for rotated labels
-                        plt.subplots_adjust(bottom=0.2 if rotation > 0 else 0.15)
+                            # Add spacing at the bottom for rotated labels
+                            plt.subplots_adjust(bottom=0.2 if rotation > 0 else 0.15)
                         
-                        if pd.api.types.is_numeric_dtype(df[y_col]):
-                            ax.yaxis.set_major_locator(mticker.MaxNLocator(nbins=10))
-                            ax.yaxis.set_major_formatter(mticker.FuncFormatter(
-                                lambda x, p: format_number(x)))
-                        ax.set_title(chart_title, fontweight='bold', fontsize=10, pad=15)
-                        ax.spines['top'].set_visible(False)
-                        ax.spines['right'].set_visible(False)
-                        plt.tight_layout()
-                    except Exception as e:
-                        st.markdown(f"<span style='color:#d90429;font-size:14px;'>Bar chart failed: {str(e)}</span>", unsafe_allow_html=True)
+                            if pd.api.types.is_numeric_dtype(df[y_col]):
+                                ax.yaxis.set_major_locator(mticker.MaxNLocator(nbins=10))
+                                ax.yaxis.set_major_formatter(mticker.FuncFormatter(
+                                    lambda x, p: format_number(x)))
+                            ax.set_title(chart_title, fontweight='bold', fontsize=10, pad=15)
+                            ax.spines['top'].set_visible(False)
+                            ax.spines['right'].set_visible(False)
+                            plt.tight_layout()
+                        except Exception as e:
+                            st.markdown(f"<span style='color:#d90429;font-size:14px;'>Bar chart failed: {str(e)}</span>", unsafe_allow_html=True)
                 
-                elif chart_type == "Line":
-                    try:
-                        fig, ax = plt.subplots(figsize=fig_size)
-                        grouped = plot_df.groupby(x_col)[y_col].agg(agg_method if pd.api.types.is_numeric_dtype(df[y_col]) else 'count')
-                        x_labels = [truncate_text(idx, 1) for idx in grouped.index]
+                    elif chart_type == "Line":
+                        try:
+                            fig, ax = plt.subplots(figsize=fig_size)
+                            grouped = plot_df.set_index(x_col)[y_col] if pre_aggregated else plot_df.groupby(x_col)[y_col].agg(agg_method if pd.api.types.is_numeric_dtype(df[y_col]) else 'count')
+                            shown = np.arange(len(grouped))
+                            downsampled = len(grouped) > point_budget
+                            if downsampled:
+                                shown = lttb(shown, grouped.to_numpy(dtype=np.float64), point_budget)
+                                plot_x = shown
+                                _label_positions(ax, grouped.index)
+                            else:
+                                plot_x = [truncate_text(idx, 1) for idx in grouped.index]
                         
-                        # Adjust spacing for better readability
-                        rotation = 45
-                        fontsize = 8
-                        if len(grouped) > 8:
-                            rotation = 90
-                            fontsize = 7 if len(grouped) <= 15 else 6
+                            # Adjust spacing for better readability
+                            rotation = 45
+                            fontsize = 8
+                            if len(grouped) > 8:
+                                rotation = 90
+                                fontsize = 7 if len(grouped) <= 15 else 6
                             
-                        ax.plot(x_labels, grouped.values, marker='o', color=colors[0], 
-                              linewidth=2, markersize=5)
-                        for i, v in enumerate(grouped.values):
-                            ax.annotate(format_number(v), 
-                                      xy=(i, v), xytext=(0, 5), 
-                                      textcoords="offset points", 
-                                      ha='center', fontsize=6, color='black')
-                        if len(grouped) > 3 and pd.api.types.is_numeric_dtype(df[y_col]):
-                            window = min(3, len(grouped)-1)
-                            rolling_mean = grouped.rolling(window=window, center=True).mean()
-                            ax.plot(x_labels, rolling_mean, 'r--', linewidth=1.5, alpha=0.7, 
-                                  label='Trend')
-                            ax.legend(fontsize=8, loc='best')
-                        ax.set_ylabel(y_label, fontsize=9)
-                        ax.set_xlabel(x_label, fontsize=9)
+                            ax.plot(plot_x, grouped.values[shown], marker=None if downsampled else 'o', color=colors[0], 
+                                  linewidth=2 if not downsampled else 1, markersize=5)
+                            if not downsampled:
+                                for i, v in enumerate(grouped.values):
+                                    ax.annotate(format_number(v), 
+                                              xy=(i, v), xytext=(0, 5), 
+                                              textcoords="offset points", 
+                                              ha='center', fontsize=6, color='black')
+                            if len(grouped) > 3 and pd.api.types.is_numeric_dtype(df[y_col]):
+                                window = min(3, len(grouped)-1)
+                                rolling_mean = grouped.rolling(window=window, center=True).mean()
+                                ax.plot(plot_x, rolling_mean.values[shown], 'r--', linewidth=1.5, alpha=0.7, 
+                                      label='Trend')
+                                ax.legend(fontsize=8, loc='best')
+                            ax.set_ylabel(y_label, fontsize=9)
+                            ax.set_xlabel(x_label, fontsize=9)
                         
-                        # Improve label spacing
-                        plt.xticks(rotation=rotation, ha='right' if rotation < 90 else 'center', fontsize=fontsize)
-                        plt.yticks(fontsize=8)
+                            # Improve label spacing
+                            plt.xticks(rotation=rotation, ha='right' if rotation < 90 else 'center', fontsize=fontsize)
+                            plt.yticks(fontsize=8)
                         
-                        # Add spacing at the bottom for rotated labels
-                        plt.subplots_adjust(bottom=0.2 if rotation > 0 else 0.15)
+                            # Add spacing at the bottom for rotated labels
+                            plt.subplots_adjust(bottom=0.2 if rotation > 0 else 0.15)
                         
-                        if pd.api.types.is_numeric_dtype(df[y_col]):
-                            ax.yaxis.set_major_locator(mticker.MaxNLocator(nbins=10))
-                            ax.yaxis.set_major_formatter(mticker.FuncFormatter(
-                                lambda x, p: format_number(x)))
-                        ax.set_title(chart_title, fontweight='bold', fontsize=10, pad=15)
-                        ax.spines['top'].set_visible(False)
-                        ax.spines['right'].set_visible(False)
-                        plt.grid(True, linestyle='--', alpha=0.3)
-                        plt.tight_layout()
-                    except Exception as e:
-                        st.markdown(f"<span style='color:#d90429;font-size:14px;'>Line chart failed: {str(e)}</span>", unsafe_allow_html=True)
-                
-                elif chart_type == "Scatter":
-                    try:
-                        fig, ax = plt.subplots(figsize=fig_size)
-                        if len(plot_df) > 100:
-                            plot_df = plot_df.sample(100)
-                        if len(plot_df) > 2 and pd.api.types.is_numeric_dtype(plot_df[x_col]) and pd.api.types.is_numeric_dtype(plot_df[y_col]):
-                            z = np.polyfit(plot_df[x_col], plot_df[y_col], 1)
-                            p = np.poly1d(z)
-                            x_range = np.linspace(plot_df[x_col].min(), plot_df[x_col].max(), 100)
-                            ax.plot(x_range, p(x_range), "r--", alpha=0.7, linewidth=1.5, label='Trend')
-                        ax.scatter(plot_df[x_col], plot_df[y_col], 
-                                 c=colors[0], alpha=0.6, s=30)
-                        ax.set_ylabel(y_label, fontsize=9)
-                        ax.set_xlabel(x_label, fontsize=9)
-                        plt.xticks(fontsize=8, rotation=45, ha='right')
-                        plt.yticks(fontsize=8)
-                        if pd.api.types.is_numeric_dtype(plot_df[y_col]):
-                            ax.yaxis.set_major_locator(mticker.MaxNLocator(nbins=10))
-                            ax.yaxis.set_major_formatter(mticker.FuncFormatter(
-                                lambda x, p: format_number(x)))
-                        if pd.api.types.is_numeric_dtype(plot_df[x_col]):
-                            ax.xaxis.set_major_formatter(mticker.FuncFormatter(
-                                lambda x, p: format_number(x)))
-                        ax.set_title(chart_title, fontweight='bold', fontsize=10, pad=15)
-                        ax.spines['top'].set_visible(False)
-                        ax.spines['right'].set_visible(False)
-                        plt.grid(True, linestyle='--', alpha=0.3)
-                        plt.tight_layout()
-                    except Exception as e:
-                        st.markdown(f"<span style='color:#d90429;font-size:14px;'>Scatter chart failed: {str(e)}</span>", unsafe_allow_html=True)
-                
-                elif chart_type == "Pie":
-                    try:
-                        fig, ax = plt.subplots(figsize=fig_size)
-                        pie_data = pd.DataFrame({x_col: x_data, y_col: y_data}).dropna()
-                        grouped = pie_data.groupby(x_col)[y_col].agg(agg_method if pd.api.types.is_numeric_dtype(df[y_col]) else 'count')
-                        labels = [truncate_text(l, 1) for l in grouped.index]
-                        autopct_func = lambda pct: f"{pct:.1f}%"
-                        wedges, texts, autotexts = ax.pie(
-                            grouped.values, 
-                            labels=labels, 
-                            autopct=autopct_func if grouped.values.sum() > 0 else None,
-                            colors=colors[:len(grouped)], 
-                            textprops={'fontsize': 6, 'color': 'black'},
-                            wedgeprops={'linewidth': 0.5, 'edgecolor': 'white'}
-                        )
-                        ax.set_title(chart_title, fontweight='bold', fontsize=10, pad=15)
-                        plt.tight_layout()
-                    except Exception as e:
-                        st.markdown(f"<span style='color:#d90429;font-size:14px;'>Pie chart failed: {str(e)}</span>", unsafe_allow_html=True)
+                            if pd.api.types.is_numeric_dtype(df[y_col]):
+                                ax.yaxis.set_major_locator(mticker.MaxNLocator(nbins=10))
+                                ax.yaxis.set_major_formatter(mticker.FuncFormatter(
+                                    lambda x, p: format_number(x)))
+                            ax.set_title(chart_title, fontweight='bold', fontsize=10, pad=15)
+                            ax.spines['top'].set_visible(False)
+                            ax.spines['right'].set_visible(False)
+                            plt.grid(True, linestyle='--', alpha=0.3)
+                            plt.tight_layout()
+                        except Exception as e:
+                            st.markdown(f"<span style='color:#d90429;font-size:14px;'>Line chart failed: {str(e)}</span>", unsafe_allow_html=True)
                 
-                elif chart_type == "Area":
-                    try:
-                        fig, ax = plt.subplots(figsize=fig_size)
-                        grouped = plot_df.groupby(x_col)[y_col].agg(agg_method if pd.api.types.is_numeric_dtype(df[y_col]) else 'count')
-                        x_labels = [truncate_text(idx, 1) for idx in grouped.index]
-                        ax.fill_between(x_labels, grouped.values, alpha=0.4, color=colors[0])
-                        ax.plot(x_labels, grouped.values, color=colors[0], linewidth=2)
-                        for i, v in enumerate(grouped.values):
-                            ax.annotate(format_number(v), 
-                                      xy=(i, v), xytext=(0, 5), 
-                                      textcoords="offset points", 
-                                      ha='center', fontsize=6, color='black')
-                        if len(grouped) > 2 and pd.api.types.is_numeric_dtype(df[y_col]):
-                            z = np.polyfit(range(len(grouped)), grouped.values, 1)
-                            p = np.poly1d(z)
-                            ax.plot(range(len(grouped)), p(range(len(grouped))), 
-                                  "r--", alpha=0.7, linewidth=1.5, label='Trend')
-                            ax.legend(fontsize=8, loc='upper left')
-                        ax.set_ylabel(y_label, fontsize=9)
-                        ax.set_xlabel(x_label, fontsize=9)
-                        plt.xticks(rotation=45, ha='right', fontsize=8)
-                        plt.yticks(fontsize=8)
-                        if pd.api.types.is_numeric_dtype(df[y_col]):
-                            ax.yaxis.set_major_locator(mticker.MaxNLocator(nbins=10))
-                            ax.yaxis.set_major_formatter(mticker.FuncFormatter(
-                                lambda x, p: format_number(x)))
-                        ax.set_title(chart_title, fontweight='bold', fontsize=10, pad=15)
-                        ax.spines['top'].set_visible(False)
-                        ax.spines['right'].set_visible(False)
-                        plt.tight_layout()
-                    except Exception as e:
-                        st.markdown(f"<span style='color:#d90429;font-size:14px;'>Area chart failed: {str(e)}</span>", unsafe_allow_html=True)
+                    elif chart_type == "Scatter":
+                        try:
+                            fig, ax = plt.subplots(figsize=fig_size)
+                            # The trend is fitted on every point; only the drawn points are sampled
+                            points_df = plot_df
+                            if len(plot_df) > point_budget:
+                                points_df = plot_df.iloc[density_sample(_axis_values(plot_df[x_col]), _axis_values(plot_df[y_col]), point_budget)]
+                            if len(plot_df) > 2 and pd.api.types.is_numeric_dtype(plot_df[x_col]) and pd.api.types.is_numeric_dtype(plot_df[y_col]):
+                                z = np.polyfit(plot_df[x_col], plot_df[y_col], 1)
+                                p = np.poly1d(z)
+                                x_range = np.linspace(plot_df[x_col].min(), plot_df[x_col].max(), 100)
+                                ax.plot(x_range, p(x_range), "r--", alpha=0.7, linewidth=1.5, label='Trend')
+                            ax.scatter(points_df[x_col], points_df[y_col], 
+                                     c=colors[0], alpha=0.6, s=30)
+                            ax.set_ylabel(y_label, fontsize=9)
+                            ax.set_xlabel(x_label, fontsize=9)
+                            plt.xticks(fontsize=8, rotation=45, ha='right')
+                            plt.yticks(fontsize=8)
+                            if pd.api.types.is_numeric_dtype(plot_df[y_col]):
+                                ax.yaxis.set_major_locator(mticker.MaxNLocator(nbins=10))
+                                ax.yaxis.set_major_formatter(mticker.FuncFormatter(
+                                    lambda x, p: format_number(x)))
+                            if pd.api.types.is_numeric_dtype(plot_df[x_col]):
+                                ax.xaxis.set_major_formatter(mticker.FuncFormatter(
+                                    lambda x, p: format_number(x)))
+                            ax.set_title(chart_title, fontweight='bold', fontsize=10, pad=15)
+                            ax.spines['top'].set_visible(False)
+                            ax.spines['right'].set_visible(False)
+                            plt.grid(True, linestyle='--', alpha=0.3)
+                            plt.tight_layout()
+                        except Exception as e:
+                            st.markdown(f"<span style='color:#d90429;font-size:14px;'>Scatter chart failed: {str(e)}</span>", unsafe_allow_html=True)
                 
-                elif chart_type == "Heatmap":
-                    try:
-                        cat_cols = [c for c in df.columns if c != x_col and c != y_col 
-                                   and len(df[c].unique()) <= 20]
-                        if not cat_cols:
-                            st.markdown("<span style='color:#d90429;font-size:14px;'>Heatmap requires at least one more categorical column.</span>", unsafe_allow_html=True)
-                        else:
-                            heatmap_col = st.selectbox("Heatmap category column", 
-                                                     cat_cols, key=f"viz_heatmap_col_{key}")
+                    elif chart_type == "Pie":
+                        try:
                             fig, ax = plt.subplots(figsize=fig_size)
-                            heatmap_data = df.pivot_table(
-                                index=heatmap_col, 
-                                columns=x_col, 
-                                values=y_col, 
-                                aggfunc=agg_method if pd.api.types.is_numeric_dtype(df[y_col]) else 'count'
+                            pie_data = pd.DataFrame({x_col: x_data, y_col: y_data}).dropna()
+                            grouped = pie_data.set_index(x_col)[y_col] if pre_aggregated else pie_data.groupby(x_col)[y_col].agg(agg_method if pd.api.types.is_numeric_dtype(df[y_col]) else 'count')
+                            labels = [truncate_text(l, 1) for l in grouped.index]
+                            autopct_func = lambda pct: f"{pct:.1f}%"
+                            wedges, texts, autotexts = ax.pie(
+                                grouped.values, 
+                                labels=labels, 
+                                autopct=autopct_func if grouped.values.sum() > 0 else None,
+                                colors=colors[:len(grouped)], 
+                                textprops={'fontsize': 6, 'color': 'black'},
+                                wedgeprops={'linewidth': 0.5, 'edgecolor': 'white'}
                             )
-                            row_labels = [truncate_text(r, 1) for r in heatmap_data.index]
-                            col_labels = [truncate_text(c, 1) for c in heatmap_data.columns]
-                            im = ax.imshow(heatmap_data, cmap='viridis')
-                            ax.set_xticks(np.arange(len(col_labels)))
-                            ax.set_yticks(np.arange(len(row_labels)))
-                            ax.set_xticklabels(col_labels, fontsize=8)
-                            ax.set_yticklabels(row_labels, fontsize=8)
-                            plt.setp(ax.get_xticklabels(), rotation=45, ha="right", rotation_mode="anchor")
-                            cbar = plt.colorbar(im, ax=ax, shrink=0.8)
-                            cbar.ax.tick_params(labelsize=8)
-                            for i in range(len(row_labels)):
-                                for j in range(len(col_labels)):
-                                    value = heatmap_data.iloc[i, j]
-                                    if not pd.isna(value):
-                                        ax.text(j, i, format_number(value),
-                                              ha="center", va="center", 
-                                              color="white" if value > heatmap_data.mean().mean() else "black",
-                                              fontsize=6)
                             ax.set_title(chart_title, fontweight='bold', fontsize=10, pad=15)
                             plt.tight_layout()
-                    except Exception as e:
-                        st.markdown(f"<span style='color:#d90429;font-size:14px;'>Heatmap failed: {str(e)}</span>", unsafe_allow_html=True)
+                        except Exception as e:
+                            st.markdown(f"<span style='color:#d90429;font-size:14px;'>Pie chart failed: {str(e)}</span>", unsafe_allow_html=True)
                 
-                elif chart_type == "Pareto":
-                    try:
-                        fig, ax1 = plt.subplots(figsize=fig_size)
-                        pareto_data = plot_df.groupby(x_col)[y_col].agg(agg_method if pd.api.types.is_numeric_dtype(df[y_col]) else 'count')
-                        pareto_data = pareto_data.sort_values(ascending=False)
-                        cumpercentage = pareto_data.cumsum() / pareto_data.sum() * 100
-                        x_labels = [truncate_text(idx, 1) for idx in pareto_data.index]
+                    elif chart_type == "Area":
+                        try:
+                            fig, ax = plt.subplots(figsize=fig_size)
+                            grouped = plot_df.set_index(x_col)[y_col] if pre_aggregated else plot_df.groupby(x_col)[y_col].agg(agg_method if pd.api.types.is_numeric_dtype(df[y_col]) else 'count')
+                            shown = np.arange(len(grouped))
+                            downsampled = len(grouped) > point_budget
+                            if downsampled:
+                                shown = lttb(shown, grouped.to_numpy(dtype=np.float64), point_budget)
+                                plot_x = shown
+                                _label_positions(ax, grouped.index)
+                            else:
+                                plot_x = [truncate_text(idx, 1) for idx in grouped.index]
+                            ax.fill_between(plot_x, grouped.values[shown], alpha=0.4, color=colors[0])
+                            ax.plot(plot_x, grouped.values[shown], color=colors[0], linewidth=2 if not downsampled else 1)
+                            if not downsampled:
+                                for i, v in enumerate(grouped.values):
+                                    ax.annotate(format_number(v), 
+                                              xy=(i, v), xytext=(0, 5), 
+                                              textcoords="offset points", 
+                                              ha='center', fontsize=6, color='black')
+                            if len(grouped) > 2 and pd.api.types.is_numeric_dtype(df[y_col]):
+                                z = np.polyfit(range(len(grouped)), grouped.values, 1)
+                                p = np.poly1d(z)
+                                ax.plot(shown, p(shown), 
+                                      "r--", alpha=0.7, linewidth=1.5, label='Trend')
+                                ax.legend(fontsize=8, loc='upper left')
+                            ax.set_ylabel(y_label, fontsize=9)
+                            ax.set_xlabel(x_label, fontsize=9)
+                            plt.xticks(rotation=45, ha='right', fontsize=8)
+                            plt.yticks(fontsize=8)
+                            if pd.api.types.is_numeric_dtype(df[y_col]):
+                                ax.yaxis.set_major_locator(mticker.MaxNLocator(nbins=10))
+                                ax.yaxis.set_major_formatter(mticker.FuncFormatter(
+                                    lambda x, p: format_number(x)))
+                            ax.set_title(chart_title, fontweight='bold', fontsize=10, pad=15)
+                            ax.spines['top'].set_visible(False)
+                            ax.spines['right'].set_visible(False)
+                            plt.tight_layout()
+                        except Exception as e:
+                            st.markdown(f"<span style='color:#d90429;font-size:14px;'>Area chart failed: {str(e)}</span>", unsafe_allow_html=True)
+                
+                    elif chart_type == "Heatmap":
+                        try:
+                            cat_cols = [c for c in df.columns if c != x_col and c != y_col 
+                                       and len(df[c].unique()) <= 20]
+                            if not cat_cols:
+                                st.markdown("<span style='color:#d90429;font-size:14px;'>Heatmap requires at least one more categorical column.</span>", unsafe_allow_html=True)
+                            else:
+                                heatmap_col = st.selectbox("Heatmap category column", 
+                                                         cat_cols, key=f"viz_heatmap_col_{key}")
+                                fig, ax = plt.subplots(figsize=fig_size)
+                                heatmap_data = df.pivot_table(
+                                    index=heatmap_col, 
+                                    columns=x_col, 
+                                    values=y_col, 
+                                    aggfunc=agg_method if pd.api.types.is_numeric_dtype(df[y_col]) else 'count'
+                                )
+                                row_labels = [truncate_text(r, 1) for r in heatmap_data.index]
+                                col_labels = [truncate_text(c, 1) for c in heatmap_data.columns]
+                                im = ax.imshow(heatmap_data, cmap='viridis')
+                                ax.set_xticks(np.arange(len(col_labels)))
+                                ax.set_yticks(np.arange(len(row_labels)))
+                                ax.set_xticklabels(col_labels, fontsize=8)
+                                ax.set_yticklabels(row_labels, fontsize=8)
+                                plt.setp(ax.get_xticklabels(), rotation=45, ha="right", rotation_mode="anchor")
+                                cbar = plt.colorbar(im, ax=ax, shrink=0.8)
+                                cbar.ax.tick_params(labelsize=8)
+                                for i in range(len(row_labels)):
+                                    for j in range(len(col_labels)):
+                                        value = heatmap_data.iloc[i, j]
+                                        if not pd.isna(value):
+                                            ax.text(j, i, format_number(value),
+                                                  ha="center", va="center", 
+                                                  color="white" if value > heatmap_data.mean().mean() else "black",
+                                                  fontsize=6)
+                                ax.set_title(chart_title, fontweight='bold', fontsize=10, pad=15)
+                                plt.tight_layout()
+                        except Exception as e:
+                            st.markdown(f"<span style='color:#d90429;font-size:14px;'>Heatmap failed: {str(e)}</span>", unsafe_allow_html=True)
+                
+                    elif chart_type == "Pareto":
+                        try:
+                            fig, ax1 = plt.subplots(figsize=fig_size)
+                            pareto_data = plot_df.set_index(x_col)[y_col] if pre_aggregated else plot_df.groupby(x_col)[y_col].agg(agg_method if pd.api.types.is_numeric_dtype(df[y_col]) else 'count')
+                            pareto_data = pareto_data.sort_values(ascending=False)
+                            cumpercentage = pareto_data.cumsum() / pareto_data.sum() * 100
+                            x_labels = [truncate_text(idx, 1) for idx in pareto_data.index]
                         
-                        # Adjust label rotation and spacing for better readability
-                        rotation = 45
-                        fontsize = 8
-                        if len(pareto_data) > 8:
-                            rotation = 90
-                            fontsize = 7 if len(pareto_data) <= 15 else 6
+                            # Adjust label rotation and spacing for better readability
+                            rotation = 45
+                            fontsize = 8
+                            if len(pareto_data) > 8:
+                                rotation = 90
+                                fontsize = 7 if len(pareto_data) <= 15 else 6
                         
-                        bars = ax1.bar(x_labels, pareto_data, color=colors[0])
-                        ax2 = ax1.twinx()
-                        ax2.plot(x_labels, cumpercentage, 'bo-', linewidth=2, markersize=4, color='red')
-                        ax2.set_ylim([0, 105])
-                        ax2.set_ylabel('Cumulative %', fontsize=9)
-                        ax2.tick_params(axis='y', labelsize=8)
+                            bars = ax1.bar(x_labels, pareto_data, color=colors[0])
+                            ax2 = ax1.twinx()
+                            ax2.plot(x_labels, cumpercentage, 'bo-', linewidth=2, markersize=4, color='red')
+                            ax2.set_ylim([0, 105])
+                            ax2.set_ylabel('Cumulative %', fontsize=9)
+                            ax2.tick_params(axis='y', labelsize=8)
                         
-                        # Only annotate values if there's reasonable space
-                        if len(pareto_data) <= 10:
-                            for i, bar in enumerate(bars):
-                                height = bar.get_height()
-                                ax1.annotate(format_number(height), 
-                                          xy=(bar.get_x() + bar.get_width() / 2, height),
-                                          xytext=(0, 3), textcoords="offset points", 
-                                          ha='center', va='bottom', fontsize=6, color='black')
+                            # Only annotate values if there's reasonable space
+                            if len(pareto_data) <= 10:
+                                for i, bar in enumerate(bars):
+                                    height = bar.get_height()
+                                    ax1.annotate(format_number(height), 
+                                              xy=(bar.get_x() + bar.get_width() / 2, height),
+                                              xytext=(0, 3), textcoords="offset points", 
+                                              ha='center', va='bottom', fontsize=6, color='black')
                                 
-                                # Only annotate percentage points if not too crowded
-                                if i % max(1, len(pareto_data) // 5) == 0:
-                                    ax2.annotate(f"{cumpercentage.iloc[i]:.1f}%", 
-                                              xy=(i, cumpercentage.iloc[i]),
-                                              xytext=(0, 5), textcoords="offset points", 
-                                              ha='center', fontsize=6, color='red')
+                                    # Only annotate percentage points if not too crowded
+                                    if i % max(1, len(pareto_data) // 5) == 0:
+                                        ax2.annotate(f"{cumpercentage.iloc[i]:.1f}%", 
+                                                  xy=(i, cumpercentage.iloc[i]),
+                                                  xytext=(0, 5), textcoords="offset points", 
+                                                  ha='center', fontsize=6, color='red')
                         
-                        ax1.set_ylabel(y_label, fontsize=9)
-                        ax1.set_xlabel(x_label, fontsize=9)
+                            ax1.set_ylabel(y_label, fontsize=9)
+                            ax1.set_xlabel(x_label, fontsize=9)
                         
-                        # Improve label spacing
-                        plt.xticks(rotation=rotation, ha='right' if rotation < 90 else 'center', fontsize=fontsize)
+                            # Improve label spacing
+                            plt.xticks(rotation=rotation, ha='right' if rotation < 90 else 'center', fontsize=fontsize)
                         
-                        # Add bottom padding for rotated labels
-                        plt.subplots_adjust(bottom=0.2 if rotation > 0 else 0.15)
+                            # Add bottom padding for rotated labels
+                            plt.subplots_adjust(bottom=0.2 if rotation > 0 else 0.15)
                         
-                        ax1.tick_params(axis='y', labelsize=8)
-                        if pd.api.types.is_numeric_dtype(df[y_col]):
-                            ax1.yaxis.set_major_locator(mticker.MaxNLocator(nbins=10))
-                            ax1.yaxis.set_major_formatter(mticker.FuncFormatter(
-                                lambda x, p: format_number(x)))
-                        ax1.set_title(chart_title, fontweight='bold', fontsize=10, pad=15)
-                        ax1.spines['top'].set_visible(False)
-                        ax1.spines['right'].set_visible(False)
-                        plt.tight_layout()
-                    except Exception as e:
-                        st.markdown(f"<span style='color:#d90429;font-size:14px;'>Pareto chart failed: {str(e)}</span>", unsafe_allow_html=True)
+                            ax1.tick_params(axis='y', labelsize=8)
+                            if pd.api.types.is_numeric_dtype(df[y_col]):
+                                ax1.yaxis.set_major_locator(mticker.MaxNLocator(nbins=10))
+                                ax1.yaxis.set_major_formatter(mticker.FuncFormatter(
+                                    lambda x, p: format_number(x)))
+                            ax1.set_title(chart_title, fontweight='bold', fontsize=10, pad=15)
+                            ax1.spines['top'].set_visible(False)
+                            ax1.spines['right'].set_visible(False)
+                            plt.tight_layout()
+                        except Exception as e:
+                            st.markdown(f"<span style='color:#d90429;font-size:14px;'>Pareto chart failed: {str(e)}</span>", unsafe_allow_html=True)
                 
-                if fig:
-                    st.pyplot(fig)
+                if png is None and fig:
+                    png = figure_png(fig)
+                    if png_key:
+                        put_png(png_key, png)
+                    plt.close(fig)
+                if png is not None:
+                    st.image(png, width="stretch")
+                    if total_points > point_budget:
+                        st.markdown(f"<span style='color:black;font-style:italic;'>Showing {point_budget:,} of {total_points:,} points</span>", unsafe_allow_html=True)
+                    info = render_cache_info()
+                    st.caption(f"Render cache: {info['hits']} hits · {info['misses']} misses · {info['hit_rate']:.0%} hit rate")
                     
                 if len(numeric_cols) > 1 and len(columns) > 2:
                     with st.expander("Generate Multiple Visualizations", expanded=False):
@@ -695,6 +773,14 @@ def show(df, title="📊 Visualize Data", key=None):
         except Exception as e:
             st.markdown(f"<span style='color:#d90429;font-size:14px;font-weight:bold;'>Cannot plot: {str(e)}</span>", unsafe_allow_html=True)
 
+    # Whole-table estimates when the source table has been sketched; never triggers a scan here
+    sketches = None
+    if conn is not None and table:
+        try:
+            sketches = get_sketches(conn, table, build=False)
+        except Exception:
+            sketches = None
+
     insights_col1, insights_col2 = st.columns([1, 1])
     
     with insights_col1:
@@ -721,15 +807,17 @@ def show(df, title="📊 Visualize Data", key=None):
                 st.markdown(f"<span style='color:black;font-size:12px;'><b>{truncate_text(val)}:</b> {format_number(count)}</span>", unsafe_allow_html=True)
         except Exception as e:
             st.markdown(f"<span style='color:#d90429;font-size:12px;'>Top values failed: {str(e)}</span>", unsafe_allow_html=True)
+    full_table_insights(sketches, x_col, y_col)
     
     saved_path = None
-    if fig and st.button("Download Visual"):
+    if png is not None and st.button("Download Visual"):
         visuals_dir = os.path.join("my_projects", "visuals")
         os.makedirs(visuals_dir, exist_ok=True)
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         fname = f"{chart_type.lower()}_{timestamp}.png"
         temp_path = os.path.join(os.getcwd(), fname)
-        fig.savefig(temp_path, bbox_inches='tight', dpi=150)
+        with open(temp_path, "wb") as f:
+            f.write(png)
         save_path = os.path.join(visuals_dir, fname)
         try:
             os.replace(temp_path, save_path)
@@ -1,4 +1,13 @@
 import streamlit as st
+from modules.querycache import cached_query
 
 def navigate_to(target: str):
     st.session_state["page"] = target
+
+# Tables created by EBI for its own bookkeeping (jobs, caches, catalogs) share this prefix
+INTERNAL_TABLE_PREFIX = "_ebi_"
+
+def list_tables(conn):
+    """Names of user tables in the database, excluding EBI's internal tables"""
+    _, rows = cached_query(conn, "SELECT name FROM sqlite_master WHERE type='table' ORDER BY name")
+    return [row[0] for row in rows if not row[0].startswith(INTERNAL_TABLE_PREFIX)]